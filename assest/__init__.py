@@ -0,0 +1,2 @@
+# Cyber Drift game package. Start the game with `python -m assest`.
+# Submodules are imported on demand so that launching stays fast.
@@ -1,2 +0,0 @@
-# This file makes the scripts directory a Python package
-# It allows importing modules from this directory
@@ -0,0 +1,527 @@
+"""Cyber Drift application entry point.
+
+Start the game with ``python -m assest``. Only the display and font modules
+are initialized, and the simulation, HUD and profiler are imported the
+first time a game starts, so the menu comes up quickly. Sprites, fonts and
+the road strip are built on a worker thread behind a loading screen.
+"""
+import time
+
+# Startup is timed from here
+STARTED = time.perf_counter()
+
+import argparse
+import os
+import sys
+import pygame
+from pygame.locals import *
+
+from .startup import StartupTimer
+from .text import get_font, Label
+
+# Game constants
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+FPS = 60  # Display frame cap, 0 for uncapped; the simulation always runs at TICK_RATE
+MAX_CATCH_UP_TICKS = 5  # Simulation ticks allowed per displayed frame
+REPLAY_DIR = os.path.join(os.path.expanduser("~"), ".cyberdrift", "replays")  # Every run is recorded here
+REPLAY_SEEK_TICKS = 600  # [ and ] jump this far while watching a replay
+REWIND_SECONDS = 5  # Backspace steps the game back this far
+REWIND_BUFFER_SECONDS = 10  # Play kept for rewinding and crash dumps
+DUMP_DIR = os.path.join(os.path.expanduser("~"), ".cyberdrift", "dumps")  # F9 and crashes write here
+LOAD_SLICE_MS = 4  # Main thread time per loading screen frame spent converting assets
+
+# Colors
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+NEON_BLUE = (0, 195, 255)
+NEON_PINK = (255, 0, 153)
+NEON_GREEN = (57, 255, 20)
+
+# Created by init_display
+screen = None
+clock = None
+
+# Created when the first game starts
+profiler = None
+renderer = None
+latency = None  # Input event to display flip delays, kept across games
+quality = None  # Adaptive quality governor, kept across games
+
+# Level from assest.quality.QUALITY_LEVELS to hold, or "auto" to follow frame times (--quality)
+quality_mode = "auto"
+
+# Append a JSON line of frame and input latency metrics per game to this file (--metrics)
+metrics_path = None
+
+# Push only changed screen regions, for low-end machines (--dirty-rects)
+dirty_rects = False
+
+# Sprites, fonts and the road strip, built in the background behind the loading screen
+assets = None
+
+# Time to the first menu and gameplay frames
+startup = StartupTimer(STARTED)
+startup.mark("imports")
+
+# Set from the command line, for measuring cold starts
+startup_report = False
+quit_after = None
+
+# Replay to watch instead of playing (--replay), and the run being recorded
+replay_path = None
+recording = None
+
+# Split-screen players (--players); replays and rewinding are single-player only
+players = 1
+
+# Track to drive instead of the straight road (--track): a TrackFile or "endless",
+# and how replays name it
+track = None
+track_path = None
+
+# Background leaderboard sync, which also keeps the high score between sessions
+leaderboard = None
+BOARD_ROWS = 5  # Leaderboard entries shown on the menu
+
+# Game state
+game_active = False
+game_over = False
+score = 0
+high_score = 0
+paused = False
+
+def init_display():
+    """Open the game window, initializing only the pygame modules it needs"""
+    global screen, clock
+    
+    # Audio and joysticks are left alone; fonts are initialized on first use
+    pygame.display.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Cyber Drift: Neon Chase")
+    clock = pygame.time.Clock()
+    startup.mark("display")
+
+def start_recording(sim):
+    """Record the run to a new file in REPLAY_DIR"""
+    global recording
+    from .replay import ReplayWriter
+    
+    os.makedirs(REPLAY_DIR, exist_ok=True)
+    name = time.strftime("%Y%m%d-%H%M%S") + f"-{sim.seed}.cdr"
+    stream = open(os.path.join(REPLAY_DIR, name), "wb")
+    recording = (ReplayWriter(stream, sim.seed, track=track_path), sim)
+    return recording[0]
+
+def stop_recording():
+    global recording
+    if recording is not None:
+        writer, sim = recording
+        writer.close(sim)
+        writer.stream.close()
+        recording = None
+
+def write_metrics(sim):
+    """Append this game's frame time and input latency summary to the metrics file"""
+    import json
+    
+    record = {
+        "time": time.time(),
+        "seed": sim.seed,
+        "ticks": sim.tick,
+        "score": sim.score,
+        "frames": profiler.export(),
+        "input_latency_ms": latency.export(),
+        "quality": quality.export(),
+    }
+    with open(metrics_path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+def write_dump(rewind, reason):
+    """Save the buffered seconds of play for debugging"""
+    os.makedirs(DUMP_DIR, exist_ok=True)
+    path = os.path.join(DUMP_DIR, time.strftime("%Y%m%d-%H%M%S") + f"-{reason}.cdw")
+    rewind.dump(path)
+    print(f"wrote {rewind.seconds_available():.1f} s of play to {path}", file=sys.stderr)
+
+def quit_game():
+    stop_recording()
+    leaderboard.close()
+    pygame.quit()
+    sys.exit()
+
+def first_frame(milestone):
+    """Record a startup milestone and stop if the launch was only being timed"""
+    if not startup.mark(milestone):
+        return
+    if milestone == "first_menu_frame" and startup.over_budget():
+        print(f"startup budget exceeded: first menu frame after {startup.elapsed(milestone):.0f} ms "
+              f"(budget {startup.budget_ms:.0f} ms)", file=sys.stderr)
+    if quit_after == milestone or (startup_report and milestone == "first_gameplay_frame"):
+        startup.print_report()
+        if assets is not None:
+            assets.print_report()
+    if quit_after == milestone:
+        stop_recording()
+        leaderboard.close()
+        pygame.quit()
+        sys.exit(1 if startup.over_budget() else 0)
+
+def loading_screen():
+    """Animate a progress bar while the assets build on a worker thread"""
+    global assets
+    from .assets import game_assets
+    
+    assets = game_assets(400, SCREEN_HEIGHT).start()
+    bar = pygame.Rect(SCREEN_WIDTH//2 - 200, SCREEN_HEIGHT//2 - 6, 400, 12)
+    phase = 0.0
+    
+    # Drawn with shapes only, so the first frame needs no fonts
+    while not assets.done():
+        for event in pygame.event.get():
+            if event.type == QUIT:
+                quit_game()
+        
+        assets.pump(LOAD_SLICE_MS)
+        
+        screen.fill(BLACK)
+        pygame.draw.rect(screen, NEON_BLUE, bar.inflate(8, 8), 2)
+        pygame.draw.rect(screen, NEON_PINK, (bar.x, bar.y, int(bar.width * assets.progress()), bar.height))
+        
+        # A light sweeping along the bar, so the screen moves even while one big asset builds
+        phase = (phase + 0.02) % 1.0
+        glow_x = bar.x + int(bar.width * phase)
+        pygame.draw.circle(screen, NEON_GREEN, (glow_x, bar.bottom + 24), 5)
+        
+        pygame.display.flip()
+        first_frame("first_loading_frame")
+        clock.tick(FPS)
+    startup.mark("assets")
+
+def main_menu():
+    """Display the main menu"""
+    global game_active, high_score
+    from .road import Road
+    
+    # Create animated background
+    road = Road(400, SCREEN_HEIGHT)
+    
+    # Fonts and text are built once, not every frame
+    title_font = get_font('Arial', 64)
+    subtitle_font = get_font('Arial', 24)
+    
+    title = title_font.render("CYBER DRIFT", True, NEON_PINK)
+    subtitle = subtitle_font.render("NEON CHASE", True, NEON_BLUE)
+    start_text = subtitle_font.render("Press SPACE to start", True, NEON_GREEN)
+    high_score_text = Label(subtitle_font, NEON_BLUE)
+    
+    # Leaderboard rows, re-rendered only when the worker publishes a new board
+    board_font = get_font('Arial', 18)
+    board_status = Label(board_font, NEON_PINK)
+    board_rows = []
+    shown_board = None
+    leaderboard.refresh()
+    
+    while not game_active:
+        screen.fill(BLACK)
+        
+        # Update and draw road for background effect
+        road.update(2)
+        road.draw(screen)
+        
+        # Draw title
+        screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 150))
+        screen.blit(subtitle, (SCREEN_WIDTH//2 - subtitle.get_width()//2, 220))
+        
+        # Draw start prompt
+        screen.blit(start_text, (SCREEN_WIDTH//2 - start_text.get_width()//2, 400))
+        
+        # Draw high score, which the leaderboard loads from disk in the background
+        high_score = max(high_score, leaderboard.high_score)
+        if high_score > 0:
+            text = high_score_text.get(f"HIGH SCORE: {high_score}")
+            screen.blit(text, (SCREEN_WIDTH//2 - text.get_width()//2, 450))
+        
+        # Draw the cached leaderboard; never waits on the network
+        if leaderboard.board is not shown_board:
+            shown_board = leaderboard.board
+            board_rows = [board_font.render(f"{rank}. {name[:16]}  {entry_score}", True, NEON_GREEN)
+                          for rank, (name, entry_score) in enumerate(shown_board[:BOARD_ROWS], 1)]
+        for i, row in enumerate(board_rows):
+            screen.blit(row, (SCREEN_WIDTH//2 - row.get_width()//2, 485 + i * 20))
+        if leaderboard.pending:
+            text = board_status.get(f"{leaderboard.pending} SCORES WAITING TO UPLOAD ({leaderboard.status.upper()})")
+            screen.blit(text, (SCREEN_WIDTH//2 - text.get_width()//2, SCREEN_HEIGHT - 22))
+        
+        pygame.display.flip()
+        first_frame("first_menu_frame")
+        if quit_after == "first_gameplay_frame":
+            game_active = True
+        
+        for event in pygame.event.get():
+            if event.type == QUIT:
+                quit_game()
+            if event.type == KEYDOWN:
+                if event.key == K_SPACE:
+                    game_active = True
+                if event.key == K_ESCAPE:
+                    quit_game()
+        
+        clock.tick(FPS)
+
+def game_loop():
+    """Main game loop"""
+    global game_active, game_over, score, high_score, paused, profiler, renderer, latency, quality
+    from .engine import Simulation, TICK_RATE
+    from .hud import HUD
+    from .controls import KeyboardInput, GamepadInput, CombinedInput, MultiInput, InputRouter, SPLIT_KEYS
+    from .timestep import FixedTimestep
+    from .profiler import FrameProfiler, LatencyTracker
+    from .render import DirtyRenderer
+    from .quality import QualityGovernor
+    
+    if profiler is None:
+        # Frame profiler, toggled in game with F3
+        profiler = FrameProfiler(enabled=metrics_path is not None)
+        latency = LatencyTracker()
+        
+        # Scales effects and glows to the frame time left over at the frame cap
+        if quality_mode == "auto":
+            quality = QualityGovernor(log=sys.stderr)
+        else:
+            quality = QualityGovernor(level=quality_mode, locked=True, log=sys.stderr)
+        
+        # Presents finished frames, either whole or as dirty rectangles
+        renderer = DirtyRenderer((SCREEN_WIDTH, SCREEN_HEIGHT), dirty_rects)
+    
+    # Reset game state
+    game_over = False
+    score = 0
+    paused = False
+    
+    # Create game objects, either for a new run or to watch a recorded one.
+    # Keyboard and gamepad drive together; split-screen seat i also takes gamepad i.
+    split = None
+    if replay_path is not None:
+        from .replay import Replay, ReplayPlayer
+        replay = ReplayPlayer(Replay.load(replay_path), profiler)
+        sim = replay.sim
+        inputs = InputRouter(CombinedInput([KeyboardInput(), GamepadInput()]))
+        input_source = replay
+        writer = None
+        rewind = None
+    elif players > 1:
+        from .splitscreen import SplitSimulation, SplitScreen
+        replay = None
+        sim = SplitSimulation(players, profiler=profiler, track=track)
+        split = SplitScreen(sim, screen)
+        inputs = InputRouter(MultiInput([CombinedInput([KeyboardInput(keys), GamepadInput(seat)])
+                                         for seat, keys in enumerate(SPLIT_KEYS[:players])]), latency)
+        input_source = inputs
+        writer = None
+        rewind = None
+    else:
+        from .rewind import RewindBuffer
+        replay = None
+        sim = Simulation(profiler=profiler, track=track)
+        inputs = InputRouter(CombinedInput([KeyboardInput(), GamepadInput()]), latency)
+        input_source = inputs
+        writer = start_recording(sim)
+        rewind = RewindBuffer(sim, REWIND_BUFFER_SECONDS)
+    player = sim.player
+    quality.attach(sim)
+    hud = HUD()
+    timestep = FixedTimestep(TICK_RATE, MAX_CATCH_UP_TICKS)
+    clock.tick()
+    
+    # Pause and game over screens are drawn once, then left alone
+    static_screen = None
+    renderer.mark_all()
+    
+    # Game loop
+    while game_active:
+        frame_time = clock.tick(FPS) / 1000.0
+        frame_start = time.perf_counter()
+        profiler.mark("idle")
+        profiler.end_frame()
+        
+        # Handle pause
+        if paused:
+            for event in pygame.event.get():
+                if event.type == QUIT:
+                    quit_game()
+                command = inputs.handle_event(event)
+                if command == "pause":
+                    paused = False
+                if command == "back":
+                    game_active = False
+            inputs.discard()
+                        
+            # Draw paused screen
+            if static_screen != "pause":
+                hud.draw_pause_menu(screen)
+                renderer.mark_all()
+                static_screen = "pause"
+            renderer.present()
+            timestep.reset()
+            continue
+        
+        # Process events; driving input is timestamped, everything else maps to a command
+        for event in pygame.event.get():
+            if event.type == QUIT:
+                quit_game()
+            command = inputs.handle_event(event)
+            if command == "back":
+                if game_over:
+                    game_active = False
+                else:
+                    paused = True
+            if command == "confirm" and game_over:
+                game_active = False
+            if command == "pause":
+                paused = not paused
+            if command == "profiler":
+                profiler.toggle()
+            if replay is not None and command in ("seek_back", "seek_forward"):
+                # Jump through the replay
+                step = REPLAY_SEEK_TICKS if command == "seek_forward" else -REPLAY_SEEK_TICKS
+                replay.seek(sim.tick + step)
+                timestep.reset()
+                renderer.mark_all()
+            if rewind is not None and not game_over and command == "rewind":
+                # Step back a few seconds; the replay drops what was undone
+                if rewind.rewind(REWIND_SECONDS) is not None:
+                    writer.rewind(sim)
+                    timestep.reset()
+                    renderer.mark_all()
+            if rewind is not None and command == "dump":
+                write_dump(rewind, "manual")
+        profiler.mark("input")
+        
+        # Skip updates if game over
+        if game_over:
+            inputs.discard()
+            if static_screen != "game_over":
+                hud.draw_game_over(screen, score)
+                renderer.mark_all()
+                static_screen = "game_over"
+            renderer.present()
+            continue
+        
+        # Run as many fixed ticks as the elapsed time calls for
+        for _ in range(timestep.advance(frame_time)):
+            controls = input_source.get_state(sim)
+            if writer is not None:
+                writer.record(sim, controls)
+            try:
+                sim.step(controls)
+            except Exception:
+                if rewind is not None:
+                    write_dump(rewind, "crash")
+                raise
+            if rewind is not None:
+                rewind.capture()
+            if split is not None:
+                split.update()
+            else:
+                hud.update(sim.score_change, sim.damage_taken)
+            if sim.game_over or (replay is not None and replay.finished):
+                break
+        score = sim.score
+        
+        if sim.game_over or (replay is not None and replay.finished):
+            # Player died
+            game_over = True
+            if replay is None:
+                # Queued and uploaded off the game thread; split-screen and custom track scores only count locally
+                leaderboard.submit(score, sim.seed, sim.tick, upload=split is None and track is None)
+                high_score = max(high_score, score)
+        
+        # Draw everything, interpolated between the last two ticks
+        if split is not None:
+            # One world draw, cropped into every player's viewport with its own HUD
+            split.draw(timestep.alpha)
+        else:
+            screen.fill(BLACK)
+            sim.draw(screen, timestep.alpha)
+            
+            # Draw HUD
+            hud.draw(screen, player, score, player.velocity.length())
+        profiler_panel = hud.draw_profiler(screen, profiler, latency=latency, quality=quality)
+        profiler.mark("hud.draw")
+        
+        # Collect the regions that changed this frame
+        if static_screen is not None or split is not None:
+            # Coming back from an overlay, or viewports that pan, so everything changed
+            renderer.mark_all()
+            static_screen = None
+        sim.mark_dirty(renderer)
+        for rect in hud.dirty_rects:
+            renderer.mark(rect)
+        if profiler_panel is not None:
+            renderer.mark_transient(profiler_panel)
+        
+        # Update display; inputs taken by this frame's ticks are now on screen
+        renderer.present()
+        inputs.presented()
+        profiler.mark("flip")
+        quality.record(time.perf_counter() - frame_start)
+        first_frame("first_gameplay_frame")
+        
+    stop_recording()
+    if metrics_path is not None:
+        write_metrics(sim)
+
+def main(argv=None):
+    global startup_report, quit_after, replay_path, players, leaderboard, track, track_path, metrics_path
+    global quality_mode, dirty_rects
+    from .leaderboard import LeaderboardClient
+    parser = argparse.ArgumentParser(description="Cyber Drift: Neon Chase")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print startup timings once the first gameplay frame is shown")
+    parser.add_argument("--startup-budget", type=float, default=None, metavar="MS",
+                        help="warn when the first menu frame takes longer than this")
+    parser.add_argument("--quit-after", choices=["first_menu_frame", "first_gameplay_frame"], default=None,
+                        help="exit after this frame and print the startup timings (exit status 1 if over budget)")
+    parser.add_argument("--replay", default=None, metavar="FILE",
+                        help="watch a recorded run; [ and ] seek backwards and forwards")
+    parser.add_argument("--players", type=int, choices=range(1, 5), default=1, metavar="N",
+                        help="split-screen players on one keyboard (1-4)")
+    parser.add_argument("--track", default=None, metavar="FILE",
+                        help="drive a track file (see python -m assest.track), or 'endless' for a generated one")
+    parser.add_argument("--leaderboard", default=os.environ.get("CYBERDRIFT_LEADERBOARD"), metavar="URL",
+                        help="leaderboard server to post scores to (default: $CYBERDRIFT_LEADERBOARD, or offline)")
+    parser.add_argument("--name", default=os.environ.get("CYBERDRIFT_NAME", "PLAYER"),
+                        help="name shown on the leaderboard")
+    parser.add_argument("--metrics", default=None, metavar="FILE",
+                        help="append frame time and input latency percentiles for each game to this JSON lines file")
+    parser.add_argument("--quality", choices=["auto", "high", "medium", "low", "minimal"], default="auto",
+                        help="hold effects and glows at one level instead of adapting to frame times")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="update only the screen regions that changed each frame, for slow displays")
+    args = parser.parse_args(argv)
+    replay_path = args.replay
+    metrics_path = args.metrics
+    quality_mode = args.quality
+    dirty_rects = args.dirty_rects
+    players = args.players
+    if args.track == "endless":
+        track = track_path = "endless"
+    elif args.track:
+        from .track import TrackFile
+        track_path = os.path.abspath(args.track)
+        track = TrackFile(track_path)
+    leaderboard = LeaderboardClient(args.leaderboard, name=args.name).start()
+    startup.budget_ms = args.startup_budget
+    startup_report = args.startup_report
+    quit_after = args.quit_after
+    
+    init_display()
+    loading_screen()
+    while True:
+        main_menu()
+        game_loop()
+
+# Main game execution
+if __name__ == "__main__":
+    main()
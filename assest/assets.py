@@ -0,0 +1,180 @@
+"""Background asset loading.
+
+An ``AssetManager`` builds everything on a list of assets on a worker
+thread: it opens fonts, draws and rotates sprites, and bakes the road
+strip. Only ``convert()``/``convert_alpha()`` has to run
+on the main thread, which owns the display. ``pump`` does that in
+time-sliced batches, one surface at a time, so a loading screen can keep
+animating while a large asset set streams in.
+
+Finished assets go into the same shared caches the game already builds
+from on demand (``atlas_registry``, ``strip_cache`` and the font cache).
+Anything that fails or has not arrived yet is still built there the first
+time it is asked for.
+"""
+import queue
+import sys
+import threading
+import time
+
+import pygame
+
+from .atlas import RotationAtlas, atlas_registry
+from .text import get_font
+
+
+class Asset:
+    """One entry on the load list, with its timings in milliseconds."""
+
+    __slots__ = ("name", "build", "install", "value", "error",
+                 "queued", "build_ms", "wait_ms", "convert_ms", "surfaces")
+
+    def __init__(self, name, build, install=None):
+        self.name = name
+        self.build = build  # Runs on the worker thread
+        self.install = install  # Runs on the main thread with the converted value
+        self.value = None
+        self.error = None
+        self.queued = None
+        self.build_ms = 0.0
+        self.wait_ms = 0.0  # Built, waiting for the main thread
+        self.convert_ms = 0.0
+        self.surfaces = 0
+
+
+def _surfaces(value):
+    # The surfaces inside a built asset, as (container, index) slots to convert in place
+    if isinstance(value, pygame.Surface):
+        return [(None, None)]
+    if isinstance(value, RotationAtlas):
+        return [(value.frames, i) for i in range(len(value.frames))]
+    return []
+
+
+def _convert(surface):
+    if surface.get_flags() & pygame.SRCALPHA:
+        return surface.convert_alpha()
+    return surface.convert()
+
+
+class AssetManager:
+    def __init__(self):
+        self.assets = []
+        self.ready = queue.Queue()  # Built assets, in the order they finished
+        self.thread = None
+
+        # Main thread conversion in progress: (asset, remaining slots)
+        self.converting = None
+        self.loaded = 0
+
+    def add(self, name, build, install=None):
+        self.assets.append(Asset(name, build, install))
+
+    def add_atlas(self, key, build, *args):
+        # A sprite design and all its rotations, installed in the shared registry
+        steps = atlas_registry.steps
+        self.add(f"atlas {key}", lambda: RotationAtlas(build(*args), steps),
+                 lambda atlas: atlas_registry.add(key, atlas))
+
+    def add_font(self, name, size):
+        # Fonts need no conversion; opening them fills the shared font cache
+        self.add(f"font {name} {size}", lambda: get_font(name, size))
+
+    def start(self):
+        # The font module is initialized here, on the main thread, before any worker uses it
+        if not pygame.font.get_init():
+            pygame.font.init()
+        self.thread = threading.Thread(target=self._run, name="assets", daemon=True)
+        self.thread.start()
+        return self
+
+    def _run(self):
+        for asset in self.assets:
+            started = time.perf_counter()
+            try:
+                asset.value = asset.build()
+            except Exception as error:
+                asset.error = error
+            asset.queued = time.perf_counter()
+            asset.build_ms = (asset.queued - started) * 1000.0
+            self.ready.put(asset)
+
+    def done(self):
+        return self.loaded == len(self.assets)
+
+    def progress(self):
+        return self.loaded / len(self.assets) if self.assets else 1.0
+
+    def pump(self, budget_ms=4.0):
+        """Convert and install built assets for up to ``budget_ms``. Call once per frame."""
+        deadline = time.perf_counter() + budget_ms / 1000.0
+        while time.perf_counter() < deadline:
+            if self.converting is None:
+                try:
+                    asset = self.ready.get_nowait()
+                except queue.Empty:
+                    return
+                asset.wait_ms = (time.perf_counter() - asset.queued) * 1000.0
+                self.converting = (asset, [] if asset.error else _surfaces(asset.value))
+
+            asset, slots = self.converting
+            started = time.perf_counter()
+            if slots:
+                container, index = slots.pop()
+                if container is None:
+                    asset.value = _convert(asset.value)
+                else:
+                    container[index] = _convert(container[index])
+                asset.surfaces += 1
+            asset.convert_ms += (time.perf_counter() - started) * 1000.0
+            if slots:
+                continue
+
+            self.converting = None
+            self.loaded += 1
+            if asset.error is None and asset.install is not None:
+                asset.install(asset.value)
+
+    def wait(self):
+        # Load everything without a loading screen
+        while not self.done():
+            self.pump(50.0)
+            time.sleep(0.001)
+
+    def report(self):
+        return [{
+            "name": asset.name,
+            "build_ms": round(asset.build_ms, 2),
+            "wait_ms": round(asset.wait_ms, 2),
+            "convert_ms": round(asset.convert_ms, 2),
+            "surfaces": asset.surfaces,
+            "error": None if asset.error is None else str(asset.error),
+        } for asset in self.assets]
+
+    def print_report(self, file=sys.stderr):
+        for row in self.report():
+            line = (f"asset {row['name']:28s} build {row['build_ms']:7.1f} ms  wait {row['wait_ms']:6.1f} ms  "
+                    f"convert {row['convert_ms']:6.1f} ms ({row['surfaces']} surfaces)")
+            if row["error"]:
+                line += f"  FAILED: {row['error']}"
+            print(line, file=file)
+
+
+def game_assets(road_width=400, screen_height=600):
+    """The load list for the game: fonts, car and power-up sprites, and the road."""
+    from .player import build_player_image
+    from .enemy import build_enemy_image
+    from .powerup import build_powerup_image, POWERUP_COLORS
+    from .road import Road, strip_cache
+
+    assets = AssetManager()
+    for size in (64, 36, 24, 18):
+        assets.add_font('Arial', size)
+    assets.add_atlas("player", build_player_image)
+    assets.add_atlas("enemy", build_enemy_image)
+    for powerup_type in POWERUP_COLORS:
+        assets.add_atlas(("powerup", powerup_type), build_powerup_image, powerup_type)
+
+    road = Road(road_width, screen_height)
+    assets.add("road strip", road.build_strip, lambda strip: strip_cache.setdefault(road.strip_key(), strip))
+    return assets
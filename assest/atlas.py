@@ -0,0 +1,58 @@
+import pygame
+
+# Rotation steps per full turn for each quality preset
+ATLAS_QUALITY = {
+    "low": 36,
+    "medium": 72,
+    "high": 120,
+}
+
+
+class RotationAtlas:
+    """One sprite design pre-rendered at ``steps`` evenly spaced angles."""
+
+    def __init__(self, image, steps):
+        self.steps = steps
+        self.step_angle = 360 / steps
+        self.frames = [pygame.transform.rotate(image, i * self.step_angle) for i in range(steps)]
+
+    def index(self, angle):
+        return int(round(angle / self.step_angle)) % self.steps
+
+    def frame(self, angle):
+        return self.frames[self.index(angle)]
+
+
+class AtlasRegistry:
+    def __init__(self, steps=ATLAS_QUALITY["high"]):
+        self.steps = steps
+        self.atlases = {}
+
+    def set_quality(self, quality):
+        # Accepts a preset name or an explicit number of steps
+        steps = ATLAS_QUALITY.get(quality, quality)
+        if steps != self.steps:
+            self.steps = int(steps)
+            self.atlases.clear()
+
+    def get(self, key, build, *args):
+        # `build(*args)` is only called the first time a design is requested
+        atlas = self.atlases.get(key)
+        if atlas is None:
+            atlas = RotationAtlas(build(*args), self.steps)
+            self.atlases[key] = atlas
+        return atlas
+
+    def add(self, key, atlas):
+        # Install an atlas built elsewhere, such as by the asset loader.
+        # Ignored if the quality changed since it was built.
+        if atlas.steps == self.steps:
+            self.atlases.setdefault(key, atlas)
+
+    def memory_bytes(self):
+        return sum(frame.get_width() * frame.get_height() * 4
+                   for atlas in self.atlases.values() for frame in atlas.frames)
+
+
+# Shared by every sprite instance
+atlas_registry = AtlasRegistry()
@@ -0,0 +1,405 @@
+"""Scripted performance scenarios run through the real game managers.
+
+Usage::
+
+    python -m assest.bench --output results.json
+    python -m assest.bench --baseline results.json
+
+Runs under the SDL dummy video driver, so no window is opened.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from functools import wraps
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+from .controls import InputState, IDLE
+from .engine import Simulation, SCREEN_WIDTH, SCREEN_HEIGHT
+from .powerup import POWERUP_COLORS
+from .hud import HUD
+from .splitscreen import SplitSimulation, SplitScreen
+from .quality import QualityGovernor, LEVEL_NAMES
+
+# Stages timed in every scenario, in frame order
+STAGES = [
+    "road.update", "player.update", "enemies.update", "powerups.update", "effects.update",
+    "collisions",
+    "road.draw", "player.draw", "enemies.draw", "powerups.draw", "effects.draw",
+    "hud.draw", "overlay.draw",
+]
+
+
+class SurfaceCounter:
+    """Counts surfaces created from Python while installed.
+
+    Wraps the ``pygame.Surface`` constructor and the ``pygame.transform``
+    functions that return new surfaces. Surfaces created inside C, such as
+    by ``Font.render``, are not seen.
+    """
+
+    TRANSFORMS = ("rotate", "rotozoom", "scale", "smoothscale", "flip")
+
+    def __init__(self):
+        self.count = 0
+        self._saved = {}
+
+    def install(self):
+        counter = self
+        original_surface = pygame.Surface
+
+        class CountingSurface(original_surface):
+            def __init__(self, *args, **kwargs):
+                counter.count += 1
+                super().__init__(*args, **kwargs)
+
+        self._saved[(pygame, "Surface")] = original_surface
+        pygame.Surface = CountingSurface
+
+        for name in self.TRANSFORMS:
+            original = getattr(pygame.transform, name)
+            self._saved[(pygame.transform, name)] = original
+            setattr(pygame.transform, name, self._counting(original))
+
+    def _counting(self, function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            self.count += 1
+            return function(*args, **kwargs)
+        return wrapper
+
+    def uninstall(self):
+        for (owner, name), original in self._saved.items():
+            setattr(owner, name, original)
+        self._saved.clear()
+
+
+class StageTimer:
+    def __init__(self):
+        self.current = {}
+        self.samples = {stage: [] for stage in STAGES}
+
+    def wrap(self, obj, method, stage):
+        # Replace a bound method on one instance with a timed version
+        function = getattr(obj, method)
+
+        @wraps(function)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.current[stage] = self.current.get(stage, 0.0) + time.perf_counter() - start
+
+        setattr(obj, method, timed)
+
+    def end_frame(self, record):
+        if record:
+            for stage in STAGES:
+                self.samples[stage].append(self.current.get(stage, 0.0))
+        self.current = {}
+
+
+class Scenario:
+    """A named script: ``setup`` runs once, ``frame`` before every step."""
+
+    overlay = None
+    controls = IDLE
+    batched_ai = False
+    players = 1
+
+    def __init__(self, name):
+        self.name = name
+
+    def track(self):
+        # Track to drive, or None for the straight road
+        return None
+
+    def setup(self, sim):
+        pass
+
+    def frame(self, sim, index):
+        pass
+
+
+class ExplosionStorm(Scenario):
+    def frame(self, sim, index):
+        rng = sim.rng
+        for _ in range(3):
+            sim.effect_manager.add_explosion(rng.randint(0, SCREEN_WIDTH), rng.randint(0, SCREEN_HEIGHT),
+                                             (255, 100, 0), 50)
+
+
+class EnemyWave(Scenario):
+    count = 80
+
+    def setup(self, sim):
+        for _ in range(self.count):
+            self.spawn(sim, sim.rng.randint(-100, SCREEN_HEIGHT))
+
+    def spawn(self, sim, y):
+        manager = sim.enemy_manager
+        geometry = sim.road.geometry(y)
+        lane = sim.rng.randint(0, geometry.lanes - 1)
+        x = geometry.lane_center(lane)
+        # Through the manager's pool, so its statistics see every scenario enemy
+        manager.add_enemy(manager.pool.acquire(x, y, manager.difficulty, sim.rng))
+
+    def frame(self, sim, index):
+        # Keep the screen full as enemies drive off the bottom, entering where the game spawns them
+        for _ in range(self.count - len(sim.enemy_manager.enemies)):
+            self.spawn(sim, -100)
+
+
+class EnemyHorde(EnemyWave):
+    # Far more enemies than the game spawns, on the vectorized AI path
+    count = 1000
+    batched_ai = True
+
+
+class SplitScreenWave(EnemyWave):
+    # The enemy wave again, shared by two split-screen players; compare with enemy_wave
+    players = 2
+
+
+class TrackWave(EnemyWave):
+    # The enemy wave on the demo circuit, where the road is drawn in bands; compare with enemy_wave
+    def track(self):
+        import tempfile
+        from .track import TrackFile, demo_track
+
+        path = os.path.join(tempfile.gettempdir(), "cyberdrift-bench.cdt")
+        demo_track().write(path)
+        return TrackFile(path)
+
+
+class EndlessWave(EnemyWave):
+    # The enemy wave on a generated road, drawn from baked segments once they are ready
+    def track(self):
+        return "endless"
+
+
+class BoostTrail(Scenario):
+    controls = InputState(up=True, boost=True)
+
+    def frame(self, sim, index):
+        player = sim.player
+        player.boost = 100
+        # Hold the car in place so the trail stays on screen
+        player.position.y = SCREEN_HEIGHT - 100
+
+
+class PowerUpShower(Scenario):
+    count = 150
+
+    def setup(self, sim):
+        for _ in range(self.count):
+            self.spawn(sim, sim.rng.randint(-50, SCREEN_HEIGHT))
+
+    def spawn(self, sim, y):
+        rng = sim.rng
+        manager = sim.powerup_manager
+        manager.add_powerup(
+            manager.pool.acquire(rng.randint(0, SCREEN_WIDTH), y, rng.choice(list(POWERUP_COLORS)), rng))
+
+    def frame(self, sim, index):
+        for _ in range(self.count - len(sim.powerup_manager.powerups)):
+            self.spawn(sim, -50)
+
+
+class Overlay(Scenario):
+    def __init__(self, name, overlay):
+        super().__init__(name)
+        self.overlay = overlay
+
+
+SCENARIOS = [
+    ExplosionStorm("explosion_storm"),
+    EnemyWave("enemy_wave"),
+    EnemyHorde("enemy_horde"),
+    SplitScreenWave("split_screen_wave"),
+    TrackWave("track_wave"),
+    EndlessWave("endless_wave"),
+    BoostTrail("boost_trail"),
+    PowerUpShower("powerup_shower"),
+    Overlay("pause_overlay", "pause"),
+    Overlay("game_over_overlay", "game_over"),
+]
+
+
+def percentiles(samples):
+    values = np.asarray(samples) * 1000.0
+    return {
+        "mean": float(values.mean()),
+        "p50": float(np.percentile(values, 50)),
+        "p95": float(np.percentile(values, 95)),
+        "p99": float(np.percentile(values, 99)),
+        "max": float(values.max()),
+    }
+
+
+def run_scenario(scenario, screen, frames=600, warmup=60, seed=1234, quality="high"):
+    # `quality` is a level name to hold, or "auto" to let the governor adapt during the run
+    if scenario.players > 1:
+        sim = SplitSimulation(scenario.players, seed, batched_ai=scenario.batched_ai, track=scenario.track())
+        split = SplitScreen(sim, screen)
+        huds = split.huds
+        controls = [scenario.controls] * scenario.players
+    else:
+        sim = Simulation(seed, batched_ai=scenario.batched_ai, track=scenario.track())
+        split = None
+        huds = [HUD()]
+        controls = scenario.controls
+    hud = huds[0]
+    if quality == "auto":
+        governor = QualityGovernor()
+    else:
+        governor = QualityGovernor(level=quality, locked=True)
+    governor.attach(sim)
+    timer = StageTimer()
+    counter = SurfaceCounter()
+
+    timer.wrap(sim.road, "update", "road.update")
+    for player in sim.players:
+        timer.wrap(player, "update", "player.update")
+        timer.wrap(player, "draw_effects", "player.draw")
+    timer.wrap(sim.enemy_manager, "update", "enemies.update")
+    timer.wrap(sim.powerup_manager, "update", "powerups.update")
+    timer.wrap(sim.effect_manager, "update", "effects.update")
+    timer.wrap(sim.enemy_manager, "check_collisions", "collisions")
+    timer.wrap(sim.powerup_manager, "check_collisions", "collisions")
+    timer.wrap(sim.road, "draw", "road.draw")
+    timer.wrap(sim.enemy_manager, "draw", "enemies.draw")
+    timer.wrap(sim.powerup_manager, "draw", "powerups.draw")
+    timer.wrap(sim.effect_manager, "draw", "effects.draw")
+    for view_hud in huds:
+        timer.wrap(view_hud, "draw", "hud.draw")
+    timer.wrap(hud, "draw_pause_menu", "overlay.draw")
+    timer.wrap(hud, "draw_game_over", "overlay.draw")
+
+    scenario.setup(sim)
+    frame_times = []
+    surfaces = []
+
+    counter.install()
+    try:
+        for index in range(warmup + frames):
+            counter.count = 0
+            start = time.perf_counter()
+
+            if scenario.overlay is None:
+                # Scenarios measure load, so the player never dies
+                for player in sim.players:
+                    player.health = 100
+                scenario.frame(sim, index)
+                sim.step(controls)
+                if split is not None:
+                    split.update()
+                    split.draw()
+                else:
+                    hud.update(sim.score_change, sim.damage_taken)
+                    screen.fill((0, 0, 0))
+                    sim.draw(screen)
+                    hud.draw(screen, sim.player, sim.score, sim.player.velocity.length())
+            elif scenario.overlay == "pause":
+                hud.draw_pause_menu(screen)
+            else:
+                hud.draw_game_over(screen, sim.score)
+            pygame.display.flip()
+
+            elapsed = time.perf_counter() - start
+            governor.record(elapsed)
+            record = index >= warmup
+            if record:
+                frame_times.append(elapsed)
+                surfaces.append(counter.count)
+            timer.end_frame(record)
+    finally:
+        counter.uninstall()
+
+    return {
+        "frames": frames,
+        "frame_ms": percentiles(frame_times),
+        "stages_ms": {stage: float(np.mean(samples) * 1000.0) for stage, samples in timer.samples.items()},
+        "surfaces_per_frame": float(np.mean(surfaces)),
+        "particles": len(sim.effect_manager.particles),
+        "enemies": len(sim.enemy_manager.enemies),
+        "powerups": len(sim.powerup_manager.powerups),
+        "enemy_pool": sim.enemy_manager.pool.stats(),
+        "powerup_pool": sim.powerup_manager.pool.stats(),
+        "quality": governor.export(),
+    }
+
+
+def compare(results, baseline, threshold):
+    # Returns the names of scenarios whose p95 regressed past the threshold
+    regressions = []
+    for name, result in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            print(f"{name:20s} (no baseline)")
+            continue
+        old = base["frame_ms"]["p95"]
+        new = result["frame_ms"]["p95"]
+        change = (new - old) / old if old > 0 else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:20s} p95 {old:7.2f} -> {new:7.2f} ms ({change:+.1%}){flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Cyber Drift performance scenarios")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--warmup", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--scenario", action="append", help="run only these scenarios")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against a stored JSON result")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed p95 regression")
+    parser.add_argument("--quality", choices=["auto"] + LEVEL_NAMES, default="high",
+                        help="quality level to run at, or auto to adapt to frame times")
+    args = parser.parse_args(argv)
+
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "machine": platform.machine(),
+        "scenarios": {},
+    }
+    for scenario in SCENARIOS:
+        if args.scenario and scenario.name not in args.scenario:
+            continue
+        result = run_scenario(scenario, screen, args.frames, args.warmup, args.seed, args.quality)
+        results["scenarios"][scenario.name] = result
+        frame_ms = result["frame_ms"]
+        print(f"{scenario.name:20s} p50 {frame_ms['p50']:6.2f}  p95 {frame_ms['p95']:6.2f}  "
+              f"p99 {frame_ms['p99']:6.2f}  max {frame_ms['max']:6.2f} ms  "
+              f"surfaces/frame {result['surfaces_per_frame']:.2f}  quality {result['quality']['level']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
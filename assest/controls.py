@@ -0,0 +1,342 @@
+import time
+import pygame
+from pygame.locals import *
+
+
+class InputState:
+    """Driver input for a single simulation tick."""
+
+    __slots__ = ("up", "down", "left", "right", "boost")
+
+    def __init__(self, up=False, down=False, left=False, right=False, boost=False):
+        self.up = up
+        self.down = down
+        self.left = left
+        self.right = right
+        self.boost = boost  # Edge triggered, true only on the tick it was pressed
+
+    def __eq__(self, other):
+        return isinstance(other, InputState) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def to_bits(self):
+        # One bit per field, in __slots__ order
+        bits = 0
+        for i, name in enumerate(self.__slots__):
+            if getattr(self, name):
+                bits |= 1 << i
+        return bits
+
+    @classmethod
+    def from_bits(cls, bits):
+        return cls(*(bool(bits >> i & 1) for i in range(len(cls.__slots__))))
+
+    def __repr__(self):
+        held = [name for name in self.__slots__ if getattr(self, name)]
+        return f"InputState({', '.join(held)})"
+
+
+# Shared "nothing pressed" state
+IDLE = InputState()
+
+
+# Keys for each InputState field. The solo layout accepts both arrows and WASD.
+SOLO_KEYS = {
+    "up": (K_UP, K_w),
+    "down": (K_DOWN, K_s),
+    "left": (K_LEFT, K_a),
+    "right": (K_RIGHT, K_d),
+    "boost": (K_SPACE,),
+}
+
+# One layout per split-screen seat, so every player has keys of their own
+SPLIT_KEYS = [
+    {"up": (K_w,), "down": (K_s,), "left": (K_a,), "right": (K_d,), "boost": (K_LSHIFT,)},
+    {"up": (K_UP,), "down": (K_DOWN,), "left": (K_LEFT,), "right": (K_RIGHT,), "boost": (K_RSHIFT,)},
+    {"up": (K_i,), "down": (K_k,), "left": (K_j,), "right": (K_l,), "boost": (K_SPACE,)},
+    {"up": (K_KP8,), "down": (K_KP5,), "left": (K_KP4,), "right": (K_KP6,), "boost": (K_KP0,)},
+]
+
+
+# Buttons and axes for each InputState field on an SDL game controller layout
+GAMEPAD_BUTTONS = {
+    "up": (0,),  # A
+    "down": (1,),  # B
+    "boost": (2, 5),  # X, right bumper
+}
+GAMEPAD_STEER_AXIS = 0  # Left stick, horizontal
+GAMEPAD_THROTTLE_AXIS = 1  # Left stick, vertical
+
+# Game commands outside driving, from keys and from gamepad buttons
+COMMAND_KEYS = {
+    K_ESCAPE: "back",
+    K_p: "pause",
+    K_SPACE: "confirm",
+    K_F3: "profiler",
+    K_LEFTBRACKET: "seek_back",
+    K_RIGHTBRACKET: "seek_forward",
+    K_BACKSPACE: "rewind",
+    K_F9: "dump",
+}
+COMMAND_BUTTONS = {
+    0: "confirm",  # A
+    3: "rewind",  # Y
+    6: "back",  # Back
+    7: "pause",  # Start
+}
+
+
+class KeyboardInput:
+    """Reads the local keyboard. Boost is fed from KEYDOWN events."""
+
+    def __init__(self, keys=None):
+        self.keys = keys or SOLO_KEYS
+        self.boost_pressed = False
+        self.bound = {key for keys in self.keys.values() for key in keys}
+
+    def handle_event(self, event):
+        # True for presses and releases of this layout's keys
+        if event.type not in (KEYDOWN, KEYUP) or event.key not in self.bound:
+            return False
+        if event.type == KEYDOWN and event.key in self.keys["boost"]:
+            self.boost_pressed = True
+        return True
+
+    def get_state(self, sim=None):
+        pressed = pygame.key.get_pressed()
+        keys = self.keys
+        state = InputState(
+            any(pressed[key] for key in keys["up"]),
+            any(pressed[key] for key in keys["down"]),
+            any(pressed[key] for key in keys["left"]),
+            any(pressed[key] for key in keys["right"]),
+            self.boost_pressed,
+        )
+        self.boost_pressed = False
+        return state
+
+
+class GamepadInput:
+    """Reads one game controller, the ``slot``-th one connected.
+
+    Controllers come and go through the JOYDEVICEADDED and JOYDEVICEREMOVED
+    events, so one can be plugged in mid-game. Sticks count once they are
+    pushed past ``deadzone``; the d-pad works as well.
+    """
+
+    def __init__(self, slot=0, deadzone=0.35):
+        if not pygame.joystick.get_init():
+            pygame.joystick.init()
+        self.slot = slot
+        self.deadzone = deadzone
+        self.pads = {}  # instance id -> Joystick, in connection order
+        for index in range(pygame.joystick.get_count()):
+            joystick = pygame.joystick.Joystick(index)
+            self.pads[joystick.get_instance_id()] = joystick
+        self.boost_pressed = False
+        self.last_state = IDLE
+
+    @property
+    def pad(self):
+        pads = list(self.pads.values())
+        return pads[self.slot] if self.slot < len(pads) else None
+
+    def handle_event(self, event):
+        # True when the event changed what this controller is asking for
+        if event.type == JOYDEVICEADDED:
+            joystick = pygame.joystick.Joystick(event.device_index)
+            self.pads[joystick.get_instance_id()] = joystick
+            return False
+        if event.type == JOYDEVICEREMOVED:
+            self.pads.pop(event.instance_id, None)
+            return False
+        if event.type not in (JOYBUTTONDOWN, JOYBUTTONUP, JOYAXISMOTION, JOYHATMOTION):
+            return False
+        pad = self.pad
+        if pad is None or event.instance_id != pad.get_instance_id():
+            return False
+        if event.type == JOYBUTTONDOWN and event.button in GAMEPAD_BUTTONS["boost"]:
+            self.boost_pressed = True
+            return True
+        # Stick noise arrives as a stream of axis events; only changes of state count
+        state = self.read(pad)
+        changed = state != self.last_state
+        self.last_state = state
+        return changed
+
+    def read(self, pad):
+        buttons = GAMEPAD_BUTTONS
+        pressed = [pad.get_button(i) for i in range(pad.get_numbuttons())]
+        steer = pad.get_axis(GAMEPAD_STEER_AXIS) if pad.get_numaxes() > GAMEPAD_STEER_AXIS else 0.0
+        throttle = pad.get_axis(GAMEPAD_THROTTLE_AXIS) if pad.get_numaxes() > GAMEPAD_THROTTLE_AXIS else 0.0
+        hat_x, hat_y = pad.get_hat(0) if pad.get_numhats() else (0, 0)
+        held = lambda name: any(i < len(pressed) and pressed[i] for i in buttons[name])
+        return InputState(
+            held("up") or throttle < -self.deadzone or hat_y > 0,
+            held("down") or throttle > self.deadzone or hat_y < 0,
+            steer < -self.deadzone or hat_x < 0,
+            steer > self.deadzone or hat_x > 0,
+        )
+
+    def get_state(self, sim=None):
+        pad = self.pad
+        state = IDLE if pad is None else self.read(pad)
+        if self.boost_pressed:
+            state = InputState(state.up, state.down, state.left, state.right, True)
+            self.boost_pressed = False
+        return state
+
+
+class CombinedInput:
+    """Several devices driving one car: a field is on if any device has it on."""
+
+    def __init__(self, sources):
+        self.sources = sources
+
+    def handle_event(self, event):
+        # Every source sees every event, so none misses a hot-plug
+        changed = False
+        for source in self.sources:
+            changed = source.handle_event(event) or changed
+        return changed
+
+    def get_state(self, sim=None):
+        bits = 0
+        for source in self.sources:
+            bits |= source.get_state(sim).to_bits()
+        return InputState.from_bits(bits)
+
+
+class MultiInput:
+    """Several input sources read together, one state per split-screen player."""
+
+    def __init__(self, sources):
+        self.sources = sources
+
+    def handle_event(self, event):
+        changed = False
+        for source in self.sources:
+            if hasattr(source, "handle_event"):
+                changed = source.handle_event(event) or changed
+        return changed
+
+    def get_state(self, sim=None):
+        return [source.get_state(sim) for source in self.sources]
+
+
+class InputRouter:
+    """Front end for the game loop: driving input, commands and latency timestamps.
+
+    ``handle_event`` passes every event to ``source`` and returns the game
+    command it maps to, if any. Driving events are timestamped when they
+    are read; the first tick that reads the source takes them, and
+    ``presented`` (called right after the frame showing that tick is
+    flipped) reports each one's event-to-display delay to ``latency``.
+    """
+
+    def __init__(self, source, latency=None, max_pending=64):
+        self.source = source
+        self.latency = latency
+        self.max_pending = max_pending
+        self.pending = []  # Read, not yet taken by a tick
+        self.taken = []  # Taken by a tick, not yet on screen
+
+    def handle_event(self, event):
+        now = time.perf_counter()
+        if self.source.handle_event(event) and self.latency is not None:
+            self.pending.append(now)
+            if len(self.pending) > self.max_pending:
+                del self.pending[0]
+        if event.type == KEYDOWN:
+            return COMMAND_KEYS.get(event.key)
+        if event.type == JOYBUTTONDOWN:
+            return COMMAND_BUTTONS.get(event.button)
+        return None
+
+    def get_state(self, sim=None):
+        if self.pending:
+            self.taken.extend(self.pending)
+            self.pending.clear()
+        return self.source.get_state(sim)
+
+    def presented(self):
+        if self.taken:
+            self.latency.record(time.perf_counter(), self.taken)
+            self.taken.clear()
+
+    def discard(self):
+        # Paused or game over: nothing will show these inputs
+        self.pending.clear()
+        self.taken.clear()
+
+
+class ScriptedInput:
+    """Plays back a fixed list of states, then idles."""
+
+    def __init__(self, states):
+        self.states = states
+        self.index = 0
+
+    def get_state(self, sim=None):
+        if self.index < len(self.states):
+            state = self.states[self.index]
+            self.index += 1
+            return state
+        return IDLE
+
+
+class RandomInput:
+    """Bot that weaves at random while keeping its car in the lower screen half."""
+
+    def __init__(self, rng, hold_ticks=20):
+        self.rng = rng
+        self.hold_ticks = hold_ticks
+        self.timer = 0
+        self.steer = 0
+
+    def get_state(self, sim=None):
+        self.timer -= 1
+        if self.timer <= 0:
+            self.steer = self.rng.choice((-1, 0, 1))
+            self.timer = self.rng.randint(1, self.hold_ticks)
+        y = sim.player.position.y if sim is not None else 500
+        return InputState(
+            up=y > 420,
+            down=y < 320,
+            left=self.steer < 0,
+            right=self.steer > 0,
+            boost=self.rng.random() < 0.01,
+        )
+
+
+class DodgeInput:
+    """Rule-based bot: steers away from nearby enemies, otherwise toward power-ups."""
+
+    def __init__(self, danger_radius=160, seek_radius=300):
+        self.danger_radius = danger_radius
+        self.seek_radius = seek_radius
+
+    def get_state(self, sim):
+        player = sim.player
+        x, y = player.position
+
+        # Push away from every enemy in range, closer ones harder
+        push = 0.0
+        for enemy in sim.enemy_manager.enemies_near(x, y, self.danger_radius):
+            dx = x - enemy.position.x
+            push += (1 if dx >= 0 else -1) * (self.danger_radius - abs(dx))
+
+        if push == 0:
+            # Nothing to dodge, so head for the closest power-up
+            powerups = sim.powerup_manager.powerups_near(x, y, self.seek_radius)
+            if powerups:
+                target = min(powerups, key=lambda powerup: (powerup.position - player.position).length_squared())
+                push = target.position.x - x
+
+        return InputState(
+            up=y > 420,
+            down=y < 320,
+            left=push < -5,
+            right=push > 5,
+            boost=player.boost > 0 and push == 0,
+        )
@@ -1,96 +1,213 @@
 import pygame
-import random
 import math
+import numpy as np
+from .glow import glow_cache
+
+# Hard ceiling on live particles; no quality level or caller can raise a pool past it
+PARTICLE_CAP = 16384
+
+
+def _blit_all(screen, pairs):
+    # (surface, position) pairs in one call; fblits skips building the rect list where available
+    if hasattr(screen, "fblits"):
+        screen.fblits(pairs)
+    else:
+        screen.blits(pairs, doreturn=False)
+
+
+class ParticlePool:
+    """All live particles, stored as preallocated structure-of-arrays.
+
+    Live particles always occupy the first ``count`` slots. Dead ones are
+    squeezed out in one masked copy per update, which keeps the survivors
+    in emission order (oldest first). At most ``limit`` particles live at
+    once; emitting past it evicts the oldest to make room.
+    """
+
+    def __init__(self, capacity=PARTICLE_CAP, rng=None):
+        self.capacity = capacity = min(capacity, PARTICLE_CAP)
+        self.limit = capacity
+        self.count = 0
+        self.evicted = 0
+        self.rng = rng or np.random.default_rng()
+
+        self.pos = np.zeros((capacity, 2), dtype=np.float32)
+        self.vel = np.zeros((capacity, 2), dtype=np.float32)
+        self.size = np.zeros(capacity, dtype=np.float32)
+        self.lifetime = np.zeros(capacity, dtype=np.float32)
+        self.max_lifetime = np.ones(capacity, dtype=np.float32)
+        self.color = np.zeros(capacity, dtype=np.uint8)
+        self.arrays = (self.pos, self.vel, self.size, self.lifetime, self.max_lifetime, self.color)
+
+        # Colors are stored once and referenced by index
+        self.palette = []
+        self._palette_lookup = {}
+
+    def color_index(self, color):
+        color = tuple(color)
+        index = self._palette_lookup.get(color)
+        if index is None:
+            index = len(self.palette)
+            self.palette.append(color)
+            self._palette_lookup[color] = index
+        return index
+
+    def set_limit(self, limit):
+        self.limit = max(0, min(int(limit), self.capacity))
+        if self.count > self.limit:
+            self.evict(self.count - self.limit)
+
+    def evict(self, n):
+        # Drop the n oldest particles, keeping the rest in order
+        n = min(n, self.count)
+        keep = self.count - n
+        for array in self.arrays:
+            array[:keep] = array[n:self.count]
+        self.count = keep
+        self.evicted += n
+
+    def emit(self, x, y, vx, vy, size, lifetime, color):
+        # Every argument may be a scalar or an array of the batch length
+        n = min(len(vx), self.limit)
+        if n <= 0:
+            return 0
+        if self.count + n > self.limit:
+            self.evict(self.count + n - self.limit)
+        start = self.count
+        end = start + n
+
+        self.pos[start:end, 0] = x if np.isscalar(x) else x[:n]
+        self.pos[start:end, 1] = y if np.isscalar(y) else y[:n]
+        self.vel[start:end, 0] = vx[:n]
+        self.vel[start:end, 1] = vy[:n]
+        self.size[start:end] = size if np.isscalar(size) else size[:n]
+        lifetime = lifetime if np.isscalar(lifetime) else lifetime[:n]
+        self.lifetime[start:end] = lifetime
+        self.max_lifetime[start:end] = lifetime
+        self.color[start:end] = color if np.isscalar(color) else color[:n]
+
+        self.count = end
+        return n
 
-class Particle:
-    def __init__(self, x, y, color, size=5, lifetime=60, velocity=None):
-        self.x = x
-        self.y = y
-        self.color = color
-        self.size = size
-        self.lifetime = lifetime
-        self.max_lifetime = lifetime
-        self.velocity = velocity or pygame.math.Vector2(random.uniform(-1, 1), random.uniform(-1, 1))
-        
-    def update(self):
-        self.x += self.velocity.x
-        self.y += self.velocity.y
-        self.lifetime -= 1
-        self.size = max(0, self.size * 0.95)
-        
-    def draw(self, screen):
-        alpha = int(255 * (self.lifetime / self.max_lifetime))
-        color_with_alpha = (*self.color, alpha)
-        
-        # Create a surface for the particle with alpha
-        particle_surface = pygame.Surface((self.size * 2, self.size * 2), pygame.SRCALPHA)
-        pygame.draw.circle(particle_surface, color_with_alpha, (self.size, self.size), self.size)
-        screen.blit(particle_surface, (self.x - self.size, self.y - self.size))
-
-
-class ExplosionEffect:
-    def __init__(self, x, y, color=(255, 100, 0), particles=30):
-        self.particles = []
-        for _ in range(particles):
-            velocity = pygame.math.Vector2(random.uniform(-3, 3), random.uniform(-3, 3))
-            size = random.uniform(3, 8)
-            lifetime = random.randint(30, 60)
-            self.particles.append(Particle(x, y, color, size, lifetime, velocity))
-            
     def update(self):
-        for particle in self.particles[:]:
-            particle.update()
-            if particle.lifetime <= 0:
-                self.particles.remove(particle)
-                
-    def draw(self, screen):
-        for particle in self.particles:
-            particle.draw(screen)
-            
-    def is_finished(self):
-        return len(self.particles) == 0
+        n = self.count
+        if n == 0:
+            return
+
+        self.pos[:n] += self.vel[:n]
+        self.lifetime[:n] -= 1
+        self.size[:n] *= 0.95
+
+        alive = self.lifetime[:n] > 0
+        survivors = int(np.count_nonzero(alive))
+        if survivors < n:
+            # Bulk compaction instead of removing particles one by one
+            for array in self.arrays:
+                array[:survivors] = array[:n][alive]
+            self.count = survivors
+
+    def clear(self):
+        self.count = 0
+
+    def draw(self, screen, alpha=1.0):
+        n = self.count
+        if n == 0:
+            return
+
+        # Step back along the velocity to the interpolated position
+        positions = self.pos[:n] + self.vel[:n] * (alpha - 1.0)
+
+        # Quantize every particle's sprite key the way the glow cache does
+        glow = glow_cache
+        radius_step = glow.radius_step
+        alpha_step = glow.alpha_step
+        radii = (self.size[:n] / radius_step + 0.5).astype(np.int64) * radius_step
+        alphas = (255 * self.lifetime[:n] / self.max_lifetime[:n]).astype(np.int64)
+        alphas = np.minimum(255, (alphas / alpha_step + 0.5).astype(np.int64) * alpha_step)
+        visible = radii > 0
+        if not visible.all():
+            positions = positions[visible]
+            radii = radii[visible]
+            alphas = alphas[visible]
+            colors = self.color[:n][visible]
+        else:
+            colors = self.color[:n]
+        if len(radii) == 0:
+            return
+
+        # One cache lookup per distinct sprite, then one blit call for every particle, oldest first
+        keys = (radii * 256 + alphas) * 256 + colors
+        unique, inverse = np.unique(keys, return_inverse=True)
+        palette = self.palette
+        sprites = np.empty(len(unique), dtype=object)
+        for i, key in enumerate(unique.tolist()):
+            radius, rest = divmod(key, 65536)
+            sprite_alpha, color = divmod(rest, 256)
+            sprites[i] = glow.get(radius, palette[color], sprite_alpha)
+        # Flat lists zipped lazily, so no per-particle containers pile up for the garbage collector
+        corners = (positions - radii[:, None]).astype(np.int32)
+        _blit_all(screen, zip(sprites[inverse].tolist(), zip(corners[:, 0].tolist(), corners[:, 1].tolist())))
+
+    def bounds(self):
+        # Screen rectangle covering every live particle, or None
+        n = self.count
+        if n == 0:
+            return None
+        pos = self.pos[:n]
+        margin = float(self.size[:n].max() + np.abs(self.vel[:n]).max()) + 2
+        low = pos.min(axis=0) - margin
+        high = pos.max(axis=0) + margin
+        return pygame.Rect(int(low[0]), int(low[1]), int(high[0] - low[0]) + 1, int(high[1] - low[1]) + 1)
+
+    def __len__(self):
+        return self.count
 
 
 class BoostEffect:
-    def __init__(self, player):
+    __slots__ = ("player", "pool", "colors", "owed")
+
+    def __init__(self, player, pool):
         self.player = player
-        self.particles = []
-        
-    def update(self):
+        self.pool = pool
+        self.colors = (pool.color_index((255, 100, 0)), pool.color_index((255, 200, 0)))
+        self.owed = 0.0
+
+    def update(self, rate=1.0):
+        # `rate` scales the particles kept per tick; the random draws are the
+        # same at every rate, so the simulation's generator never depends on it
         # Add new particles if boost is active
         if self.player.velocity.length() > 5:
             # Calculate position behind the car
             angle_rad = math.radians(self.player.angle)
-            exhaust_pos = (
-                self.player.position.x + math.sin(angle_rad) * 35,
-                self.player.position.y + math.cos(angle_rad) * 35
-            )
-            
-            # Add particles
-            for _ in range(2):
-                velocity = pygame.math.Vector2(
-                    random.uniform(-1, 1) + math.sin(angle_rad) * 2,
-                    random.uniform(-1, 1) + math.cos(angle_rad) * 2
+            sin_a = math.sin(angle_rad)
+            cos_a = math.cos(angle_rad)
+            exhaust_x = self.player.position.x + sin_a * 35
+            exhaust_y = self.player.position.y + cos_a * 35
+
+            rng = self.pool.rng
+            count = 2
+            jitter = rng.uniform(-1, 1, (2, count))
+            colors = np.where(rng.random(count) > 0.5, self.colors[0], self.colors[1])
+            sizes = rng.uniform(2, 6, count)
+            lifetimes = rng.integers(10, 31, count)
+
+            self.owed += count * rate
+            keep = min(count, int(self.owed))
+            self.owed -= keep
+            if keep:
+                self.pool.emit(
+                    exhaust_x, exhaust_y,
+                    jitter[0, :keep] + sin_a * 2,
+                    jitter[1, :keep] + cos_a * 2,
+                    sizes[:keep],
+                    lifetimes[:keep],
+                    colors[:keep],
                 )
-                
-                color = (255, 100, 0) if random.random() > 0.5 else (255, 200, 0)
-                size = random.uniform(2, 6)
-                lifetime = random.randint(10, 30)
-                
-                self.particles.append(Particle(exhaust_pos[0], exhaust_pos[1], color, size, lifetime, velocity))
-                
-        # Update existing particles
-        for particle in self.particles[:]:
-            particle.update()
-            if particle.lifetime <= 0:
-                self.particles.remove(particle)
-                
-    def draw(self, screen):
-        for particle in self.particles:
-            particle.draw(screen)
 
 
 class CollectEffect:
+    __slots__ = ("x", "y", "color", "radius", "max_radius", "lifetime", "max_lifetime")
+
     def __init__(self, x, y, color):
         self.x = x
         self.y = y
@@ -99,63 +216,99 @@ class CollectEffect:
         self.max_radius = 40
         self.lifetime = 30
         self.max_lifetime = 30
-        
+
     def update(self):
         self.radius += (self.max_radius - self.radius) * 0.2
         self.lifetime -= 1
-        
+
     def draw(self, screen):
         alpha = int(200 * (self.lifetime / self.max_lifetime))
-        color_with_alpha = (*self.color, alpha)
-        
-        ring_surface = pygame.Surface((self.radius * 2, self.radius * 2), pygame.SRCALPHA)
-        pygame.draw.circle(ring_surface, color_with_alpha, (self.radius, self.radius), self.radius, 2)
-        screen.blit(ring_surface, (self.x - self.radius, self.y - self.radius))
-        
+        glow_cache.blit(screen, self.x, self.y, self.radius, self.color, alpha, 2)
+
     def is_finished(self):
         return self.lifetime <= 0
 
+    def get_rect(self):
+        radius = int(self.radius) + 2
+        return pygame.Rect(int(self.x) - radius, int(self.y) - radius, radius * 2, radius * 2)
+
 
 class EffectManager:
-    def __init__(self):
-        self.explosions = []
+    """Particles, boost trails and pickup rings.
+
+    ``configure`` scales the cosmetic budgets (see ``assest.quality``).
+    Explosions and trails draw the same random numbers whatever the budget
+    and only keep fewer of the particles, so a shared generator advances the
+    same way at every quality level.
+    """
+
+    def __init__(self, max_particles=PARTICLE_CAP, rng=None):
+        self.particles = ParticlePool(max_particles, rng)
         self.collect_effects = []
         self.boost_effects = {}
-        
+
+        # Fraction of each explosion's particles kept, and of the boost trail's emission
+        self.explosion_scale = 1.0
+        self.boost_rate = 1.0
+
+    def configure(self, max_particles=None, explosion_scale=None, boost_rate=None):
+        if max_particles is not None:
+            self.particles.set_limit(max_particles)
+        if explosion_scale is not None:
+            self.explosion_scale = explosion_scale
+        if boost_rate is not None:
+            self.boost_rate = boost_rate
+
     def add_explosion(self, x, y, color=(255, 100, 0), particles=30):
-        self.explosions.append(ExplosionEffect(x, y, color, particles))
-        
+        rng = self.particles.rng
+        velocity = rng.uniform(-3, 3, (2, particles))
+        sizes = rng.uniform(3, 8, particles)
+        lifetimes = rng.integers(30, 61, particles)
+        keep = max(1, int(particles * self.explosion_scale + 0.5))
+        self.particles.emit(
+            x, y,
+            velocity[0, :keep], velocity[1, :keep],
+            sizes[:keep],
+            lifetimes[:keep],
+            self.particles.color_index(color),
+        )
+
     def add_collect_effect(self, x, y, color):
         self.collect_effects.append(CollectEffect(x, y, color))
-        
+
     def add_boost_effect(self, player):
         if player not in self.boost_effects:
-            self.boost_effects[player] = BoostEffect(player)
-            
+            self.boost_effects[player] = BoostEffect(player, self.particles)
+
     def update(self):
-        # Update explosions
-        for explosion in self.explosions[:]:
-            explosion.update()
-            if explosion.is_finished():
-                self.explosions.remove(explosion)
-                
+        # Emit boost trails before stepping so new particles move this frame
+        for effect in self.boost_effects.values():
+            effect.update(self.boost_rate)
+
+        # Step every particle in one vectorized pass
+        self.particles.update()
+
         # Update collect effects
-        for effect in self.collect_effects[:]:
-            effect.update()
-            if effect.is_finished():
-                self.collect_effects.remove(effect)
-                
-        # Update boost effects
-        for player, effect in self.boost_effects.items():
+        for effect in self.collect_effects:
             effect.update()
-            
-    def draw(self, screen):
+        self.collect_effects = [effect for effect in self.collect_effects if not effect.is_finished()]
+
+    def clear(self):
+        # Drop every particle and ring; boost trails stay attached
+        self.particles.clear()
+        self.collect_effects = []
+
+    def dirty_rects(self):
+        # Areas drawn by the last draw call, for dirty-rect rendering
+        rects = [effect.get_rect() for effect in self.collect_effects]
+        bounds = self.particles.bounds()
+        if bounds is not None:
+            rects.append(bounds)
+        return rects
+
+    def draw(self, screen, alpha=1.0):
         # Draw all effects
-        for explosion in self.explosions:
-            explosion.draw(screen)
-            
+        self.particles.draw(screen, alpha)
+
         for effect in self.collect_effects:
             effect.draw(screen)
-            
-        for effect in self.boost_effects.values():
-            effect.draw(screen)
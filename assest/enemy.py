@@ -1,39 +1,69 @@
 import pygame
 import random
 import math
+import numpy as np
+from .atlas import atlas_registry
+from .spatial import SpatialGrid
+from .pool import SpritePool, prewarm_rng
+
+
+def build_enemy_image():
+    image = pygame.Surface((40, 70), pygame.SRCALPHA)
+    pygame.draw.polygon(image, (255, 0, 153), [(20, 0), (40, 50), (30, 70), (10, 70), (0, 50)])
+    pygame.draw.rect(image, (200, 0, 100), (10, 15, 20, 40))
+    return image
+
 
 class Enemy(pygame.sprite.Sprite):
-    def __init__(self, x, y, difficulty=1):
+    def __init__(self, x, y, difficulty=1, rng=random):
         super().__init__()
-        # Create enemy car image
-        self.original_image = pygame.Surface((40, 70), pygame.SRCALPHA)
-        pygame.draw.polygon(self.original_image, (255, 0, 153), [(20, 0), (40, 50), (30, 70), (10, 70), (0, 50)])
-        pygame.draw.rect(self.original_image, (200, 0, 100), (10, 15, 20, 40))
+        # Enemy car image, drawn once and shared by every enemy
+        self.atlas = atlas_registry.get("enemy", build_enemy_image)
+        self.original_image = self.atlas.frames[0]
         
         self.image = self.original_image
         self.rect = self.image.get_rect(center=(x, y))
         
         # Movement attributes
         self.position = pygame.math.Vector2(x, y)
-        self.velocity = pygame.math.Vector2(0, -2 - difficulty)  # Enemies move up the screen
+        self.prev_position = pygame.math.Vector2(x, y)
+        self.velocity = pygame.math.Vector2(0, 0)
+        
+        self.reset(x, y, difficulty, rng)
+        
+    def reset(self, x, y, difficulty=1, rng=random):
+        # Puts a new or recycled enemy into its freshly spawned state
+        self.image = self.original_image
+        self.rect.size = self.image.get_size()
+        self.rect.center = (x, y)
+        
+        self.position.update(x, y)
+        self.prev_position.update(x, y)
+        self.velocity.update(0, 2 + difficulty)  # Enemies drive down the screen toward the player
         self.angle = 0
         self.difficulty = difficulty
+        self.rng = rng
         
         # AI behavior
-        self.target_lane = random.randint(0, 2)  # 0=left, 1=center, 2=right
-        self.lane_change_timer = random.randint(60, 180)  # Frames until next lane change
-        self.aggression = random.random() * difficulty  # How likely to target player
+        self.target_lane = rng.randint(0, 2)  # 0=left, 1=center, 2=right
+        self.lane_change_timer = rng.randint(60, 180)  # Frames until next lane change
+        self.aggression = rng.random() * difficulty  # How likely to target player
         
-    def update(self, road_width, player_pos=None):
+    def update(self, geometry, player_lane=None, rolls=None):
+        # `geometry` is the road's LaneGeometry at this enemy's row and
+        # `player_lane` the lane the player is in, if it is targeted.
+        # `rolls` holds this enemy's row of the manager's per-frame random
+        # block: (aggression, follow, new lane, new timer). Without it the
+        # enemy draws from its own generator.
+        if rolls is None:
+            rolls = self.draw_rolls()
+            
         # Basic movement
+        self.prev_position.update(self.position)
         self.position += self.velocity
         
-        # AI lane targeting
-        road_left = (800 - road_width) // 2
-        lane_width = road_width / 3
-        
-        # Calculate target x position based on lane
-        target_x = road_left + (self.target_lane + 0.5) * lane_width
+        # Calculate target x position based on lane, which may have merged away
+        target_x = geometry.lane_center(min(self.target_lane, geometry.lanes - 1))
         
         # Move toward target lane
         if abs(self.position.x - target_x) > 5:
@@ -49,32 +79,37 @@ class Enemy(pygame.sprite.Sprite):
         # Lane changing logic
         self.lane_change_timer -= 1
         if self.lane_change_timer <= 0:
-            self.target_lane = random.randint(0, 2)
-            self.lane_change_timer = random.randint(60, 180)
+            self.target_lane = int(rolls[2] * geometry.lanes)
+            self.lane_change_timer = 60 + int(rolls[3] * 121)
             
-        # Player targeting (if player position provided)
-        if player_pos and random.random() < self.aggression:
-            player_lane = 0
-            if player_pos.x > road_left + lane_width:
-                player_lane = 1
-            if player_pos.x > road_left + 2 * lane_width:
-                player_lane = 2
-                
+        # Player targeting (if player lane provided)
+        if player_lane is not None and rolls[0] < self.aggression:
             # Chance to follow player's lane
-            if random.random() < 0.3 * self.difficulty:
+            if rolls[1] < 0.3 * self.difficulty:
                 self.target_lane = player_lane
                 
-        # Update rect and rotate image
-        self.rect.center = self.position
-        self.image = pygame.transform.rotate(self.original_image, self.angle)
-        self.rect = self.image.get_rect(center=self.rect.center)
+        # Update rect and pick the pre-rotated frame
+        self.image = self.atlas.frame(self.angle)
+        self.rect = self.image.get_rect(center=self.position)
+        
+    def draw_rolls(self):
+        rng = self.rng
+        return (rng.random(), rng.random(), rng.random(), rng.random())
+        
+    def interpolate(self, alpha):
+        # Position between the last two ticks; also moves the rect for drawing
+        position = self.prev_position.lerp(self.position, alpha)
+        self.rect.center = position
+        return position
+        
+    def draw_effects(self, screen, alpha=1.0):
+        position = self.interpolate(alpha)
         
-    def draw_effects(self, screen):
         # Draw engine glow
         angle_rad = math.radians(self.angle)
         exhaust_pos = (
-            self.position.x + math.sin(angle_rad) * 35,
-            self.position.y + math.cos(angle_rad) * 35
+            position.x + math.sin(angle_rad) * 35,
+            position.y + math.cos(angle_rad) * 35
         )
         
         # Draw the glow
@@ -83,43 +118,304 @@ class Enemy(pygame.sprite.Sprite):
 
 
 class EnemyManager:
-    def __init__(self, road_width):
+    """Spawns, steers and culls enemies.
+
+    With ``batched=True`` enemy state lives in NumPy arrays and the AI runs
+    as one vectorized step; the sprites are only brought up to date when
+    they are drawn or queried. Both paths consume the same per-frame block
+    of random numbers and read the road at each enemy's row before it moves,
+    so a seeded game plays out identically either way, straight road or
+    track. ``python -m assest.engine --check-batched`` steps both in lockstep.
+    """
+
+    # Columns of the per-frame random block
+    ROLL_COLUMNS = 4
+
+    # Rows where enemies appear and where they are culled
+    SPAWN_Y = -100
+    CULL_Y = (-100, 700)
+
+    def __init__(self, road, rng=random, index=None, pool_size=64, batched=False, np_rng=None,
+                 spawn_interval=(30, 120), difficulty_growth=0.0001):
         self.enemies = pygame.sprite.Group()
-        self.road_width = road_width
+        self.road = road  # Answers geometry(y) for lane positions and spawn rates
+        self.rng = rng
+        self.np_rng = np_rng if np_rng is not None else np.random.default_rng(rng.getrandbits(64))
+        
+        # Broadphase grid, normally shared with the other managers
+        self.index = index or SpatialGrid()
+        
+        # Recycled enemies
+        self.pool = SpritePool(Enemy, pool_size)
         self.spawn_timer = 0
         self.difficulty = 1.0
         
+        # Tuning: ticks between spawns (shortened by difficulty) and difficulty added per tick
+        self.spawn_interval = spawn_interval
+        self.difficulty_growth = difficulty_growth
+        
+        # Array state for the batched path, in the same order as self.enemies
+        self.batched = batched
+        self.count = 0
+        self.sprites = []
+        self._allocate(256 if batched else 0)
+        
+    def _allocate(self, capacity):
+        old_count = self.count
+        arrays = {
+            "x": np.float64, "y": np.float64, "prev_x": np.float64, "prev_y": np.float64,
+            "vy": np.float64, "lane": np.int64, "timer": np.int64,
+            "aggression": np.float64, "level": np.float64, "angle": np.int64,
+        }
+        for name, dtype in arrays.items():
+            array = np.zeros(capacity, dtype=dtype)
+            if old_count:
+                array[:old_count] = getattr(self, name)[:old_count]
+            setattr(self, name, array)
+        self.capacity = capacity
+        
     def update(self, player_pos=None):
         # Spawn new enemies
         self.spawn_timer -= 1
         if self.spawn_timer <= 0:
-            self.spawn_enemy()
-            self.spawn_timer = random.randint(30, 120) // self.difficulty
+            # The segment under the spawn row sets how busy traffic is; 0 means none
+            geometry = self.road.geometry(self.SPAWN_Y)
+            if geometry.enemy_rate > 0:
+                self.spawn_enemy(geometry)
+            self.spawn_timer = self.rng.randint(*self.spawn_interval) // (self.difficulty * (geometry.enemy_rate or 1.0))
             
-        # Update existing enemies
-        for enemy in self.enemies:
-            enemy.update(self.road_width, player_pos)
+        # One random draw covers every enemy's AI decisions this frame
+        rolls = self.np_rng.random((len(self.enemies), self.ROLL_COLUMNS))
+        
+        # Lane the player is in, measured on the road at the player's row
+        player_lane = None
+        if player_pos:
+            player_lane = self.road.geometry(player_pos.y).lane_of(player_pos.x)
             
-            # Remove enemies that have gone off screen
-            if enemy.position.y < -100 or enemy.position.y > 700:
-                enemy.kill()
+        top, bottom = self.CULL_Y
+        if self.batched:
+            self._update_batched(player_lane, rolls)
+        else:
+            # Update existing enemies
+            road = self.road
+            for enemy, enemy_rolls in zip(self.enemies.sprites(), rolls.tolist()):
+                enemy.update(road.geometry(enemy.position.y), player_lane, enemy_rolls)
                 
+                # Remove enemies that have gone off screen
+                if enemy.position.y < top or enemy.position.y > bottom:
+                    self.remove_enemy(enemy)
+                else:
+                    self.index.move(enemy)
+                    
         # Gradually increase difficulty
-        self.difficulty += 0.0001
+        self.difficulty += self.difficulty_growth
         
-    def spawn_enemy(self):
-        road_left = (800 - self.road_width) // 2
-        lane = random.randint(0, 2)
-        x = road_left + (lane + 0.5) * (self.road_width / 3)
-        y = -100  # Spawn above the screen
+    def _update_batched(self, player_lane, rolls):
+        # Same steps as Enemy.update, applied to every enemy at once
+        n = self.count
+        if n == 0:
+            return
+        x = self.x[:n]
+        y = self.y[:n]
+        lane = self.lane[:n]
+        timer = self.timer[:n]
         
-        enemy = Enemy(x, y, self.difficulty)
+        # On a track each enemy reads the road at its own row before it moves
+        road_left, lane_width, lanes = self.road.geometry_arrays(y)
+        lanes = np.broadcast_to(lanes, (n,))
+        
+        # Basic movement
+        self.prev_x[:n] = x
+        self.prev_y[:n] = y
+        y += self.vy[:n]
+        
+        # AI lane targeting
+        target_x = road_left + (np.minimum(lane, lanes - 1) + 0.5) * lane_width
+        
+        # Move toward target lane
+        far = np.abs(x - target_x) > 5
+        right = far & (x < target_x)
+        left = far & ~right
+        x[right] += 2
+        x[left] -= 2
+        self.angle[:n] = np.where(right, -10, np.where(left, 10, 0))
+        
+        # Lane changing logic
+        timer -= 1
+        expired = timer <= 0
+        if expired.any():
+            lane[expired] = (rolls[expired, 2] * lanes[expired]).astype(np.int64)
+            timer[expired] = 60 + (rolls[expired, 3] * 121).astype(np.int64)
+            
+        # Player targeting (if player lane provided)
+        if player_lane is not None:
+            follow = (rolls[:, 0] < self.aggression[:n]) & (rolls[:, 1] < 0.3 * self.level[:n])
+            lane[follow] = player_lane
+            
+        # Remove enemies that have gone off screen, keeping the rest in order
+        top, bottom = self.CULL_Y
+        gone = (y < top) | (y > bottom)
+        if gone.any():
+            keep = ~gone
+            survivors = int(np.count_nonzero(keep))
+            for i in np.flatnonzero(gone).tolist():
+                enemy = self.sprites[i]
+                enemy.kill()
+                self.pool.release(enemy)
+            self.sprites = [enemy for enemy, alive in zip(self.sprites, keep.tolist()) if alive]
+            for name in ("x", "y", "prev_x", "prev_y", "vy", "lane", "timer", "aggression", "level", "angle"):
+                array = getattr(self, name)
+                array[:survivors] = array[:n][keep]
+            self.count = survivors
+            
+    def _sync_sprite(self, i):
+        # Copy array state back onto one sprite
+        enemy = self.sprites[i]
+        enemy.position.update(self.x[i], self.y[i])
+        enemy.prev_position.update(self.prev_x[i], self.prev_y[i])
+        enemy.angle = int(self.angle[i])
+        enemy.target_lane = int(self.lane[i])
+        enemy.lane_change_timer = int(self.timer[i])
+        enemy.image = enemy.atlas.frame(enemy.angle)
+        enemy.rect = enemy.image.get_rect(center=enemy.position)
+        return enemy
+        
+    def sync_sprites(self):
+        if self.batched:
+            for i in range(self.count):
+                self._sync_sprite(i)
+                
+    def spawn_enemy(self, geometry=None):
+        if geometry is None:
+            geometry = self.road.geometry(self.SPAWN_Y)
+        lane = self.rng.randint(0, geometry.lanes - 1)
+        x = geometry.lane_center(lane)
+        y = self.SPAWN_Y  # Spawn above the screen
+        
+        enemy = self.pool.acquire(x, y, self.difficulty, self.rng)
+        self.add_enemy(enemy)
+        
+    def add_enemy(self, enemy):
         self.enemies.add(enemy)
+        if not self.batched:
+            self.index.insert(enemy, "enemy")
+            return
+            
+        # Batched enemies are tracked in the arrays instead of the grid
+        if self.count == self.capacity:
+            self._allocate(max(256, self.capacity * 2))
+        i = self.count
+        self.x[i] = enemy.position.x
+        self.y[i] = enemy.position.y
+        self.prev_x[i] = enemy.prev_position.x
+        self.prev_y[i] = enemy.prev_position.y
+        self.vy[i] = enemy.velocity.y
+        self.lane[i] = enemy.target_lane
+        self.timer[i] = enemy.lane_change_timer
+        self.aggression[i] = enemy.aggression
+        self.level[i] = enemy.difficulty
+        self.angle[i] = enemy.angle
+        self.sprites.append(enemy)
+        self.count += 1
+        
+    def remove_enemy(self, enemy):
+        if self.batched:
+            i = self.sprites.index(enemy)
+            for name in ("x", "y", "prev_x", "prev_y", "vy", "lane", "timer", "aggression", "level", "angle"):
+                array = getattr(self, name)
+                array[i:self.count - 1] = array[i + 1:self.count]
+            del self.sprites[i]
+            self.count -= 1
+        else:
+            self.index.remove(enemy)
+        enemy.kill()
+        self.pool.release(enemy)
+        
+    def prewarm(self, count):
+        self.pool.prewarm(count, 0, -200, 1, prewarm_rng)
         
-    def draw(self, screen):
+    def snapshot(self):
+        # Plain values describing every enemy and the spawner, for replays
+        self.sync_sprites()
+        enemies = tuple(
+            (enemy.position.x, enemy.position.y, enemy.prev_position.x, enemy.prev_position.y,
+             enemy.velocity.y, enemy.angle, enemy.difficulty, enemy.target_lane,
+             enemy.lane_change_timer, enemy.aggression)
+            for enemy in self.enemies)
+        rng_state = self.np_rng.bit_generator.state
+        return (self.spawn_timer, self.difficulty,
+                (rng_state["state"]["state"], rng_state["state"]["inc"], rng_state["has_uint32"], rng_state["uinteger"]),
+                enemies)
+        
+    def restore(self, state):
+        self.spawn_timer, self.difficulty, (rng_state, rng_inc, has_uint32, uinteger), enemies = state
+        bit_generator = self.np_rng.bit_generator
+        bit_generator.state = {
+            "bit_generator": bit_generator.state["bit_generator"],
+            "state": {"state": rng_state, "inc": rng_inc},
+            "has_uint32": has_uint32,
+            "uinteger": uinteger,
+        }
+        
+        for enemy in list(self.enemies):
+            self.remove_enemy(enemy)
+        for x, y, prev_x, prev_y, vy, angle, difficulty, lane, timer, aggression in enemies:
+            # Reset from the throwaway generator so the game's generator is untouched
+            enemy = self.pool.acquire(x, y, difficulty, prewarm_rng)
+            enemy.rng = self.rng
+            enemy.prev_position.update(prev_x, prev_y)
+            enemy.velocity.y = vy
+            enemy.angle = angle
+            enemy.target_lane = lane
+            enemy.lane_change_timer = timer
+            enemy.aggression = aggression
+            enemy.image = enemy.atlas.frame(angle)
+            enemy.rect = enemy.image.get_rect(center=enemy.position)
+            self.add_enemy(enemy)
+        
+    def draw(self, screen, alpha=1.0):
+        self.sync_sprites()
         for enemy in self.enemies:
-            enemy.draw_effects(screen)
+            enemy.draw_effects(screen, alpha)
         self.enemies.draw(screen)
         
     def check_collisions(self, player):
-        return pygame.sprite.spritecollide(player, self.enemies, False)
+        # Enemies that hit the player are wrecked and removed, so each one deals damage once
+        if not self.batched:
+            hits = self.index.query_rect(player.rect, "enemy")
+        else:
+            # Cheap array prefilter, then exact rect tests on the few candidates
+            n = self.count
+            px, py = player.rect.center
+            near = (np.abs(self.x[:n] - px) < 80) & (np.abs(self.y[:n] - py) < 100)
+            hits = []
+            for i in np.flatnonzero(near).tolist():
+                enemy = self._sync_sprite(i)
+                if player.rect.colliderect(enemy.rect):
+                    hits.append(enemy)
+        for enemy in hits:
+            self.remove_enemy(enemy)
+        return hits
+        
+    def find_overlapping_enemies(self):
+        # Pairs of enemies whose rects overlap
+        if self.batched:
+            grid = SpatialGrid()
+            for i in range(self.count):
+                grid.insert(self._sync_sprite(i), "enemy")
+            return grid.pairs("enemy")
+        return self.index.pairs("enemy")
+        
+    def enemies_near(self, x, y, radius):
+        if self.batched:
+            n = self.count
+            # Prefilter with a pixel of slack, then test the rounded rect centers like the grid does
+            close = (self.x[:n] - x) ** 2 + (self.y[:n] - y) ** 2 <= (radius + 1) ** 2
+            result = []
+            for i in np.flatnonzero(close).tolist():
+                enemy = self._sync_sprite(i)
+                cx, cy = enemy.rect.center
+                if (cx - x) ** 2 + (cy - y) ** 2 <= radius * radius:
+                    result.append(enemy)
+            return result
+        return self.index.query_radius(x, y, radius, "enemy")
@@ -0,0 +1,339 @@
+"""Game simulation, independent of the window and the frame clock.
+
+Run headless from the command line with ``python -m assest.engine``.
+"""
+import argparse
+import random
+import time
+import numpy as np
+
+from .road import Road
+from .player import Player
+from .enemy import EnemyManager
+from .powerup import PowerUpManager
+from .effect import EffectManager
+from .controls import IDLE, RandomInput
+from .profiler import FrameProfiler
+from .spatial import SpatialGrid
+
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+ROAD_WIDTH = 400
+
+# The simulation always advances in ticks of this rate, whatever the display
+# refresh rate. Speeds, friction, timers and the difficulty ramp are all in
+# units of one tick.
+TICK_RATE = 60
+
+# Pooled sprites built when a simulation starts, a little over the peak of a
+# long game (about 9 enemies and 2 power-ups), so spawns during play only recycle
+ENEMY_PREWARM = 12
+POWERUP_PREWARM = 4
+
+
+class Balance:
+    """Gameplay tuning values, with the shipped game's values as defaults.
+
+    Times are in ticks. ``Balance.parse("collision_damage=15")`` style
+    overrides are used by the evaluation farm.
+    """
+
+    FIELDS = {
+        "collision_damage": 10,
+        "difficulty_growth": 0.0001,
+        "enemy_spawn_min": 30,
+        "enemy_spawn_max": 120,
+        "powerup_spawn_min": 300,
+        "powerup_spawn_max": 600,
+        "powerup_first_spawn": 300,
+    }
+
+    def __init__(self, **overrides):
+        for name, default in self.FIELDS.items():
+            setattr(self, name, overrides.pop(name, default))
+        if overrides:
+            raise TypeError(f"unknown balance values: {', '.join(sorted(overrides))}")
+
+    @classmethod
+    def parse_value(cls, name, text):
+        if name not in cls.FIELDS:
+            raise ValueError(f"unknown balance value {name!r}")
+        return type(cls.FIELDS[name])(text)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def __repr__(self):
+        changed = [f"{name}={value}" for name, value in self.as_dict().items() if value != self.FIELDS[name]]
+        return f"Balance({', '.join(changed)})"
+
+
+class Simulation:
+    """One run of the game: road, player, managers, collisions and scoring.
+
+    Every random decision comes from generators seeded with ``seed``, so two
+    simulations given the same seed and inputs stay in lockstep. With a
+    ``track`` (see ``assest.track``) the road follows its segments instead
+    of running straight; ``track="endless"`` generates one from the seed.
+    """
+
+    def __init__(self, seed=None, profiler=None, batched_ai=False, balance=None, track=None):
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.np_rng = np.random.default_rng(seed)
+
+        # Disabled unless the caller hands in a profiler to fill
+        self.profiler = profiler or FrameProfiler()
+        self.balance = balance = balance or Balance()
+
+        # Create game objects
+        if track == "endless":
+            from .track import ProceduralTrack
+            track = ProceduralTrack(seed, SCREEN_WIDTH)
+        self.road = Road(ROAD_WIDTH, SCREEN_HEIGHT, self.rng, track=track, screen_width=SCREEN_WIDTH)
+        self.player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 100)
+        self.players = [self.player]  # Cars still on the road, for drawing
+        self.spatial = SpatialGrid()
+        self.enemy_manager = EnemyManager(self.road, self.rng, self.spatial, batched=batched_ai,
+                                          spawn_interval=(balance.enemy_spawn_min, balance.enemy_spawn_max),
+                                          difficulty_growth=balance.difficulty_growth)
+        self.powerup_manager = PowerUpManager(self.road, self.rng, self.spatial,
+                                              spawn_interval=(balance.powerup_spawn_min, balance.powerup_spawn_max),
+                                              first_spawn=balance.powerup_first_spawn)
+        self.enemy_manager.prewarm(ENEMY_PREWARM)
+        self.powerup_manager.prewarm(POWERUP_PREWARM)
+        self.effect_manager = EffectManager(rng=self.np_rng)
+
+        # Add boost effect to player
+        self.effect_manager.add_boost_effect(self.player)
+
+        self.tick = 0
+        self.score = 0
+        self.game_over = False
+
+        # What happened during the last step, for the HUD
+        self.score_change = 0
+        self.damage_taken = 0
+        self.pickups = 0
+
+    def step(self, controls=IDLE):
+        self.score_change = 0
+        self.damage_taken = 0
+        self.pickups = 0
+        if self.game_over:
+            return
+
+        player = self.player
+        profiler = self.profiler
+        if controls.boost:
+            player.apply_boost()
+
+        # Update game objects
+        road_speed = 5 + player.velocity.length()
+        self.road.update(road_speed)
+        profiler.mark("road.update")
+
+        geometry = self.road.geometry(player.position.y)
+        player.update(geometry.width, SCREEN_HEIGHT, controls, geometry.left)
+        profiler.mark("player.update")
+
+        self.enemy_manager.update(player.position)
+        profiler.mark("enemies.update")
+        self.powerup_manager.update()
+        profiler.mark("powerups.update")
+
+        self.effect_manager.update()
+        profiler.mark("effects.update")
+
+        # Check collisions
+        collisions = self.enemy_manager.check_collisions(player)
+        if collisions:
+            damage = self.balance.collision_damage
+            self.damage_taken = damage
+            if player.take_damage(damage):
+                # Player died
+                self.game_over = True
+
+                # Create explosion effect
+                self.effect_manager.add_explosion(player.position.x, player.position.y, (255, 100, 0), 50)
+            else:
+                # Create small explosion effect
+                self.effect_manager.add_explosion(player.position.x, player.position.y, (255, 100, 0), 20)
+
+        # Check powerup collisions
+        self.pickups = self.powerup_manager.check_collisions(player)
+        if self.pickups:
+            # Create collect effect
+            self.effect_manager.add_collect_effect(player.position.x, player.position.y, (0, 195, 255))
+            self.score_change += 50
+
+        profiler.mark("collisions")
+
+        # Update score based on distance traveled
+        score_increment = int(road_speed * 0.1)
+        if score_increment > 0:
+            self.score_change += score_increment
+
+        self.score += self.score_change
+        self.tick += 1
+
+    def snapshot(self):
+        """Everything needed to continue this run exactly, as nested tuples of plain values.
+
+        Particles and collect rings are cosmetic and not included.
+        """
+        np_state = self.np_rng.bit_generator.state
+        return (
+            self.tick, self.score, self.game_over,
+            self.rng.getstate(),
+            (np_state["state"]["state"], np_state["state"]["inc"], np_state["has_uint32"], np_state["uinteger"]),
+            self.road.snapshot(),
+            self.player.snapshot(),
+            self.enemy_manager.snapshot(),
+            self.powerup_manager.snapshot(),
+        )
+
+    def restore(self, state):
+        # Restores in place, so references to the player and managers stay valid
+        tick, score, game_over, rng_state, np_state, road, player, enemies, powerups = state
+        self.tick = tick
+        self.score = score
+        self.game_over = game_over
+        self.score_change = 0
+        self.damage_taken = 0
+
+        version, internal, gauss_next = rng_state
+        self.rng.setstate((version, tuple(internal), gauss_next))
+        np_rng_state, np_inc, has_uint32, uinteger = np_state
+        bit_generator = self.np_rng.bit_generator
+        bit_generator.state = {
+            "bit_generator": bit_generator.state["bit_generator"],
+            "state": {"state": np_rng_state, "inc": np_inc},
+            "has_uint32": has_uint32,
+            "uinteger": uinteger,
+        }
+
+        self.road.restore(road)
+        self.player.restore(player)
+        self.enemy_manager.restore(enemies)
+        self.powerup_manager.restore(powerups)
+        self.effect_manager.clear()
+
+    def draw(self, screen, alpha=1.0):
+        # `alpha` is how far the frame lies between the last two ticks
+        profiler = self.profiler
+        self.road.draw(screen, alpha)
+        profiler.mark("road.draw")
+
+        # Draw players and their effects
+        for player in self.players:
+            player.draw_effects(screen, alpha)
+            screen.blit(player.image, player.rect)
+        profiler.mark("player.draw")
+
+        self.enemy_manager.draw(screen, alpha)
+        profiler.mark("enemies.draw")
+        self.powerup_manager.draw(screen, alpha)
+        profiler.mark("powerups.draw")
+        self.effect_manager.draw(screen, alpha)
+        profiler.mark("effects.draw")
+
+    def mark_dirty(self, renderer):
+        # Everything but the effects stays inside the road band
+        renderer.mark(self.road.get_band_rect())
+        for rect in self.effect_manager.dirty_rects():
+            renderer.mark_transient(rect)
+
+
+def run_headless(seed=None, max_ticks=TICK_RATE * 60, input_source=None, batched_ai=False, track=None):
+    """Step one game with no display until game over or ``max_ticks``.
+
+    Returns a dict with the final state and the achieved ticks per second.
+    """
+    sim = Simulation(seed, batched_ai=batched_ai, track=track)
+    if input_source is None:
+        input_source = RandomInput(random.Random(sim.seed + 1))
+
+    start = time.perf_counter()
+    while not sim.game_over and sim.tick < max_ticks:
+        sim.step(input_source.get_state(sim))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "seed": sim.seed,
+        "ticks": sim.tick,
+        "score": sim.score,
+        "health": sim.player.health,
+        "game_over": sim.game_over,
+        "seconds": elapsed,
+        "ticks_per_second": sim.tick / elapsed if elapsed > 0 else float("inf"),
+        "enemy_pool": sim.enemy_manager.pool.stats(),
+        "powerup_pool": sim.powerup_manager.pool.stats(),
+    }
+
+
+def check_batched(seed=None, max_ticks=TICK_RATE * 60, track=None):
+    """Step the scalar and the batched enemy AI in lockstep on the same inputs.
+
+    Returns a dict with the ticks stepped and whether the two simulations'
+    snapshots differed after the last of them.
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    sims = [Simulation(seed, batched_ai=batched, track=track) for batched in (False, True)]
+    inputs = [RandomInput(random.Random(seed + 1)) for _ in sims]
+    scalar, batched = sims
+    diverged = False
+    while not diverged and not scalar.game_over and scalar.tick < max_ticks:
+        for sim, input_source in zip(sims, inputs):
+            sim.step(input_source.get_state(sim))
+        diverged = scalar.snapshot() != batched.snapshot()
+    return {"seed": seed, "ticks": scalar.tick, "diverged": diverged}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Cyber Drift headless")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--games", type=int, default=1)
+    parser.add_argument("--ticks", type=int, default=TICK_RATE * 60 * 10, help="tick limit per game")
+    parser.add_argument("--batched-ai", action="store_true", help="run enemy AI as one vectorized step")
+    parser.add_argument("--track", default=None,
+                        help="drive a track file, or 'endless' for a generated one, instead of the straight road")
+    parser.add_argument("--check-batched", action="store_true",
+                        help="step the scalar and batched enemy AI in lockstep and stop at the first difference")
+    args = parser.parse_args(argv)
+
+    track = args.track
+    if track and track != "endless":
+        from .track import TrackFile
+        track = TrackFile(track)
+
+    if args.check_batched:
+        failures = 0
+        for game in range(args.games):
+            seed = None if args.seed is None else args.seed + game
+            result = check_batched(seed, args.ticks, track)
+            failures += result["diverged"]
+            print(f"seed={result['seed']} ticks={result['ticks']} " + ("diverged" if result["diverged"] else "ok"))
+        if failures:
+            raise SystemExit(1)
+        return
+
+    total_ticks = 0
+    total_seconds = 0.0
+    for game in range(args.games):
+        seed = None if args.seed is None else args.seed + game
+        result = run_headless(seed, args.ticks, batched_ai=args.batched_ai, track=track)
+        total_ticks += result["ticks"]
+        total_seconds += result["seconds"]
+        print(f"seed={result['seed']} ticks={result['ticks']} score={result['score']} "
+              f"game_over={result['game_over']} tps={result['ticks_per_second']:.0f}")
+
+    if args.games > 1 and total_seconds > 0:
+        print(f"total ticks={total_ticks} tps={total_ticks / total_seconds:.0f}")
+
+
+if __name__ == "__main__":
+    main()
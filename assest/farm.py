@@ -0,0 +1,234 @@
+"""Headless evaluation farm for balancing and difficulty tuning.
+
+Plays many seeded games for every combination of the given balance values
+across a process pool and prints an aggregated report as results stream
+in. Each parameter set plays the same seeds, so differences between sets
+come from the parameters rather than the luck of the draw.
+
+    python -m assest.farm --games 2000 --param collision_damage=10,15,20 \\
+        --param difficulty_growth=0.0001,0.0002 --results games.jsonl --report report.json
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+# Workers never open a window
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from .engine import Balance, Simulation, TICK_RATE
+from .controls import IDLE, DodgeInput, RandomInput
+
+BOTS = ["random", "dodge", "idle"]
+
+
+def make_bot(name, seed):
+    if name == "random":
+        return RandomInput(random.Random(seed + 1))
+    if name == "dodge":
+        return DodgeInput()
+    return None
+
+
+def play_game(seed, balance, bot, max_ticks):
+    """Play one game and return its statistics as a dict.
+
+    Raises RuntimeError if a game long enough to have spawned traffic never
+    had an enemy on the road, since its numbers would say nothing about
+    the balance.
+    """
+    sim = Simulation(seed, balance=balance)
+    driver = make_bot(bot, seed)
+    enemies = sim.enemy_manager.enemies
+    damage = 0
+    hits = 0
+    pickups = 0
+    enemy_ticks = 0
+    peak_enemies = 0
+    while not sim.game_over and sim.tick < max_ticks:
+        sim.step(driver.get_state(sim) if driver is not None else IDLE)
+        if sim.damage_taken:
+            damage += sim.damage_taken
+            hits += 1
+        pickups += sim.pickups
+        live = len(enemies)
+        enemy_ticks += live
+        peak_enemies = max(peak_enemies, live)
+    if peak_enemies == 0 and sim.tick > balance.enemy_spawn_max:
+        raise RuntimeError(f"seed {seed}: no enemy was live in {sim.tick} ticks; spawning or culling is broken")
+    return {
+        "seed": seed,
+        "ticks": sim.tick,
+        "died": sim.game_over,
+        "score": sim.score,
+        "damage": damage,
+        "hits": hits,
+        "pickups": pickups,
+        "enemies_mean": enemy_ticks / sim.tick if sim.tick else 0.0,
+        "enemies_peak": peak_enemies,
+    }
+
+
+def play_batch(task):
+    # One task is a run of seeds for one parameter set, to keep IPC per game small
+    set_index, values, seeds, bot, max_ticks = task
+    balance = Balance(**values)
+    started = time.process_time()
+    games = [play_game(seed, balance, bot, max_ticks) for seed in seeds]
+    return set_index, games, time.process_time() - started
+
+
+class Aggregate:
+    """Running totals for one parameter set."""
+
+    def __init__(self, values):
+        self.values = values
+        self.games = []
+
+    def add(self, game):
+        self.games.append(game)
+
+    def summary(self):
+        games = self.games
+        if not games:
+            return {"params": self.values, "games": 0}
+        ticks = np.array([game["ticks"] for game in games], dtype=np.float64)
+        scores = np.array([game["score"] for game in games], dtype=np.float64)
+        minutes = ticks.sum() / (TICK_RATE * 60)
+        return {
+            "params": self.values,
+            "games": len(games),
+            "death_rate": sum(game["died"] for game in games) / len(games),
+            "survival_s": {
+                "mean": float(ticks.mean() / TICK_RATE),
+                "p10": float(np.percentile(ticks, 10) / TICK_RATE),
+                "p50": float(np.percentile(ticks, 50) / TICK_RATE),
+                "p90": float(np.percentile(ticks, 90) / TICK_RATE),
+            },
+            "score": {
+                "mean": float(scores.mean()),
+                "p50": float(np.percentile(scores, 50)),
+                "p90": float(np.percentile(scores, 90)),
+            },
+            "damage_per_game": sum(game["damage"] for game in games) / len(games),
+            "hits_per_minute": sum(game["hits"] for game in games) / minutes if minutes else 0.0,
+            "pickups_per_minute": sum(game["pickups"] for game in games) / minutes if minutes else 0.0,
+            "enemies_on_road": float(np.mean([game["enemies_mean"] for game in games])),
+            "games_without_enemies": sum(game["enemies_peak"] == 0 for game in games),
+        }
+
+
+def parameter_sets(params):
+    # Cartesian product of "name=v1,v2" options, as a list of dicts
+    names = []
+    choices = []
+    for option in params:
+        name, _, values = option.partition("=")
+        name = name.strip()
+        names.append(name)
+        choices.append([Balance.parse_value(name, value) for value in values.split(",")])
+    return [dict(zip(names, combo)) for combo in itertools.product(*choices)]
+
+
+def print_table(aggregates, out=sys.stdout):
+    print(f"{'params':40s} {'games':>6s} {'deaths':>7s} {'surv p50':>9s} {'score':>8s} "
+          f"{'dmg/game':>9s} {'pick/min':>9s} {'enemies':>8s}", file=out)
+    for aggregate in aggregates:
+        summary = aggregate.summary()
+        if not summary["games"]:
+            continue
+        label = ", ".join(f"{name}={value}" for name, value in summary["params"].items()) or "defaults"
+        print(f"{label[:40]:40s} {summary['games']:6d} {summary['death_rate']:7.1%} "
+              f"{summary['survival_s']['p50']:8.1f}s {summary['score']['mean']:8.0f} "
+              f"{summary['damage_per_game']:9.1f} {summary['pickups_per_minute']:9.2f} "
+              f"{summary['enemies_on_road']:8.2f}", file=out)
+        if summary["games_without_enemies"]:
+            print(f"  warning: {summary['games_without_enemies']} games never had an enemy on the road", file=out)
+
+
+def run(sets, games, bot="random", max_ticks=TICK_RATE * 120, workers=None, seed=0, batch=8,
+        results=None, progress_every=5.0):
+    """Play ``games`` seeds for every parameter set; returns the aggregates."""
+    workers = workers or os.cpu_count() or 1
+    seeds = list(range(seed, seed + games))
+    tasks = [(index, values, seeds[start:start + batch], bot, max_ticks)
+             for start in range(0, games, batch)
+             for index, values in enumerate(sets)]
+    aggregates = [Aggregate(values) for values in sets]
+
+    started = time.perf_counter()
+    last_progress = started
+    done = 0
+    total_ticks = 0
+    cpu_seconds = 0.0
+    with multiprocessing.Pool(workers) as pool:
+        for set_index, batch_games, seconds in pool.imap_unordered(play_batch, tasks):
+            cpu_seconds += seconds
+            for game in batch_games:
+                aggregates[set_index].add(game)
+                total_ticks += game["ticks"]
+                if results is not None:
+                    results.write(json.dumps({"params": sets[set_index], **game}) + "\n")
+            done += len(batch_games)
+
+            now = time.perf_counter()
+            if now - last_progress >= progress_every:
+                last_progress = now
+                if results is not None:
+                    results.flush()
+                print(f"{done}/{games * len(sets)} games, {total_ticks / (now - started):.0f} ticks/s", file=sys.stderr)
+                print_table(aggregates, sys.stderr)
+
+    # Scaling efficiency: achieved rate against every worker running at its single-core rate
+    elapsed = time.perf_counter() - started
+    single_core = total_ticks / cpu_seconds if cpu_seconds else 0.0
+    efficiency = total_ticks / elapsed / (single_core * workers) if single_core else 0.0
+    print(f"{done} games in {elapsed:.1f} s on {workers} workers, {total_ticks / elapsed:.0f} ticks/s "
+          f"({single_core:.0f} per core), scaling efficiency {efficiency:.0%}", file=sys.stderr)
+    return aggregates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play many headless games per balance setting and report")
+    parser.add_argument("--games", type=int, default=200, help="games per parameter set")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=V1,V2",
+                        help=f"balance values to sweep, one of: {', '.join(Balance.FIELDS)}")
+    parser.add_argument("--bot", choices=BOTS, default="random")
+    parser.add_argument("--ticks", type=int, default=TICK_RATE * 120, help="tick limit per game")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: one per core)")
+    parser.add_argument("--seed", type=int, default=0, help="first seed")
+    parser.add_argument("--batch", type=int, default=8, help="games per task sent to a worker")
+    parser.add_argument("--results", default=None, help="stream every game as a JSON line to this file")
+    parser.add_argument("--report", default=None, help="write the aggregated report as JSON")
+    args = parser.parse_args(argv)
+
+    sets = parameter_sets(args.param)
+    results = open(args.results, "w") if args.results else None
+    try:
+        aggregates = run(sets, args.games, args.bot, args.ticks, args.workers, args.seed, args.batch, results)
+    finally:
+        if results is not None:
+            results.close()
+
+    print_table(aggregates)
+    if args.report:
+        report = {
+            "games_per_set": args.games,
+            "bot": args.bot,
+            "max_ticks": args.ticks,
+            "defaults": Balance().as_dict(),
+            "sets": [aggregate.summary() for aggregate in aggregates],
+        }
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import pygame
+from collections import OrderedDict
+
+
+class GlowCache:
+    """Process-wide cache of translucent circle sprites.
+
+    Sprites are keyed by quantized (radius, color, alpha, ring width) so that
+    particles, decorations and power-up glows all share a small set of
+    surfaces. The least recently used sprites are evicted once the cache
+    grows past ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes=8 * 1024 * 1024, radius_step=1, alpha_step=8):
+        self.max_bytes = max_bytes
+        self.radius_step = radius_step
+        self.alpha_step = alpha_step
+
+        self.sprites = OrderedDict()
+        self.bytes_used = 0
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def configure(self, max_bytes=None, radius_step=None, alpha_step=None):
+        if radius_step is not None or alpha_step is not None:
+            # Quantization changed, so none of the old keys will be asked for again
+            self.clear()
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+        if radius_step is not None:
+            self.radius_step = max(1, int(radius_step))
+        if alpha_step is not None:
+            self.alpha_step = max(1, int(alpha_step))
+        self._evict()
+
+    def quantize_radius(self, radius):
+        step = self.radius_step
+        return int(radius / step + 0.5) * step
+
+    def get(self, radius, color, alpha, width=0):
+        radius = self.quantize_radius(radius)
+        if radius <= 0:
+            return None
+        step = self.alpha_step
+        alpha = min(255, int(alpha / step + 0.5) * step)
+        key = (radius, color[0], color[1], color[2], alpha, width)
+
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.hits += 1
+            self.sprites.move_to_end(key)
+            return sprite
+
+        self.misses += 1
+        sprite = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+        pygame.draw.circle(sprite, (color[0], color[1], color[2], alpha), (radius, radius), radius, width)
+        self.sprites[key] = sprite
+        self.bytes_used += radius * radius * 16
+        self._evict()
+        return sprite
+
+    def blit(self, screen, x, y, radius, color, alpha, width=0):
+        # Draw a glow centered on (x, y)
+        sprite = self.get(radius, color, alpha, width)
+        if sprite is not None:
+            half = sprite.get_width() // 2
+            screen.blit(sprite, (x - half, y - half))
+
+    def _evict(self):
+        while self.bytes_used > self.max_bytes and self.sprites:
+            _, sprite = self.sprites.popitem(last=False)
+            self.bytes_used -= sprite.get_width() * sprite.get_height() * 4
+            self.evictions += 1
+
+    def clear(self):
+        self.sprites.clear()
+        self.bytes_used = 0
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "sprites": len(self.sprites),
+            "bytes": self.bytes_used,
+        }
+
+
+# Shared by every call site in the game
+glow_cache = GlowCache()
@@ -1,21 +1,68 @@
 import pygame
 import math
+from .profiler import STAGE_COLORS
+from .text import get_font, Label, GlyphAtlas
 
 class HUD:
-    def __init__(self):
-        self.width = 800
-        self.height = 600
+    def __init__(self, width=800, height=600):
+        # Size of the area drawn into; split-screen viewports are narrower than the window
+        self.width = width
+        self.height = height
         
-        # Fonts
-        self.font_large = pygame.font.SysFont('Arial', 36)
-        self.font_medium = pygame.font.SysFont('Arial', 24)
-        self.font_small = pygame.font.SysFont('Arial', 18)
+        # Fonts, created once per process
+        self.font_large = get_font('Arial', 36)
+        self.font_medium = get_font('Arial', 24)
+        self.font_small = get_font('Arial', 18)
         
         # Colors
         self.neon_blue = (0, 195, 255)
         self.neon_pink = (255, 0, 153)
         self.neon_green = (57, 255, 20)
         self.neon_yellow = (255, 230, 0)
+        white = (255, 255, 255)
+        
+        # Static labels; numbers are composed from pre-rendered digits
+        self.speed_label = Label(self.font_medium, self.neon_green, "SPEED: ")
+        self.speed_unit = Label(self.font_medium, self.neon_green, " KM/H")
+        self.speed_digits = GlyphAtlas(self.font_medium, self.neon_green)
+        self.score_labels = {
+            self.neon_yellow: Label(self.font_large, self.neon_yellow, "SCORE: "),
+            white: Label(self.font_large, white, "SCORE: "),
+        }
+        self.score_digits = {
+            self.neon_yellow: GlyphAtlas(self.font_large, self.neon_yellow, "0123456789-"),
+            white: GlyphAtlas(self.font_large, white, "0123456789-"),
+        }
+        self.small_digits = GlyphAtlas(self.font_small, white, "0123456789-%")
+        self.health_label = Label(self.font_small, white, "HEALTH: ")
+        self.shield_label = Label(self.font_small, white, "SHIELD: ")
+        self.boost_label = Label(self.font_small, white, "BOOST: ")
+        self.time_text = Label(self.font_medium, self.neon_blue)
+        
+        # Overlay text
+        self.game_over_text = Label(self.font_large, self.neon_pink, "GAME OVER")
+        self.final_score_text = Label(self.font_medium, self.neon_yellow)
+        self.restart_text = Label(self.font_small, self.neon_green, "PRESS SPACE TO RESTART")
+        self.paused_text = Label(self.font_large, self.neon_blue, "PAUSED")
+        self.resume_text = Label(self.font_small, self.neon_green, "PRESS P TO RESUME")
+        self.quit_text = Label(self.font_small, self.neon_pink, "PRESS ESC TO QUIT")
+        self.wrecked_text = Label(self.font_large, self.neon_pink, "WRECKED")
+        
+        # Fixed screen boxes for each field and what they showed last frame,
+        # so a dirty-rect renderer can refresh only the fields that changed
+        self.field_boxes = {
+            "speed": pygame.Rect(15, 15, 300, 36),
+            "time": pygame.Rect(self.width // 2 - 110, 15, 220, 36),
+            "score": pygame.Rect(self.width - 440, 15, 430, 50),
+            "health": pygame.Rect(15, self.height - 46, 210, 25),
+            "shield": pygame.Rect(15, self.height - 60, 210, 16),
+            "boost": pygame.Rect(self.width - 175, self.height - 46, 160, 20),
+        }
+        self.field_states = {}
+        self.dirty_rects = []
+        
+        # Full-screen overlays, created on first use
+        self.overlays = {}
         
         # Animation variables
         self.pulse = 0
@@ -37,17 +84,46 @@ class HUD:
         else:
             self.damage_flash = max(0, self.damage_flash - 0.05)
             
+    def draw_field(self, screen, label, digits, value, pos, suffix=None):
+        # Static label followed by a number blitted digit by digit
+        x, y = pos
+        screen.blit(label.surface, (x, y))
+        x = digits.draw(screen, value, (x + label.surface.get_width(), y))
+        if suffix is not None:
+            screen.blit(suffix.surface, (x, y))
+            
+    def track_field(self, name, state):
+        # Remember what a field shows and flag its box when that changes
+        if self.field_states.get(name) != state:
+            self.field_states[name] = state
+            self.dirty_rects.append(self.field_boxes[name])
+            
+    def get_overlay(self, alpha):
+        overlay = self.overlays.get(alpha)
+        if overlay is None:
+            overlay = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
+            overlay.fill((0, 0, 0, alpha))
+            self.overlays[alpha] = overlay
+        return overlay
+        
     def draw(self, screen, player, score, speed, time_left=None):
+        self.dirty_rects = []
+        
         # Draw speed indicator
-        speed_text = self.font_medium.render(f"SPEED: {int(speed * 10)} KM/H", True, self.neon_green)
-        screen.blit(speed_text, (20, 20))
+        speed_value = str(int(speed * 10))
+        self.draw_field(screen, self.speed_label, self.speed_digits, speed_value, (20, 20), self.speed_unit)
+        self.track_field("speed", speed_value)
         
         # Draw score with flash effect
         score_color = self.neon_yellow
         if self.score_flash > 0:
             score_color = (255, 255, 255)
-        score_text = self.font_large.render(f"SCORE: {score}", True, score_color)
-        screen.blit(score_text, (self.width - score_text.get_width() - 20, 20))
+        score_label = self.score_labels[score_color]
+        score_digits = self.score_digits[score_color]
+        score_value = str(score)
+        score_width = score_label.surface.get_width() + score_digits.width(score_value)
+        self.draw_field(screen, score_label, score_digits, score_value, (self.width - score_width - 20, 20))
+        self.track_field("score", (score_value, score_color))
         
         # Draw health bar
         health_width = 200
@@ -73,8 +149,9 @@ class HUD:
         pygame.draw.rect(screen, health_color, (health_x, health_y, health_fill, health_height))
         
         # Health text
-        health_text = self.font_small.render(f"HEALTH: {int(player.health)}%", True, (255, 255, 255))
-        screen.blit(health_text, (health_x + 5, health_y - 3))
+        health_value = f"{int(player.health)}%"
+        self.draw_field(screen, self.health_label, self.small_digits, health_value, (health_x + 5, health_y - 3))
+        self.track_field("health", (health_value, int(health_fill), health_color))
         
         # Draw shield bar if active
         if player.shield > 0:
@@ -91,8 +168,11 @@ class HUD:
             pygame.draw.rect(screen, self.neon_blue, (shield_x, shield_y, shield_fill, shield_height))
             
             # Shield text
-            shield_text = self.font_small.render(f"SHIELD: {int(player.shield)}%", True, (255, 255, 255))
-            screen.blit(shield_text, (shield_x + 5, shield_y - 3))
+            shield_value = f"{int(player.shield)}%"
+            self.draw_field(screen, self.shield_label, self.small_digits, shield_value, (shield_x + 5, shield_y - 3))
+            self.track_field("shield", (shield_value, int(shield_fill)))
+        else:
+            self.track_field("shield", None)
             
         # Draw boost meter
         if player.boost > 0:
@@ -116,48 +196,138 @@ class HUD:
             pygame.draw.rect(screen, boost_color, (boost_x, boost_y, boost_fill, boost_height))
             
             # Boost text
-            boost_text = self.font_small.render(f"BOOST: {int(player.boost)}%", True, (255, 255, 255))
-            screen.blit(boost_text, (boost_x + 5, boost_y - 3))
+            boost_value = f"{int(player.boost)}%"
+            self.draw_field(screen, self.boost_label, self.small_digits, boost_value, (boost_x + 5, boost_y - 3))
+            self.track_field("boost", (boost_value, int(boost_fill), boost_color))
+        else:
+            self.track_field("boost", None)
             
         # Draw time left if provided (for time trial mode)
         if time_left is not None:
             minutes = int(time_left / 60)
             seconds = int(time_left % 60)
-            time_text = self.font_medium.render(f"TIME: {minutes:02d}:{seconds:02d}", True, self.neon_blue)
+            time_text = self.time_text.get(f"TIME: {minutes:02d}:{seconds:02d}")
             screen.blit(time_text, (self.width // 2 - time_text.get_width() // 2, 20))
+            self.track_field("time", self.time_text.text)
+        else:
+            self.track_field("time", None)
             
     def draw_game_over(self, screen, final_score):
         # Semi-transparent overlay
-        overlay = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 200))
-        screen.blit(overlay, (0, 0))
+        screen.blit(self.get_overlay(200), (0, 0))
         
         # Game over text
-        game_over = self.font_large.render("GAME OVER", True, self.neon_pink)
+        game_over = self.game_over_text.surface
         screen.blit(game_over, (self.width // 2 - game_over.get_width() // 2, self.height // 2 - 50))
         
         # Final score
-        score_text = self.font_medium.render(f"FINAL SCORE: {final_score}", True, self.neon_yellow)
+        score_text = self.final_score_text.get(f"FINAL SCORE: {final_score}")
         screen.blit(score_text, (self.width // 2 - score_text.get_width() // 2, self.height // 2))
         
         # Restart prompt
-        restart = self.font_small.render("PRESS SPACE TO RESTART", True, self.neon_green)
+        restart = self.restart_text.surface
         screen.blit(restart, (self.width // 2 - restart.get_width() // 2, self.height // 2 + 50))
         
+    def draw_wrecked(self, screen, final_score):
+        # Split-screen viewport of a player who is out while the others race on
+        screen.blit(self.get_overlay(150), (0, 0))
+        
+        wrecked = self.wrecked_text.surface
+        screen.blit(wrecked, (self.width // 2 - wrecked.get_width() // 2, self.height // 2 - 50))
+        
+        score_text = self.final_score_text.get(f"FINAL SCORE: {final_score}")
+        screen.blit(score_text, (self.width // 2 - score_text.get_width() // 2, self.height // 2))
+        
     def draw_pause_menu(self, screen):
         # Semi-transparent overlay
-        overlay = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 150))
-        screen.blit(overlay, (0, 0))
+        screen.blit(self.get_overlay(150), (0, 0))
         
         # Paused text
-        paused = self.font_large.render("PAUSED", True, self.neon_blue)
+        paused = self.paused_text.surface
         screen.blit(paused, (self.width // 2 - paused.get_width() // 2, self.height // 2 - 50))
         
         # Resume prompt
-        resume = self.font_small.render("PRESS P TO RESUME", True, self.neon_green)
+        resume = self.resume_text.surface
         screen.blit(resume, (self.width // 2 - resume.get_width() // 2, self.height // 2))
         
         # Quit prompt
-        quit_text = self.font_small.render("PRESS ESC TO QUIT", True, self.neon_pink)
+        quit_text = self.quit_text.surface
         screen.blit(quit_text, (self.width // 2 - quit_text.get_width() // 2, self.height // 2 + 30))
+
+    def draw_profiler(self, screen, profiler, x=20, y=60, latency=None, quality=None):
+        # Stacked per-stage bars for recent frames plus a frame-time histogram,
+        # input latency percentiles when a tracker is given, and the quality
+        # level when a governor is.
+        # Returns the panel rectangle, or None when the profiler is off.
+        if not profiler.enabled:
+            return None
+        
+        bar_frames = 120
+        graph_height = 100
+        ms_scale = graph_height / 33.3  # Two 60 FPS frames fill the graph
+        panel_width = bar_frames * 2 + 160
+        panel_height = graph_height + 90 + (22 if latency is not None else 0) + (22 if quality is not None else 0)
+        
+        pygame.draw.rect(screen, (10, 10, 20), (x, y, panel_width, panel_height))
+        pygame.draw.rect(screen, self.neon_blue, (x, y, panel_width, panel_height), 1)
+        
+        # Budget line at 16.7 ms
+        budget_y = y + graph_height - int(16.7 * ms_scale)
+        pygame.draw.line(screen, self.neon_pink, (x, budget_y), (x + bar_frames * 2, budget_y))
+        
+        # Stacked bars, newest on the right
+        rows = profiler.recent()[-bar_frames:]
+        offset = bar_frames - len(rows)
+        for i, row in enumerate(rows):
+            bar_x = x + (offset + i) * 2
+            bar_bottom = y + graph_height
+            for stage, value in zip(profiler.stages, row):
+                height = value * ms_scale
+                if height < 0.5:
+                    continue
+                top = max(y, bar_bottom - height)
+                pygame.draw.rect(screen, STAGE_COLORS[stage], (bar_x, top, 2, bar_bottom - top))
+                bar_bottom = top
+                if bar_bottom <= y:
+                    break
+                    
+        # Frame time histogram
+        counts, edges = profiler.histogram(bins=20, max_ms=50.0)
+        hist_y = y + graph_height + 80
+        peak = max(1, counts.max()) if len(counts) else 1
+        for i, count in enumerate(counts):
+            height = int(60 * count / peak)
+            color = self.neon_green if edges[i + 1] <= 16.7 else self.neon_pink
+            pygame.draw.rect(screen, color, (x + i * 12, hist_y - height, 10, height))
+            
+        # Legend with the most expensive stages
+        averages = profiler.averages()
+        legend_x = x + bar_frames * 2 + 10
+        frame_ms = sum(averages.values())
+        text = self.font_small.render(f"{frame_ms:5.1f} ms", True, (255, 255, 255))
+        screen.blit(text, (legend_x, y + 4))
+        ranked = sorted(averages.items(), key=lambda item: item[1], reverse=True)[:8]
+        for i, (stage, value) in enumerate(ranked):
+            legend_y = y + 26 + i * 20
+            pygame.draw.rect(screen, STAGE_COLORS[stage], (legend_x, legend_y + 4, 8, 8))
+            text = self.font_small.render(f"{stage} {value:.2f}", True, (255, 255, 255))
+            screen.blit(text, (legend_x + 12, legend_y))
+            
+        # Event to flip delay of recent inputs
+        if latency is not None:
+            points = latency.percentiles()
+            if points is None:
+                line = "input to display: no input yet"
+            else:
+                line = "input to display  p50 {p50:.1f}  p95 {p95:.1f}  p99 {p99:.1f} ms".format(**points)
+            text = self.font_small.render(line, True, self.neon_green)
+            screen.blit(text, (x + 4, y + graph_height + 90))
+            
+        # Current quality level and how often it has changed
+        if quality is not None:
+            line_y = y + graph_height + (112 if latency is not None else 90)
+            state = "held" if quality.locked else f"{quality.total_changes} changes"
+            text = self.font_small.render(f"quality {quality.level.name} ({state})", True, self.neon_green)
+            screen.blit(text, (x + 4, line_y))
+            
+        return pygame.Rect(x, y, panel_width, panel_height)
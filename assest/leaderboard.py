@@ -0,0 +1,345 @@
+"""Online leaderboard client with a durable offline queue, and a local stand-in server.
+
+``LeaderboardClient`` does all of its disk and network work on one worker
+thread. The game thread only puts messages on a queue and reads plain
+attributes, so a slow or unreachable server never shows up in frame times:
+
+* Finished runs go into a SQLite queue before any upload is tried, so
+  scores survive crashes and offline sessions. The best local score is kept
+  in the same file and becomes the game's persistent high score.
+* Queued scores are posted in batches. Failures back off exponentially
+  with jitter. Every score carries a unique id, so a batch that is sent
+  twice is only counted once.
+* The board is fetched in the background and cached in memory and on
+  disk, so the menu always draws the last board it knew.
+
+Try it against the bundled stand-in server::
+
+    python -m assest.leaderboard serve --port 8765 --delay 2 --fail-rate 0.3
+    python -m assest --leaderboard http://127.0.0.1:8765
+    python -m assest.leaderboard status
+"""
+import argparse
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+
+DB_PATH = os.path.join(os.path.expanduser("~"), ".cyberdrift", "leaderboard.db")
+BOARD_SIZE = 10
+
+_STOP = ("stop", None)
+
+
+class LeaderboardClient:
+    """Background leaderboard sync. Without a ``url`` scores are only queued and kept locally.
+
+    Read ``high_score``, ``board``, ``pending`` and ``status`` from any
+    thread; they are replaced whole by the worker, never mutated in place.
+    """
+
+    def __init__(self, url=None, path=DB_PATH, name="PLAYER", batch_size=25, linger=0.5,
+                 refresh_interval=60.0, timeout=5.0, backoff=(1.0, 300.0)):
+        self.url = url.rstrip("/") if url else None
+        self.path = path
+        self.name = name
+        self.batch_size = batch_size
+        self.linger = linger  # Wait this long after a submission for more to batch with it
+        self.refresh_interval = refresh_interval
+        self.timeout = timeout
+        self.backoff = backoff
+        self.rng = random.Random()
+
+        self.inbox = queue.Queue()
+        self.thread = None
+
+        # Published by the worker
+        self.high_score = 0
+        self.board = ()  # (name, score) pairs, best first
+        self.board_time = None  # Unix time the board was fetched
+        self.pending = 0
+        self.status = "offline" if self.url is None else "connecting"
+        self.last_error = None
+        self.ready = threading.Event()  # Set once the local file has been read
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="leaderboard", daemon=True)
+        self.thread.start()
+        return self
+
+    def submit(self, score, seed=None, ticks=0, upload=True):
+        """Record a finished run. Returns at once; ``upload=False`` only updates the high score."""
+        entry = {
+            "id": uuid.uuid4().hex,
+            "name": self.name,
+            "score": int(score),
+            "seed": seed,
+            "ticks": ticks,
+            "time": time.time(),
+        }
+        if score > self.high_score:
+            # Shown straight away; the worker stores it
+            self.high_score = int(score)
+        self.inbox.put(("submit" if upload else "best", entry))
+
+    def refresh(self):
+        """Ask for a fresh board soon. The cached board stays readable meanwhile."""
+        self.inbox.put(("refresh", None))
+
+    def close(self, timeout=1.0):
+        # Unsent scores stay queued on disk for the next session
+        if self.thread is not None:
+            self.inbox.put(_STOP)
+            self.thread.join(timeout)
+            self.thread = None
+
+    # Everything below runs on the worker thread
+
+    def _run(self):
+        # Imported here so starting the game does not pay for them
+        import sqlite3
+
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.path)
+            try:
+                self._open(db)
+                self.ready.set()
+                self._loop(db)
+            finally:
+                db.close()
+        except Exception as error:
+            # No local file means no queue, but the game plays on
+            self.status = "unavailable"
+            self.last_error = str(error)
+        finally:
+            self.ready.set()
+
+    def _open(self, db):
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("CREATE TABLE IF NOT EXISTS pending (id TEXT PRIMARY KEY, entry TEXT NOT NULL)")
+        db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        db.commit()
+        meta = dict(db.execute("SELECT key, value FROM meta"))
+        self.high_score = max(self.high_score, int(meta.get("high_score", 0)))
+        if "board" in meta:
+            board = json.loads(meta["board"])
+            self.board = tuple((row["name"], row["score"]) for row in board["scores"])
+            self.board_time = board["time"]
+        self.pending = db.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+
+    def _loop(self, db):
+        now = time.monotonic()
+        next_flush = now
+        next_fetch = now
+        flush_failures = 0
+        fetch_failures = 0
+        while True:
+            # Sleep until a message arrives or the next upload or fetch is due
+            due = next_fetch
+            if self.pending:
+                due = min(due, next_flush)
+            if self.url is None:
+                due = None
+            wait = None if due is None else max(0.0, due - time.monotonic())
+            try:
+                message = self.inbox.get(timeout=wait)
+            except queue.Empty:
+                message = None
+
+            if message is _STOP:
+                return
+            if message is not None:
+                kind, entry = message
+                if kind in ("submit", "best"):
+                    self._store(db, entry, kind == "submit")
+                    if kind == "submit" and not flush_failures:
+                        next_flush = max(next_flush, time.monotonic() + self.linger)
+                elif kind == "refresh":
+                    next_fetch = time.monotonic()
+                continue
+
+            now = time.monotonic()
+            if self.pending and now >= next_flush:
+                try:
+                    self._flush(db)
+                except Exception as error:
+                    flush_failures += 1
+                    next_flush = now + self._delay(flush_failures)
+                    self._failed(error, next_flush - now)
+                else:
+                    flush_failures = 0
+                    next_flush = now
+                    # The board changed, so fetch it soon after
+                    next_fetch = min(next_fetch, now + self.linger)
+                    self.status = "online"
+            if now >= next_fetch:
+                try:
+                    self._fetch(db)
+                except Exception as error:
+                    fetch_failures += 1
+                    next_fetch = now + self._delay(fetch_failures)
+                    self._failed(error, next_fetch - now)
+                else:
+                    fetch_failures = 0
+                    next_fetch = now + self.refresh_interval
+                    if not flush_failures:
+                        self.status = "online"
+
+    def _delay(self, failures):
+        base, cap = self.backoff
+        return min(cap, base * 2 ** (failures - 1)) * self.rng.uniform(0.5, 1.0)
+
+    def _failed(self, error, retry_in):
+        self.last_error = str(error)
+        self.status = f"retrying in {retry_in:.0f} s"
+
+    def _store(self, db, entry, upload):
+        # Committed before any upload is tried, so a crash cannot lose the score
+        with db:
+            if upload:
+                db.execute("INSERT OR IGNORE INTO pending (id, entry) VALUES (?, ?)",
+                           (entry["id"], json.dumps(entry)))
+            high_score = max(self.high_score, entry["score"])
+            db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('high_score', ?)", (str(high_score),))
+        self.high_score = high_score
+        self.pending = db.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+
+    def _request(self, method, path, body=None):
+        import urllib.request
+
+        data = None if body is None else json.dumps(body).encode()
+        request = urllib.request.Request(self.url + path, data, method=method,
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read() or b"null")
+
+    def _flush(self, db):
+        # One batch per call; the loop comes straight back for the rest
+        rows = db.execute("SELECT id, entry FROM pending ORDER BY rowid LIMIT ?", (self.batch_size,)).fetchall()
+        if not rows:
+            return
+        self._request("POST", "/scores", {"scores": [json.loads(entry) for _, entry in rows]})
+        with db:
+            db.executemany("DELETE FROM pending WHERE id = ?", [(row_id,) for row_id, _ in rows])
+        self.pending = db.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+
+    def _fetch(self, db):
+        reply = self._request("GET", f"/scores?limit={BOARD_SIZE}")
+        board = {"time": time.time(), "scores": [{"name": str(row["name"]), "score": int(row["score"])}
+                                                 for row in reply["scores"]]}
+        with db:
+            db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('board', ?)", (json.dumps(board),))
+        self.board = tuple((row["name"], row["score"]) for row in board["scores"])
+        self.board_time = board["time"]
+
+
+def make_server(port=8765, host="127.0.0.1", delay=0.0, fail_rate=0.0, data=None):
+    """Stand-in leaderboard server for local testing.
+
+    ``delay`` seconds are added to every reply and ``fail_rate`` of the
+    requests answer 503, to exercise the client's retries. Scores are kept
+    in memory, and in the ``data`` JSON file when one is given.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import urlparse, parse_qs
+
+    scores = {}
+    if data and os.path.exists(data):
+        with open(data) as f:
+            scores = {entry["id"]: entry for entry in json.load(f)}
+    lock = threading.Lock()
+    rng = random.Random()
+
+    class Handler(BaseHTTPRequestHandler):
+        def reply(self, status, body):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def unavailable(self):
+            time.sleep(delay)
+            if rng.random() < fail_rate:
+                self.reply(503, {"error": "unavailable"})
+                return True
+            return False
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/scores":
+                self.reply(404, {"error": "not found"})
+                return
+            if self.unavailable():
+                return
+            limit = int(parse_qs(url.query).get("limit", [BOARD_SIZE])[0])
+            with lock:
+                best = sorted(scores.values(), key=lambda entry: entry["score"], reverse=True)[:limit]
+            self.reply(200, {"scores": [{"name": entry["name"], "score": entry["score"]} for entry in best]})
+
+        def do_POST(self):
+            if self.path != "/scores":
+                self.reply(404, {"error": "not found"})
+                return
+            if self.unavailable():
+                return
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            with lock:
+                accepted = 0
+                for entry in body["scores"]:
+                    if entry["id"] not in scores:
+                        scores[entry["id"]] = entry
+                        accepted += 1
+                if data and accepted:
+                    with open(data, "w") as f:
+                        json.dump(list(scores.values()), f)
+            self.reply(200, {"accepted": accepted})
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cyber Drift leaderboard tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="run a local stand-in leaderboard server")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--delay", type=float, default=0.0, help="seconds added to every reply")
+    serve.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    serve.add_argument("--data", default=None, help="keep scores in this JSON file")
+
+    status = commands.add_parser("status", help="show the local high score, queue and cached board")
+    status.add_argument("--db", default=DB_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        server = make_server(args.port, args.host, args.delay, args.fail_rate, args.data)
+        print(f"leaderboard stand-in on http://{args.host}:{args.port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    else:
+        client = LeaderboardClient(path=args.db).start()
+        client.ready.wait()
+        client.close()
+        print(f"high score {client.high_score}, {client.pending} scores waiting to upload")
+        if client.board_time is not None:
+            print(f"board from {time.strftime('%Y-%m-%d %H:%M', time.localtime(client.board_time))}:")
+            for rank, (name, score) in enumerate(client.board, 1):
+                print(f"{rank:3d}. {name:16s} {score}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,41 @@
 import pygame
 import math
 from pygame.locals import *
+from .atlas import atlas_registry
+from .controls import IDLE
+
+
+# Body and cockpit colors, one pair per split-screen seat
+PLAYER_COLORS = [
+    ((0, 195, 255), (57, 255, 20)),
+    ((255, 0, 153), (255, 230, 0)),
+    ((57, 255, 20), (0, 195, 255)),
+    ((255, 230, 0), (255, 0, 153)),
+]
+
+
+def build_player_image(style=0):
+    # Placeholder rectangle for the player car
+    body, cockpit = PLAYER_COLORS[style]
+    image = pygame.Surface((40, 70), pygame.SRCALPHA)
+    pygame.draw.polygon(image, body, [(20, 0), (40, 50), (30, 70), (10, 70), (0, 50)])
+    pygame.draw.rect(image, cockpit, (10, 15, 20, 40))
+    return image
+
 
 class Player(pygame.sprite.Sprite):
-    def __init__(self, x, y):
+    def __init__(self, x, y, style=0):
         super().__init__()
-        # Placeholder rectangle for the player car
-        self.original_image = pygame.Surface((40, 70), pygame.SRCALPHA)
-        pygame.draw.polygon(self.original_image, (0, 195, 255), [(20, 0), (40, 50), (30, 70), (10, 70), (0, 50)])
-        pygame.draw.rect(self.original_image, (57, 255, 20), (10, 15, 20, 40))
+        # Rotated frames are shared between every player of the same style
+        self.atlas = atlas_registry.get("player" if style == 0 else ("player", style), build_player_image, style)
+        self.original_image = self.atlas.frames[0]
         
         self.image = self.original_image
         self.rect = self.image.get_rect(center=(x, y))
         
         # Movement attributes
         self.position = pygame.math.Vector2(x, y)
+        self.prev_position = pygame.math.Vector2(x, y)
         self.velocity = pygame.math.Vector2(0, 0)
         self.acceleration = 0.2
         self.max_speed = 10
@@ -28,21 +49,21 @@ class Player(pygame.sprite.Sprite):
         self.boost = 0
         self.score = 0
     
-    def update(self, road_width, road_height):
-        # Get pressed keys
-        keys = pygame.key.get_pressed()
+    def update(self, road_width, road_height, controls=IDLE, road_left=None):
+        # `controls` is this tick's InputState; devices are read by the input layer in controls.py
+        self.prev_position.update(self.position)
         
         # Acceleration
-        if keys[K_UP] or keys[K_w]:
+        if controls.up:
             self.velocity += pygame.math.Vector2(0, -self.acceleration).rotate(-self.angle)
-        if keys[K_DOWN] or keys[K_s]:
+        if controls.down:
             self.velocity += pygame.math.Vector2(0, self.acceleration).rotate(-self.angle)
             
         # Steering
-        if keys[K_LEFT] or keys[K_a]:
+        if controls.left:
             if self.velocity.length() > 0.5:
                 self.angle += self.steering
-        if keys[K_RIGHT] or keys[K_d]:
+        if controls.right:
             if self.velocity.length() > 0.5:
                 self.angle -= self.steering
                 
@@ -59,8 +80,9 @@ class Player(pygame.sprite.Sprite):
         # Update position
         self.position += self.velocity
         
-        # Keep player on the road
-        road_left = (800 - road_width) // 2
+        # Keep player on the road, centered on the screen unless told where it starts
+        if road_left is None:
+            road_left = (800 - road_width) // 2
         road_right = road_left + road_width
         
         if self.position.x < road_left + 20:
@@ -70,19 +92,26 @@ class Player(pygame.sprite.Sprite):
             self.position.x = road_right - 20
             self.velocity.x = 0
             
-        # Update rect and rotate image
-        self.rect.center = self.position
-        self.image = pygame.transform.rotate(self.original_image, self.angle)
-        self.rect = self.image.get_rect(center=self.rect.center)
+        # Update rect and pick the pre-rotated frame
+        self.image = self.atlas.frame(self.angle)
+        self.rect = self.image.get_rect(center=self.position)
+        
+    def interpolate(self, alpha):
+        # Position between the last two ticks; also moves the rect for drawing
+        position = self.prev_position.lerp(self.position, alpha)
+        self.rect.center = position
+        return position
+        
+    def draw_effects(self, screen, alpha=1.0):
+        position = self.interpolate(alpha)
         
-    def draw_effects(self, screen):
         # Draw engine glow
         if self.velocity.length() > 1:
             # Calculate the position behind the car
             angle_rad = math.radians(self.angle)
             exhaust_pos = (
-                self.position.x + math.sin(angle_rad) * 35,
-                self.position.y + math.cos(angle_rad) * 35
+                position.x + math.sin(angle_rad) * 35,
+                position.y + math.cos(angle_rad) * 35
             )
             
             # Draw the glow
@@ -90,6 +119,19 @@ class Player(pygame.sprite.Sprite):
             pygame.draw.circle(screen, (255, 100, 0, 128), exhaust_pos, size)
             pygame.draw.circle(screen, (255, 200, 0, 128), exhaust_pos, size // 2)
             
+    def snapshot(self):
+        # Plain values describing the car, for replays
+        return (self.position.x, self.position.y, self.prev_position.x, self.prev_position.y,
+                self.velocity.x, self.velocity.y, self.angle, self.health, self.shield, self.boost)
+        
+    def restore(self, state):
+        x, y, prev_x, prev_y, vx, vy, self.angle, self.health, self.shield, self.boost = state
+        self.position.update(x, y)
+        self.prev_position.update(prev_x, prev_y)
+        self.velocity.update(vx, vy)
+        self.image = self.atlas.frame(self.angle)
+        self.rect = self.image.get_rect(center=self.position)
+        
     def apply_boost(self):
         if self.boost > 0:
             self.velocity *= 1.5
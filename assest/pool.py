@@ -0,0 +1,69 @@
+import random
+
+
+class SpritePool:
+    """Fixed-capacity free list of sprites that are recycled through ``reset``.
+
+    ``acquire`` hands out a released sprite when one is available and only
+    builds a new one otherwise. If more than ``capacity`` sprites are live
+    at once the extra ones are still created (gameplay never stalls), but
+    they are counted as overflow and dropped when released.
+    """
+
+    def __init__(self, factory, capacity=64):
+        self.factory = factory
+        self.capacity = capacity
+        self.free = []
+        self.live = 0
+
+        # Statistics
+        self.acquired = 0
+        self.created = 0
+        self.reused = 0
+        self.overflow = 0
+        self.high_water = 0
+
+    def prewarm(self, count, *args):
+        # Build sprites up front with throwaway arguments; acquire resets them
+        while len(self.free) < min(count, self.capacity):
+            self.free.append(self.factory(*args))
+            self.created += 1
+
+    def acquire(self, *args):
+        if self.free:
+            sprite = self.free.pop()
+            sprite.reset(*args)
+            self.reused += 1
+        else:
+            if self.live >= self.capacity:
+                self.overflow += 1
+            sprite = self.factory(*args)
+            self.created += 1
+
+        self.acquired += 1
+        self.live += 1
+        if self.live > self.high_water:
+            self.high_water = self.live
+        return sprite
+
+    def release(self, sprite):
+        self.live -= 1
+        if len(self.free) < self.capacity:
+            self.free.append(sprite)
+
+    def stats(self):
+        return {
+            "capacity": self.capacity,
+            "live": self.live,
+            "free": len(self.free),
+            "acquired": self.acquired,
+            "created": self.created,
+            "reused": self.reused,
+            "reuse_rate": self.reused / self.acquired if self.acquired else 0.0,
+            "overflow": self.overflow,
+            "high_water": self.high_water,
+        }
+
+
+# Throwaway generator for prewarming, so warming a pool never shifts a seeded game's RNG
+prewarm_rng = random.Random(0)
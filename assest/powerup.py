@@ -1,75 +1,113 @@
 import pygame
 import random
 import math
+from .glow import glow_cache
+from .atlas import atlas_registry
+from .spatial import SpatialGrid
+from .pool import SpritePool, prewarm_rng
+
+# Color for each power-up type
+POWERUP_COLORS = {
+    "boost": (255, 230, 0),  # Yellow
+    "shield": (0, 195, 255),  # Blue
+    "repair": (57, 255, 20),  # Green
+}
+
+
+def build_powerup_image(powerup_type):
+    color = POWERUP_COLORS[powerup_type]
+    image = pygame.Surface((30, 30), pygame.SRCALPHA)
+    pygame.draw.circle(image, color, (15, 15), 15)
+
+    # Add icon based on type
+    if powerup_type == "boost":
+        pygame.draw.polygon(image, (0, 0, 0), [(10, 5), (20, 15), (10, 25)])
+    elif powerup_type == "shield":
+        pygame.draw.circle(image, (0, 0, 0), (15, 15), 10, 3)
+    elif powerup_type == "repair":
+        pygame.draw.rect(image, (0, 0, 0), (10, 5, 10, 20))
+        pygame.draw.rect(image, (0, 0, 0), (5, 10, 20, 10))
+    return image
+
 
 class PowerUp(pygame.sprite.Sprite):
-    def __init__(self, x, y, powerup_type):
+    def __init__(self, x, y, powerup_type, rng=random):
         super().__init__()
-        self.type = powerup_type
-        
-        # Set color based on type
-        if powerup_type == "boost":
-            self.color = (255, 230, 0)  # Yellow
-        elif powerup_type == "shield":
-            self.color = (0, 195, 255)  # Blue
-        elif powerup_type == "repair":
-            self.color = (57, 255, 20)  # Green
-            
-        # Create image
-        self.original_image = pygame.Surface((30, 30), pygame.SRCALPHA)
-        pygame.draw.circle(self.original_image, self.color, (15, 15), 15)
-        
-        # Add icon based on type
-        if powerup_type == "boost":
-            pygame.draw.polygon(self.original_image, (0, 0, 0), [(10, 5), (20, 15), (10, 25)])
-        elif powerup_type == "shield":
-            pygame.draw.circle(self.original_image, (0, 0, 0), (15, 15), 10, 3)
-        elif powerup_type == "repair":
-            pygame.draw.rect(self.original_image, (0, 0, 0), (10, 5, 10, 20))
-            pygame.draw.rect(self.original_image, (0, 0, 0), (5, 10, 20, 10))
-            
-        self.image = self.original_image
-        self.rect = self.image.get_rect(center=(x, y))
+        self.rect = pygame.Rect(0, 0, 0, 0)
         
         # Movement attributes
         self.position = pygame.math.Vector2(x, y)
+        self.prev_position = pygame.math.Vector2(x, y)
         self.velocity = pygame.math.Vector2(0, 2)  # Move down the screen
+        self.pulse_speed = 0.1
+        
+        self.reset(x, y, powerup_type, rng)
+        
+    def reset(self, x, y, powerup_type, rng=random):
+        # Puts a new or recycled power-up into its freshly spawned state
+        self.type = powerup_type
+        self.color = POWERUP_COLORS[powerup_type]
+        
+        # Rotated frames are shared between every power-up of this type
+        self.atlas = atlas_registry.get(("powerup", powerup_type), build_powerup_image, powerup_type)
+        self.original_image = self.atlas.frames[0]
+        
+        self.image = self.original_image
+        self.rect.size = self.image.get_size()
+        self.rect.center = (x, y)
+        
+        self.position.update(x, y)
+        self.prev_position.update(x, y)
         self.angle = 0
-        self.rotation_speed = random.uniform(-3, 3)
+        self.rotation_speed = rng.uniform(-3, 3)
         
         # Animation
-        self.pulse = random.random() * 10
-        self.pulse_speed = 0.1
+        self.pulse = rng.random() * 10
         
     def update(self):
         # Move down
+        self.prev_position.update(self.position)
         self.position += self.velocity
-        self.rect.center = self.position
-        
-        # Rotate
+
+        # Rotate by picking the pre-rotated frame
         self.angle += self.rotation_speed
-        self.image = pygame.transform.rotate(self.original_image, self.angle)
-        self.rect = self.image.get_rect(center=self.rect.center)
+        self.image = self.atlas.frame(self.angle)
+        self.rect = self.image.get_rect(center=self.position)
         
         # Pulse animation
         self.pulse += self.pulse_speed
         
-    def draw_effects(self, screen):
+    def interpolate(self, alpha):
+        # Position between the last two ticks; also moves the rect for drawing
+        position = self.prev_position.lerp(self.position, alpha)
+        self.rect.center = position
+        return position
+        
+    def draw_effects(self, screen, alpha=1.0):
+        position = self.interpolate(alpha)
+        
         # Draw glow effect
         pulse_value = abs(math.sin(self.pulse)) * 0.5 + 0.5
         glow_size = int(20 + 10 * pulse_value)
-        
-        glow_surface = pygame.Surface((glow_size*2, glow_size*2), pygame.SRCALPHA)
-        glow_color = (*self.color, 100)  # Add alpha
-        pygame.draw.circle(glow_surface, glow_color, (glow_size, glow_size), glow_size)
-        screen.blit(glow_surface, (self.position.x - glow_size, self.position.y - glow_size))
+        glow_cache.blit(screen, position.x, position.y, glow_size, self.color, 100)
 
 
 class PowerUpManager:
-    def __init__(self, road_width):
+    # Row where power-ups appear
+    SPAWN_Y = -50
+
+    def __init__(self, road, rng=random, index=None, pool_size=32, spawn_interval=(300, 600), first_spawn=300):
         self.powerups = pygame.sprite.Group()
-        self.road_width = road_width
-        self.spawn_timer = 300  # Initial delay
+        self.road = road  # Answers geometry(y) for lane positions and type weights
+        self.rng = rng
+        
+        # Broadphase grid, normally shared with the other managers
+        self.index = index or SpatialGrid()
+        
+        # Recycled power-ups
+        self.pool = SpritePool(PowerUp, pool_size)
+        self.spawn_timer = first_spawn  # Initial delay
+        self.spawn_interval = spawn_interval  # 5-10 seconds at 60 FPS by default
         self.types = ["boost", "shield", "repair"]
         
     def update(self):
@@ -77,7 +115,7 @@ class PowerUpManager:
         self.spawn_timer -= 1
         if self.spawn_timer <= 0:
             self.spawn_powerup()
-            self.spawn_timer = random.randint(300, 600)  # 5-10 seconds at 60 FPS
+            self.spawn_timer = self.rng.randint(*self.spawn_interval)
             
         # Update existing powerups
         for powerup in self.powerups:
@@ -85,25 +123,72 @@ class PowerUpManager:
             
             # Remove powerups that have gone off screen
             if powerup.position.y > 700:
-                powerup.kill()
+                self.remove_powerup(powerup)
+            else:
+                self.index.move(powerup)
                 
     def spawn_powerup(self):
-        road_left = (800 - self.road_width) // 2
-        lane = random.randint(0, 2)
-        x = road_left + (lane + 0.5) * (self.road_width / 3)
-        y = -50  # Spawn above the screen
+        geometry = self.road.geometry(self.SPAWN_Y)
+        weights = geometry.powerup_weights
+        if weights is not None and not any(weights):
+            return  # This stretch of road hands out nothing
+        lane = self.rng.randint(0, geometry.lanes - 1)
+        x = geometry.lane_center(lane)
+        y = self.SPAWN_Y  # Spawn above the screen
         
-        powerup_type = random.choice(self.types)
-        powerup = PowerUp(x, y, powerup_type)
+        if weights is None:
+            powerup_type = self.rng.choice(self.types)
+        else:
+            powerup_type = self.rng.choices(self.types, weights)[0]
+        powerup = self.pool.acquire(x, y, powerup_type, self.rng)
+        self.add_powerup(powerup)
+        
+    def add_powerup(self, powerup):
         self.powerups.add(powerup)
+        self.index.insert(powerup, "powerup")
+        
+    def remove_powerup(self, powerup):
+        powerup.kill()
+        self.index.remove(powerup)
+        self.pool.release(powerup)
+        
+    def prewarm(self, count):
+        self.pool.prewarm(count, 0, -200, self.types[0], prewarm_rng)
+        
+    def snapshot(self):
+        # Plain values describing every power-up and the spawner, for replays
+        powerups = tuple(
+            (powerup.position.x, powerup.position.y, powerup.prev_position.x, powerup.prev_position.y,
+             powerup.type, powerup.angle, powerup.rotation_speed, powerup.pulse)
+            for powerup in self.powerups)
+        return (self.spawn_timer, powerups)
+        
+    def restore(self, state):
+        self.spawn_timer, powerups = state
+        for powerup in list(self.powerups):
+            self.remove_powerup(powerup)
+        for x, y, prev_x, prev_y, powerup_type, angle, rotation_speed, pulse in powerups:
+            # Reset from the throwaway generator so the game's generator is untouched
+            powerup = self.pool.acquire(x, y, powerup_type, prewarm_rng)
+            powerup.prev_position.update(prev_x, prev_y)
+            powerup.angle = angle
+            powerup.rotation_speed = rotation_speed
+            powerup.pulse = pulse
+            powerup.image = powerup.atlas.frame(angle)
+            powerup.rect = powerup.image.get_rect(center=powerup.position)
+            self.add_powerup(powerup)
+        
+    def powerups_near(self, x, y, radius):
+        return self.index.query_radius(x, y, radius, "powerup")
         
-    def draw(self, screen):
+    def draw(self, screen, alpha=1.0):
         for powerup in self.powerups:
-            powerup.draw_effects(screen)
+            powerup.draw_effects(screen, alpha)
         self.powerups.draw(screen)
         
     def check_collisions(self, player):
-        collisions = pygame.sprite.spritecollide(player, self.powerups, True)
+        collisions = self.index.query_rect(player.rect, "powerup")
         for powerup in collisions:
             player.collect_powerup(powerup.type)
-        return len(collisions) > 0
+            self.remove_powerup(powerup)
+        return len(collisions)
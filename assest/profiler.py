@@ -0,0 +1,169 @@
+import time
+import numpy as np
+
+# Frame stages in the order game_loop runs them
+STAGES = [
+    "input",
+    "road.update", "player.update", "enemies.update", "powerups.update", "effects.update", "collisions",
+    "road.draw", "player.draw", "enemies.draw", "powerups.draw", "effects.draw",
+    "hud.draw", "flip", "idle",
+]
+
+# Bar colors for the overlay, one per stage
+STAGE_COLORS = {
+    "input": (120, 120, 120),
+    "road.update": (0, 120, 160),
+    "player.update": (0, 195, 255),
+    "enemies.update": (255, 0, 153),
+    "powerups.update": (255, 230, 0),
+    "effects.update": (255, 100, 0),
+    "collisions": (200, 0, 0),
+    "road.draw": (0, 80, 110),
+    "player.draw": (0, 140, 190),
+    "enemies.draw": (170, 0, 100),
+    "powerups.draw": (170, 150, 0),
+    "effects.draw": (170, 70, 0),
+    "hud.draw": (57, 255, 20),
+    "flip": (200, 200, 255),
+    "idle": (40, 40, 40),
+}
+
+
+class FrameProfiler:
+    """Lap timer for the stages of a frame, kept in fixed-size ring buffers.
+
+    Each ``mark(stage)`` charges the time since the previous mark to
+    ``stage``. ``end_frame`` commits the frame into the history. When the
+    profiler is disabled every call returns straight away.
+    """
+
+    def __init__(self, history=240, enabled=False):
+        self.enabled = enabled
+        self.stages = list(STAGES)
+        self.stage_index = {stage: i for i, stage in enumerate(self.stages)}
+        self.history = history
+
+        # Ring buffers, one row per frame
+        self.samples = np.zeros((history, len(self.stages)), dtype=np.float64)
+        self.cursor = 0
+        self.filled = 0
+
+        self._current = np.zeros(len(self.stages), dtype=np.float64)
+        self._last = time.perf_counter()
+
+    def toggle(self):
+        self.set_enabled(not self.enabled)
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        self.samples[:] = 0
+        self.cursor = 0
+        self.filled = 0
+        self._current[:] = 0
+        self._last = time.perf_counter()
+
+    def mark(self, stage):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._current[self.stage_index[stage]] += now - self._last
+        self._last = now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        self.samples[self.cursor] = self._current
+        self.cursor = (self.cursor + 1) % self.history
+        self.filled = min(self.filled + 1, self.history)
+        self._current[:] = 0
+        self._last = time.perf_counter()
+
+    def recent(self):
+        # Frames in chronological order, oldest first, in milliseconds
+        if self.filled < self.history:
+            rows = self.samples[:self.filled]
+        else:
+            rows = np.roll(self.samples, -self.cursor, axis=0)
+        return rows * 1000.0
+
+    def frame_times(self):
+        return self.recent().sum(axis=1)
+
+    def averages(self):
+        rows = self.recent()
+        if len(rows) == 0:
+            return {stage: 0.0 for stage in self.stages}
+        means = rows.mean(axis=0)
+        return {stage: float(means[i]) for i, stage in enumerate(self.stages)}
+
+    def histogram(self, bins=20, max_ms=50.0):
+        counts, edges = np.histogram(np.minimum(self.frame_times(), max_ms), bins=bins, range=(0, max_ms))
+        return counts, edges
+
+    def export(self):
+        # Summary for metrics dumps
+        frame_times = self.frame_times()
+        if len(frame_times) == 0:
+            return {"frames": 0}
+        return {
+            "frames": int(len(frame_times)),
+            "frame_ms": {
+                "mean": float(frame_times.mean()),
+                "p50": float(np.percentile(frame_times, 50)),
+                "p95": float(np.percentile(frame_times, 95)),
+                "p99": float(np.percentile(frame_times, 99)),
+                "max": float(frame_times.max()),
+            },
+            "stages_ms": self.averages(),
+        }
+
+
+class LatencyTracker:
+    """Input-to-display delays in a fixed-size ring buffer, in seconds.
+
+    ``record`` takes the time a frame was presented and the timestamps of
+    the input events it was the first to show. Unlike the profiler it is
+    always on; a sample is one subtraction and one array store.
+    """
+
+    def __init__(self, history=1024):
+        self.history = history
+        self.samples = np.zeros(history, dtype=np.float64)
+        self.cursor = 0
+        self.filled = 0
+        self.total = 0
+
+    def reset(self):
+        self.cursor = 0
+        self.filled = 0
+        self.total = 0
+
+    def record(self, presented, timestamps):
+        for timestamp in timestamps:
+            self.samples[self.cursor] = presented - timestamp
+            self.cursor = (self.cursor + 1) % self.history
+            self.filled = min(self.filled + 1, self.history)
+            self.total += 1
+
+    def recent(self):
+        # Milliseconds, in no particular order
+        return self.samples[:self.filled] * 1000.0
+
+    def percentiles(self, points=(50, 95, 99)):
+        values = self.recent()
+        if len(values) == 0:
+            return None
+        return {f"p{point}": float(np.percentile(values, point)) for point in points}
+
+    def export(self):
+        # Summary for metrics dumps
+        values = self.recent()
+        if len(values) == 0:
+            return {"events": self.total}
+        summary = {"events": self.total, "mean": float(values.mean())}
+        summary.update(self.percentiles())
+        summary["max"] = float(values.max())
+        return summary
@@ -0,0 +1,175 @@
+"""Adaptive quality: trades cosmetic detail for frame time.
+
+``QualityGovernor`` watches how long recent frames took to build and steps
+through ``QUALITY_LEVELS``, which set the particle budgets in
+``EffectManager``, the road's decoration halos and the glow sprite
+quantization. Only cosmetic budgets change, and effects draw the same random
+numbers at every level, so runs, replays and rewinds do not depend on it.
+"""
+import time
+from collections import deque
+
+import numpy as np
+
+from .effect import PARTICLE_CAP
+from .glow import glow_cache
+
+
+class QualityLevel:
+    """Cosmetic budgets for one step of the quality ladder."""
+
+    __slots__ = ("name", "max_particles", "explosion_scale", "boost_rate", "decoration_glow",
+                 "glow_radius_step", "glow_alpha_step")
+
+    def __init__(self, name, max_particles, explosion_scale, boost_rate, decoration_glow,
+                 glow_radius_step, glow_alpha_step):
+        self.name = name
+        self.max_particles = min(max_particles, PARTICLE_CAP)
+        self.explosion_scale = explosion_scale
+        self.boost_rate = boost_rate
+        self.decoration_glow = decoration_glow
+        self.glow_radius_step = glow_radius_step
+        self.glow_alpha_step = glow_alpha_step
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+# Best first; "high" is what the game draws without a governor
+QUALITY_LEVELS = [
+    QualityLevel("high", PARTICLE_CAP, 1.0, 1.0, True, 1, 8),
+    QualityLevel("medium", 4096, 0.6, 0.5, True, 2, 16),
+    QualityLevel("low", 1024, 0.35, 0.5, False, 3, 32),
+    QualityLevel("minimal", 256, 0.2, 0.25, False, 4, 64),
+]
+
+LEVEL_NAMES = [level.name for level in QUALITY_LEVELS]
+
+
+class QualityGovernor:
+    """Drops quality when frames run over budget and raises it again when there is headroom.
+
+    ``record`` takes the time spent building each frame, not counting the
+    wait for the frame cap. Every ``window`` frames the 90th percentile is
+    compared with ``budget_ms``: above ``high_water`` of it quality drops a
+    level at once, and below ``low_water`` for ``raise_after`` windows in a
+    row it climbs one. The gap between the marks and the slower climb keep
+    it from flapping; a level that has to be left again soon after being
+    reached waits twice as long to be tried next time.
+
+    Every change is kept in ``changes`` and written to ``log`` if given.
+    With ``locked`` set the level stays where ``set_level`` puts it.
+    """
+
+    def __init__(self, budget_ms=1000.0 / 60, levels=QUALITY_LEVELS, level=None, locked=False,
+                 window=30, high_water=0.85, low_water=0.5, raise_after=4, log=None, history=256):
+        self.budget_ms = budget_ms
+        self.levels = list(levels)
+        self.locked = locked
+        self.window = window
+        self.high_water = high_water
+        self.low_water = low_water
+        self.raise_after = raise_after
+        self.log = log
+
+        self.samples = np.zeros(window, dtype=np.float64)
+        self.filled = 0
+        self.frames = 0
+        self.calm = 0
+        self.raised_at = None
+
+        # Calm windows needed before climbing back to each level
+        self.waits = [raise_after] * len(self.levels)
+
+        self.changes = deque(maxlen=history)
+        self.total_changes = 0
+        self.started = time.perf_counter()
+
+        self.index = 0
+        self.sim = None
+        if level is not None:
+            self.index = self.level_index(level)
+        self.apply()
+
+    @property
+    def level(self):
+        return self.levels[self.index]
+
+    def level_index(self, name):
+        for i, level in enumerate(self.levels):
+            if level.name == name:
+                return i
+        raise ValueError(f"unknown quality level {name!r}")
+
+    def attach(self, sim):
+        # Budgets apply to this simulation's effects and road from now on
+        self.sim = sim
+        self.apply()
+
+    def set_level(self, name, reason="set"):
+        index = self.level_index(name)
+        if index != self.index:
+            self._change(index, reason, None)
+
+    def record(self, seconds):
+        self.samples[self.filled] = seconds * 1000.0
+        self.filled += 1
+        self.frames += 1
+        if self.filled == self.window:
+            self.filled = 0
+            if not self.locked:
+                self._evaluate(float(np.percentile(self.samples, 90)))
+
+    def _evaluate(self, p90):
+        if p90 > self.budget_ms * self.high_water:
+            self.calm = 0
+            if self.index + 1 < len(self.levels):
+                if self.raised_at is not None and self.frames - self.raised_at <= self.window * self.raise_after:
+                    # Just climbed here and could not hold it
+                    self.waits[self.index] = min(self.waits[self.index] * 2, self.raise_after * 16)
+                self.raised_at = None
+                self._change(self.index + 1, "over budget", p90)
+        elif p90 < self.budget_ms * self.low_water:
+            self.calm += 1
+            if self.index > 0 and self.calm >= self.waits[self.index - 1]:
+                self._change(self.index - 1, "headroom", p90)
+                self.raised_at = self.frames
+        else:
+            self.calm = 0
+
+    def _change(self, index, reason, p90):
+        old = self.level
+        self.index = index
+        self.calm = 0
+        change = {
+            "frame": self.frames,
+            "seconds": round(time.perf_counter() - self.started, 3),
+            "from": old.name,
+            "to": self.level.name,
+            "reason": reason,
+            "p90_ms": None if p90 is None else round(p90, 2),
+        }
+        self.changes.append(change)
+        self.total_changes += 1
+        if self.log is not None:
+            measured = "" if p90 is None else f", p90 {p90:.1f} of {self.budget_ms:.1f} ms"
+            print(f"quality {old.name} -> {self.level.name} ({reason}{measured})", file=self.log)
+        self.apply()
+
+    def apply(self):
+        level = self.level
+        if (glow_cache.radius_step, glow_cache.alpha_step) != (level.glow_radius_step, level.glow_alpha_step):
+            glow_cache.configure(radius_step=level.glow_radius_step, alpha_step=level.glow_alpha_step)
+        if self.sim is not None:
+            self.sim.effect_manager.configure(level.max_particles, level.explosion_scale, level.boost_rate)
+            self.sim.road.decoration_glow = level.decoration_glow
+
+    def export(self):
+        # Summary for metrics dumps
+        return {
+            "level": self.level.name,
+            "locked": self.locked,
+            "frames": self.frames,
+            "changes": self.total_changes,
+            "log": list(self.changes),
+        }
@@ -0,0 +1,57 @@
+import pygame
+
+
+class DirtyRenderer:
+    """Pushes only the changed parts of the screen to the display.
+
+    Layers report two kinds of rectangles each frame:
+
+    * ``mark`` for areas that changed this frame (the scrolling road band,
+      a HUD field whose value changed).
+    * ``mark_transient`` for things that move freely, such as particles.
+      These are also refreshed on the following frame so that the pixels
+      they leave behind get cleared.
+
+    ``present`` then calls ``display.update`` with those rectangles. When
+    disabled, or after ``mark_all``, it falls back to a full ``flip``.
+    """
+
+    def __init__(self, size=(800, 600), enabled=True):
+        self.enabled = enabled
+        self.screen_rect = pygame.Rect((0, 0), size)
+        self.rects = []
+        self.transient = []
+        self.last_transient = []
+        self.full = True
+
+        # Stats for the last presented frame
+        self.last_rect_count = 0
+        self.last_pixel_count = 0
+
+    def mark(self, rect):
+        self.rects.append(pygame.Rect(rect))
+
+    def mark_transient(self, rect):
+        self.transient.append(pygame.Rect(rect))
+
+    def mark_all(self):
+        self.full = True
+
+    def present(self):
+        if not self.enabled or self.full:
+            pygame.display.flip()
+            self.last_rect_count = 1
+            self.last_pixel_count = self.screen_rect.width * self.screen_rect.height
+        else:
+            screen_rect = self.screen_rect
+            rects = [rect.clip(screen_rect) for rect in self.rects + self.transient + self.last_transient]
+            rects = [rect for rect in rects if rect.width and rect.height]
+            if rects:
+                pygame.display.update(rects)
+            self.last_rect_count = len(rects)
+            self.last_pixel_count = sum(rect.width * rect.height for rect in rects)
+
+        self.last_transient = self.transient
+        self.transient = []
+        self.rects = []
+        self.full = False
@@ -0,0 +1,452 @@
+"""Compact binary replays: the seed, the per-tick input and periodic keyframes.
+
+A replay file is a short header followed by a stream of records, so a
+recorder can append to it as the game runs and a file cut short by a crash
+still plays back up to its last complete record:
+
+* ``RUN``: an input state (one bit per key) and the number of consecutive
+  ticks it was held. Inputs rarely change, so a minute of driving is a few
+  hundred bytes.
+* ``KEYFRAME``: a ``Simulation.snapshot()`` taken before the given tick.
+  Seeking restores the nearest earlier keyframe and re-simulates headless
+  from there. A keyframe earlier than the input recorded so far marks a
+  rewind and replaces everything after it.
+* ``END``: the final tick count and score, used to verify playback.
+
+Integers are LEB128 varints (zigzag for signed values). A run on a track
+file stores the track's path in the header; the file itself is not copied.
+An endless track is generated again from the seed.
+
+Record a bot game and check it plays back exactly::
+
+    python -m assest.replay record bot.cdr --seed 1
+    python -m assest.replay verify bot.cdr
+"""
+import argparse
+import bisect
+import random
+import struct
+import time
+
+from .controls import InputState, IDLE, RandomInput
+from .engine import Simulation, TICK_RATE
+
+MAGIC = b"CDRP"
+VERSION = 2
+
+# Header flags
+BATCHED_AI = 1
+ON_TRACK = 2
+ENDLESS = 4
+
+# Ticks between keyframes
+KEYFRAME_INTERVAL = TICK_RATE * 20
+
+# Record types
+RUN = 1
+KEYFRAME = 2
+END = 3
+
+# Value tags inside keyframes
+_NONE, _FALSE, _TRUE, _INT, _FLOAT, _STR, _TUPLE, _INTS = range(8)
+
+# Every possible input state, indexed by its bits
+_STATES = [InputState.from_bits(bits) for bits in range(1 << len(InputState.__slots__))]
+
+_double = struct.Struct("<d")
+
+
+def write_varint(out, value):
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value):
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+def encode_value(out, value):
+    # Tagged encoding of the nested tuples produced by Simulation.snapshot
+    if value is None:
+        out.append(_NONE)
+    elif value is True or value is False:
+        out.append(_TRUE if value else _FALSE)
+    elif isinstance(value, (tuple, list)):
+        if value and all(type(item) is int for item in value):
+            # Generator states are long runs of integers, so skip the per-item tags
+            out.append(_INTS)
+            write_varint(out, len(value))
+            for item in value:
+                write_varint(out, zigzag(item))
+        else:
+            out.append(_TUPLE)
+            write_varint(out, len(value))
+            for item in value:
+                encode_value(out, item)
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        out.append(_STR)
+        write_varint(out, len(data))
+        out += data
+    elif isinstance(value, float):
+        out.append(_FLOAT)
+        out += _double.pack(value)
+    elif hasattr(value, "__index__"):
+        out.append(_INT)
+        write_varint(out, zigzag(int(value)))
+    else:
+        out.append(_FLOAT)
+        out += _double.pack(float(value))
+
+
+def decode_value(data, pos):
+    tag = data[pos]
+    pos += 1
+    if tag == _NONE:
+        return None, pos
+    if tag == _FALSE:
+        return False, pos
+    if tag == _TRUE:
+        return True, pos
+    if tag == _INT:
+        value, pos = read_varint(data, pos)
+        return unzigzag(value), pos
+    if tag == _FLOAT:
+        return _double.unpack_from(data, pos)[0], pos + 8
+    if tag == _STR:
+        length, pos = read_varint(data, pos)
+        return bytes(data[pos:pos + length]).decode("utf-8"), pos + length
+    if tag in (_TUPLE, _INTS):
+        count, pos = read_varint(data, pos)
+        items = []
+        for _ in range(count):
+            if tag == _INTS:
+                value, pos = read_varint(data, pos)
+                value = unzigzag(value)
+            else:
+                value, pos = decode_value(data, pos)
+            items.append(value)
+        return tuple(items), pos
+    raise ValueError(f"unknown value tag {tag}")
+
+
+class ReplayWriter:
+    """Streams one run to a binary file object as it is played.
+
+    Call ``record`` with the input for every tick before stepping the
+    simulation, and ``close`` once the run is over.
+    """
+
+    def __init__(self, stream, seed, keyframe_interval=KEYFRAME_INTERVAL, batched_ai=False, track=None):
+        self.stream = stream
+        self.keyframe_interval = keyframe_interval
+        self.run_bits = None
+        self.run_length = 0
+        self.ticks = 0
+        self.bytes_written = 0
+
+        header = bytearray(MAGIC)
+        write_varint(header, VERSION)
+        write_varint(header, seed)
+        write_varint(header, keyframe_interval)
+        flags = BATCHED_AI if batched_ai else 0
+        if track == "endless":
+            flags |= ENDLESS
+        elif track:
+            flags |= ON_TRACK
+        write_varint(header, flags)
+        if flags & ON_TRACK:
+            path = track.encode("utf-8")
+            write_varint(header, len(path))
+            header += path
+        self._write(header)
+
+    def _write(self, data):
+        self.stream.write(data)
+        self.bytes_written += len(data)
+
+    def _flush_run(self):
+        if self.run_length:
+            record = bytearray((RUN,))
+            write_varint(record, self.run_bits)
+            write_varint(record, self.run_length)
+            self._write(record)
+            self.run_length = 0
+
+    def _write_keyframe(self, sim):
+        self._flush_run()
+        payload = bytearray()
+        encode_value(payload, sim.snapshot())
+        record = bytearray((KEYFRAME,))
+        write_varint(record, sim.tick)
+        write_varint(record, len(payload))
+        self._write(record + payload)
+        self.stream.flush()
+
+    def rewind(self, sim):
+        # The simulation was stepped back: a keyframe before the end of the
+        # recorded input discards everything after it on playback
+        self._write_keyframe(sim)
+        self.run_bits = None
+        self.ticks = sim.tick
+
+    def record(self, sim, controls):
+        tick = sim.tick
+        if tick and tick % self.keyframe_interval == 0:
+            self._write_keyframe(sim)
+
+        # Runs of identical input collapse into one record
+        bits = controls.to_bits()
+        if bits != self.run_bits:
+            self._flush_run()
+            self.run_bits = bits
+        self.run_length += 1
+        self.ticks += 1
+
+    def close(self, sim=None):
+        self._flush_run()
+        if sim is not None:
+            record = bytearray((END,))
+            write_varint(record, sim.tick)
+            write_varint(record, zigzag(sim.score))
+            self._write(record)
+        self.stream.flush()
+
+
+class Replay:
+    """A parsed replay: input runs, keyframe offsets and the recorded result.
+
+    Keyframes are only decoded when a seek needs them.
+    """
+
+    def __init__(self, data):
+        self.data = data = memoryview(data)
+        if bytes(data[:4]) != MAGIC:
+            raise ValueError("not a Cyber Drift replay")
+        pos = 4
+        version, pos = read_varint(data, pos)
+        if version != VERSION:
+            raise ValueError(f"unsupported replay version {version}")
+        self.seed, pos = read_varint(data, pos)
+        self.keyframe_interval, pos = read_varint(data, pos)
+        flags, pos = read_varint(data, pos)
+        self.batched_ai = bool(flags & BATCHED_AI)
+        self.track = None
+        if flags & ON_TRACK:
+            size, pos = read_varint(data, pos)
+            self.track = bytes(data[pos:pos + size]).decode("utf-8")
+            pos += size
+        elif flags & ENDLESS:
+            self.track = "endless"
+
+        self.run_starts = []
+        self.run_bits = []
+        self.keyframe_ticks = []
+        self.keyframe_offsets = []
+        self.length = 0
+        self.result = None
+        self.truncated = False
+
+        try:
+            while pos < len(data):
+                kind = data[pos]
+                if kind == RUN:
+                    bits, next_pos = read_varint(data, pos + 1)
+                    count, next_pos = read_varint(data, next_pos)
+                    self.run_starts.append(self.length)
+                    self.run_bits.append(bits)
+                    self.length += count
+                elif kind == KEYFRAME:
+                    tick, next_pos = read_varint(data, pos + 1)
+                    size, next_pos = read_varint(data, next_pos)
+                    if next_pos + size > len(data):
+                        raise IndexError
+                    if tick < self.length:
+                        self._truncate(tick)
+                    self.keyframe_ticks.append(tick)
+                    self.keyframe_offsets.append(next_pos)
+                    next_pos += size
+                elif kind == END:
+                    ticks, next_pos = read_varint(data, pos + 1)
+                    score, next_pos = read_varint(data, next_pos)
+                    self.result = (ticks, unzigzag(score))
+                else:
+                    raise ValueError(f"unknown record type {kind}")
+                pos = next_pos
+        except IndexError:
+            # The recorder stopped mid-record; keep everything before it
+            self.truncated = True
+
+    def _truncate(self, tick):
+        # Forget the input and keyframes from `tick` on, after a rewind
+        index = bisect.bisect_left(self.run_starts, tick)
+        del self.run_starts[index:]
+        del self.run_bits[index:]
+        index = bisect.bisect_left(self.keyframe_ticks, tick)
+        del self.keyframe_ticks[index:]
+        del self.keyframe_offsets[index:]
+        self.length = tick
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    def input_at(self, tick):
+        index = bisect.bisect_right(self.run_starts, tick) - 1
+        if index < 0 or tick >= self.length:
+            return IDLE
+        return _STATES[self.run_bits[index]]
+
+    def keyframe_before(self, tick):
+        # (tick, state) of the last keyframe at or before `tick`, or None
+        index = bisect.bisect_right(self.keyframe_ticks, tick) - 1
+        if index < 0:
+            return None
+        return self.keyframe_ticks[index], decode_value(self.data, self.keyframe_offsets[index])[0]
+
+
+class ReplayPlayer:
+    """Drives a simulation from a replay. Also usable as an input source."""
+
+    def __init__(self, replay, profiler=None):
+        self.replay = replay
+        track = replay.track
+        if track and track != "endless":
+            from .track import TrackFile
+            track = TrackFile(track)
+        self.sim = Simulation(replay.seed, profiler, replay.batched_ai, track=track)
+        self.initial = self.sim.snapshot()
+
+    @property
+    def finished(self):
+        return self.sim.game_over or self.sim.tick >= self.replay.length
+
+    def get_state(self, sim=None):
+        return self.replay.input_at(self.sim.tick)
+
+    def step(self):
+        self.sim.step(self.get_state())
+
+    def seek(self, tick):
+        # Restore the nearest keyframe unless stepping on from here is shorter
+        tick = max(0, min(tick, self.replay.length))
+        sim = self.sim
+        keyframe = self.replay.keyframe_before(tick)
+        start = keyframe[0] if keyframe else 0
+        if not start <= sim.tick <= tick:
+            sim.restore(keyframe[1] if keyframe else self.initial)
+        while sim.tick < tick and not sim.game_over:
+            self.step()
+        return sim.tick
+
+
+def record_headless(path, seed, max_ticks=TICK_RATE * 60, keyframe_interval=KEYFRAME_INTERVAL, batched_ai=False,
+                    track=None):
+    """Record a game driven by the random bot; returns the finished simulation."""
+    track_file = track
+    if track and track != "endless":
+        from .track import TrackFile
+        track_file = TrackFile(track)
+    sim = Simulation(seed, batched_ai=batched_ai, track=track_file)
+    bot = RandomInput(random.Random(sim.seed + 1))
+    with open(path, "wb") as f:
+        writer = ReplayWriter(f, sim.seed, keyframe_interval, batched_ai, track)
+        while not sim.game_over and sim.tick < max_ticks:
+            controls = bot.get_state(sim)
+            writer.record(sim, controls)
+            sim.step(controls)
+        writer.close(sim)
+    return sim
+
+
+def verify(replay):
+    """Play a replay from the start, checking every keyframe and the result.
+
+    Returns a list of mismatch descriptions; empty means exact playback.
+    """
+    player = ReplayPlayer(replay)
+    problems = []
+    for tick in replay.keyframe_ticks:
+        player.seek(tick)
+        if player.sim.snapshot() != replay.keyframe_before(tick)[1]:
+            problems.append(f"keyframe at tick {tick} differs")
+    while not player.finished:
+        player.step()
+    if replay.result is not None:
+        result = (player.sim.tick, player.sim.score)
+        if result != replay.result:
+            problems.append(f"result {result} differs from recorded {replay.result}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record, inspect and verify Cyber Drift replays")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="record a bot game headless")
+    record.add_argument("path")
+    record.add_argument("--seed", type=int, default=None)
+    record.add_argument("--ticks", type=int, default=TICK_RATE * 60 * 5)
+    record.add_argument("--keyframe-interval", type=int, default=KEYFRAME_INTERVAL)
+    record.add_argument("--batched-ai", action="store_true")
+    record.add_argument("--track", default=None,
+                        help="drive a track file, or 'endless' for a generated one, instead of the straight road")
+
+    info = commands.add_parser("info", help="describe a replay file")
+    info.add_argument("path")
+
+    check = commands.add_parser("verify", help="play a replay back and check it matches the recording")
+    check.add_argument("path")
+
+    seek = commands.add_parser("seek", help="time seeking to a tick")
+    seek.add_argument("path")
+    seek.add_argument("tick", type=int)
+
+    args = parser.parse_args(argv)
+    if args.command == "record":
+        sim = record_headless(args.path, args.seed, args.ticks, args.keyframe_interval, args.batched_ai, args.track)
+        print(f"recorded seed={sim.seed} ticks={sim.tick} score={sim.score} to {args.path}")
+        return
+
+    replay = Replay.load(args.path)
+    if args.command == "info":
+        print(f"seed={replay.seed} ticks={replay.length} runs={len(replay.run_bits)} "
+              f"keyframes={len(replay.keyframe_ticks)} bytes={len(replay.data)} "
+              f"result={replay.result} truncated={replay.truncated}"
+              + (f" track={replay.track}" if replay.track else ""))
+    elif args.command == "verify":
+        problems = verify(replay)
+        for problem in problems:
+            print(problem)
+        print("ok" if not problems else f"{len(problems)} mismatches")
+        if problems:
+            raise SystemExit(1)
+    elif args.command == "seek":
+        player = ReplayPlayer(replay)
+        start = time.perf_counter()
+        tick = player.seek(args.tick)
+        elapsed = time.perf_counter() - start
+        print(f"at tick {tick} score={player.sim.score} after {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""Flat binary world snapshots and a ring buffer of the last few seconds.
+
+``WorldPacker`` writes the same state as ``Simulation.snapshot()`` into a
+fixed-size slot of a preallocated buffer with ``struct.pack_into``, one call
+per entity and no intermediate tuples or dicts. ``RewindBuffer`` keeps one
+slot per tick for the last ``seconds`` of play, can step the simulation
+back in place, and can write every slot it holds to a crash-debug dump.
+"""
+import struct
+import time
+
+import numpy as np
+
+from .engine import TICK_RATE
+from .powerup import POWERUP_COLORS
+
+DUMP_MAGIC = b"CDRW"
+
+# Fixed parts of a slot
+_header = struct.Struct("<qqB6dII")  # tick, score, game over, road, spawners, entity counts
+_player = struct.Struct("<6d4q")  # position, previous position, velocity, angle, health, shield, boost
+_mt = struct.Struct("<625IBd")  # Mersenne Twister words, whether a gauss value is cached, the value
+_pcg = struct.Struct("<4QBI")  # 128-bit state and increment, buffered 32-bit output
+
+# Repeated parts
+_decoration = struct.Struct("<ddB")
+_enemy = struct.Struct("<5dqdqqd")
+_powerup = struct.Struct("<4dBddd")
+
+# Same layout as _enemy, for copying the batched arrays in one go
+_enemy_dtype = np.dtype([
+    ("x", "<f8"), ("y", "<f8"), ("prev_x", "<f8"), ("prev_y", "<f8"), ("vy", "<f8"),
+    ("angle", "<i8"), ("level", "<f8"), ("lane", "<i8"), ("timer", "<i8"), ("aggression", "<f8"),
+])
+
+_POWERUP_TYPES = list(POWERUP_COLORS)
+_SIDES = ["left", "right"]
+_MASK64 = (1 << 64) - 1
+
+
+def _pcg_values(rng):
+    state = rng.bit_generator.state
+    inner = state["state"]
+    return (inner["state"] >> 64, inner["state"] & _MASK64, inner["inc"] >> 64, inner["inc"] & _MASK64,
+            state["has_uint32"], state["uinteger"])
+
+
+class WorldPacker:
+    """Fixed layout for packing one simulation's state into a byte slot.
+
+    Slots hold up to ``max_enemies`` enemies and ``max_powerups`` power-ups;
+    ``pack_into`` returns False, writing nothing useful, when the world has
+    more than that.
+    """
+
+    def __init__(self, decorations, max_enemies=64, max_powerups=32):
+        self.decorations = decorations
+        self.max_enemies = max_enemies
+        self.max_powerups = max_powerups
+
+        self.player_offset = _header.size
+        self.mt_offset = self.player_offset + _player.size
+        self.pcg_offset = self.mt_offset + _mt.size
+        self.decoration_offset = self.pcg_offset + 2 * _pcg.size
+        self.enemy_offset = self.decoration_offset + decorations * _decoration.size
+        self.powerup_offset = self.enemy_offset + max_enemies * _enemy.size
+        self.size = self.powerup_offset + max_powerups * _powerup.size
+
+    def pack_into(self, sim, buffer, offset=0):
+        enemies = sim.enemy_manager
+        powerups = sim.powerup_manager
+        enemy_count = len(enemies.enemies)
+        powerup_count = len(powerups.powerups)
+        if enemy_count > self.max_enemies or powerup_count > self.max_powerups:
+            return False
+
+        road = sim.road
+        _header.pack_into(buffer, offset, sim.tick, sim.score, sim.game_over, road.scroll, road.last_speed,
+                          road.distance, enemies.spawn_timer, enemies.difficulty, powerups.spawn_timer,
+                          enemy_count, powerup_count)
+
+        player = sim.player
+        _player.pack_into(buffer, offset + self.player_offset,
+                          player.position.x, player.position.y, player.prev_position.x, player.prev_position.y,
+                          player.velocity.x, player.velocity.y,
+                          player.angle, player.health, player.shield, player.boost)
+
+        _, words, gauss_next = sim.rng.getstate()
+        _mt.pack_into(buffer, offset + self.mt_offset, *words, gauss_next is not None, gauss_next or 0.0)
+        _pcg.pack_into(buffer, offset + self.pcg_offset, *_pcg_values(sim.np_rng))
+        _pcg.pack_into(buffer, offset + self.pcg_offset + _pcg.size, *_pcg_values(enemies.np_rng))
+
+        at = offset + self.decoration_offset
+        for dec in road.decorations:
+            _decoration.pack_into(buffer, at, dec.y, dec.pulse, dec.side == "right")
+            at += _decoration.size
+
+        at = offset + self.enemy_offset
+        if enemies.batched:
+            # Straight array copies; the sprites may be stale
+            n = enemies.count
+            rows = np.frombuffer(buffer, _enemy_dtype, n, at)
+            for name in _enemy_dtype.names:
+                rows[name] = getattr(enemies, name)[:n]
+        else:
+            for enemy in enemies.enemies:
+                _enemy.pack_into(buffer, at, enemy.position.x, enemy.position.y,
+                                 enemy.prev_position.x, enemy.prev_position.y, enemy.velocity.y,
+                                 enemy.angle, enemy.difficulty, enemy.target_lane,
+                                 enemy.lane_change_timer, enemy.aggression)
+                at += _enemy.size
+
+        at = offset + self.powerup_offset
+        for powerup in powerups.powerups:
+            _powerup.pack_into(buffer, at, powerup.position.x, powerup.position.y,
+                               powerup.prev_position.x, powerup.prev_position.y,
+                               _POWERUP_TYPES.index(powerup.type), powerup.angle,
+                               powerup.rotation_speed, powerup.pulse)
+            at += _powerup.size
+        return True
+
+    def tick_at(self, buffer, offset=0):
+        return struct.unpack_from("<q", buffer, offset)[0]
+
+    def unpack(self, buffer, offset=0):
+        """Read a slot back as a ``Simulation.snapshot()`` tuple."""
+        (tick, score, game_over, scroll, last_speed, distance, enemy_timer, difficulty, powerup_timer,
+         enemy_count, powerup_count) = _header.unpack_from(buffer, offset)
+        player = _player.unpack_from(buffer, offset + self.player_offset)
+
+        values = _mt.unpack_from(buffer, offset + self.mt_offset)
+        mt_state = (3, values[:625], values[626] if values[625] else None)
+        pcg_states = []
+        for i in range(2):
+            state_hi, state_lo, inc_hi, inc_lo, has_uint32, uinteger = _pcg.unpack_from(
+                buffer, offset + self.pcg_offset + i * _pcg.size)
+            pcg_states.append((state_hi << 64 | state_lo, inc_hi << 64 | inc_lo, has_uint32, uinteger))
+
+        decorations = tuple(
+            (y, pulse, _SIDES[side])
+            for y, pulse, side in _decoration.iter_unpack(
+                buffer[offset + self.decoration_offset:offset + self.enemy_offset]))
+
+        start = offset + self.enemy_offset
+        enemies = tuple(_enemy.iter_unpack(buffer[start:start + enemy_count * _enemy.size]))
+        start = offset + self.powerup_offset
+        powerups = tuple(
+            (x, y, prev_x, prev_y, _POWERUP_TYPES[kind], angle, rotation_speed, pulse)
+            for x, y, prev_x, prev_y, kind, angle, rotation_speed, pulse
+            in _powerup.iter_unpack(buffer[start:start + powerup_count * _powerup.size]))
+
+        return (
+            tick, score, bool(game_over), mt_state, pcg_states[0],
+            (scroll, last_speed, distance, decorations),
+            player,
+            (enemy_timer, difficulty, pcg_states[1], enemies),
+            (powerup_timer, powerups),
+        )
+
+
+class RewindBuffer:
+    """The last ``seconds`` of a simulation, one packed slot per tick.
+
+    Call ``capture`` after every step. ``rewind`` restores the simulation
+    in place and forgets the ticks it jumped over.
+    """
+
+    def __init__(self, sim, seconds=10, max_enemies=64, max_powerups=32):
+        self.sim = sim
+        self.packer = WorldPacker(len(sim.road.decorations), max_enemies, max_powerups)
+        self.capacity = int(seconds * TICK_RATE)
+        self.buffer = bytearray(self.capacity * self.packer.size)
+        self.start = 0  # Slot of the oldest capture
+        self.count = 0
+
+        # Statistics
+        self.skipped = 0
+        self.last_capture_ms = 0.0
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.start = 0
+        self.count = 0
+
+    def _slot(self, age):
+        # Slot index of the capture `age` steps older than the newest
+        return (self.start + self.count - 1 - age) % self.capacity
+
+    def capture(self):
+        started = time.perf_counter()
+        slot = (self.start + self.count) % self.capacity
+        if not self.packer.pack_into(self.sim, self.buffer, slot * self.packer.size):
+            # Too many entities for a slot; this tick is not kept
+            self.skipped += 1
+            return False
+        if self.count < self.capacity:
+            self.count += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+        self.last_capture_ms = (time.perf_counter() - started) * 1000.0
+        return True
+
+    def seconds_available(self):
+        return self.count / TICK_RATE
+
+    def state(self, age=0):
+        # Snapshot tuple of the capture `age` steps before the newest
+        return self.packer.unpack(self.buffer, self._slot(age) * self.packer.size)
+
+    def rewind(self, seconds):
+        """Step back ``seconds`` (or as far as the buffer reaches).
+
+        Returns the tick restored to, or None if nothing is buffered.
+        """
+        if self.count == 0:
+            return None
+        target = self.sim.tick - int(seconds * TICK_RATE)
+        size = self.packer.size
+        age = 0
+        while age < self.count - 1 and self.packer.tick_at(self.buffer, self._slot(age) * size) > target:
+            age += 1
+        self.sim.restore(self.state(age))
+
+        # The restored capture becomes the newest
+        self.count -= age
+        return self.sim.tick
+
+    def dump(self, path):
+        """Write every buffered slot, oldest first, for offline debugging."""
+        packer = self.packer
+        header = struct.pack("<4sIIIII", DUMP_MAGIC, self.sim.seed & 0xFFFFFFFF, packer.decorations,
+                             packer.max_enemies, packer.max_powerups, self.count)
+        with open(path, "wb") as f:
+            f.write(header)
+            for age in range(self.count - 1, -1, -1):
+                slot = self._slot(age)
+                f.write(self.buffer[slot * packer.size:(slot + 1) * packer.size])
+
+
+def load_dump(path):
+    """Read a crash dump back as (seed, [snapshot tuples, oldest first])."""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, seed, decorations, max_enemies, max_powerups, count = struct.unpack_from("<4sIIIII", data)
+    if magic != DUMP_MAGIC:
+        raise ValueError("not a Cyber Drift rewind dump")
+    packer = WorldPacker(decorations, max_enemies, max_powerups)
+    offset = struct.calcsize("<4sIIIII")
+    return seed, [packer.unpack(data, offset + i * packer.size) for i in range(count)]
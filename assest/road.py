@@ -1,102 +1,483 @@
 import pygame
 import random
 import math
+import time
+from collections import OrderedDict
+import numpy as np
+from .glow import glow_cache
+
+# Colors used when baking the road strip
+DEFAULT_THEME = {
+    "asphalt": (20, 20, 30),
+    "center_line": (255, 255, 0),
+    "lane_divider": (255, 255, 255),
+    "edge": (255, 0, 0),
+}
+
+# Baked road strips shared by every road with the same layout and theme
+strip_cache = {}
+
+# Rows per horizontal band when drawing an unbaked track segment; bands at the same place merge into one blit
+TRACK_BAND = 8
+
+# Baked track segments: rows per band, rows per tile (one tile is baked between deadline checks),
+# and the transparent color
+BAKE_BAND = 2
+BAKE_ROWS = 64
+TRANSPARENT = (255, 0, 255)
+
+
+class LaneGeometry:
+    """Where the road is on one screen row: left edge, width and lanes.
+
+    Also carries the spawn table of the track segment under that row.
+    ``powerup_weights`` is None for an even choice of types.
+    """
+
+    __slots__ = ("left", "width", "lanes", "lane_width", "enemy_rate", "powerup_weights")
+
+    def __init__(self, left, width, lanes=3, enemy_rate=1.0, powerup_weights=None):
+        self.left = left
+        self.width = width
+        self.lanes = lanes
+        self.lane_width = width / lanes
+        self.enemy_rate = enemy_rate
+        self.powerup_weights = powerup_weights
+
+    def lane_center(self, lane):
+        return self.left + (lane + 0.5) * self.lane_width
+
+    def lane_of(self, x):
+        # Lane under x, counting positions off the road as the nearest lane
+        lane = 0
+        for i in range(1, self.lanes):
+            if x > self.left + i * self.lane_width:
+                lane = i
+        return lane
+
+
+class SegmentCache:
+    """Baked track segments, keyed by where the segment starts in the lap.
+
+    A segment is a list of surfaces ``BAKE_ROWS`` rows tall, top tile first.
+    ``retain`` drops every segment the road no longer wants, which is how
+    segments that have scrolled behind go. Beyond that the least recently
+    drawn are evicted whenever the total passes ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes=32 << 20):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # segment start -> (tiles, x, size in bytes)
+        self.bytes = 0
+
+        # Statistics
+        self.baked = 0
+        self.evicted = 0
+        self.placeholders = 0  # Segment draws that fell back to the strips
+
+    def __contains__(self, start):
+        return start in self.entries
+
+    def get(self, start):
+        entry = self.entries.get(start)
+        if entry is not None:
+            self.entries.move_to_end(start)
+        return entry
+
+    def put(self, start, tiles, x):
+        size = sum(tile.get_width() * tile.get_height() * tile.get_bytesize() for tile in tiles)
+        self.entries[start] = (tiles, x, size)
+        self.bytes += size
+        self.baked += 1
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            self._evict(next(iter(self.entries)))
+
+    def retain(self, starts):
+        for start in [start for start in self.entries if start not in starts]:
+            self._evict(start)
+
+    def _evict(self, start):
+        self.bytes -= self.entries.pop(start)[2]
+        self.evicted += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        return {"segments": len(self.entries), "bytes": self.bytes, "baked": self.baked,
+                "evicted": self.evicted, "placeholders": self.placeholders}
+
+
+class Decoration:
+    """A neon light beside the road."""
+
+    __slots__ = ("side", "y", "size", "color", "pulse")
+
+    def __init__(self, side, y, size, color, pulse):
+        self.side = side
+        self.y = y
+        self.size = size
+        self.color = color
+        self.pulse = pulse
+
 
 class Road:
-    def __init__(self, width, height):
+    """A scrolling road ``height`` pixels tall, centered on a ``screen_width`` screen.
+
+    Without a track it is a straight three-lane strip ``width`` pixels
+    wide. With one (any object with ``segment_at(distance)``, such as a
+    ``TrackFile``), every row takes its width, lanes and curve from the
+    segment under it, and ``geometry`` answers per row.
+
+    Track segments are baked into tiles of ``BAKE_ROWS`` rows, one tile at
+    a time and at most ``bake_budget_ms`` per drawn frame, from the bottom of the screen up to
+    ``lookahead`` pixels beyond the top. A segment that is not ready yet is
+    drawn straight from the shared strips, so a frame never waits on a bake.
+    """
+
+    def __init__(self, width, height, rng=random, theme=None, track=None, screen_width=800,
+                 lookahead=None, bake_budget_ms=1.5, segment_cache_bytes=32 << 20):
         self.width = width
         self.height = height
-        self.screen_width = 800
-        self.screen_height = 600
-        
+        self.rng = rng
+        self.screen_width = screen_width
+        self.screen_height = height
+        self.theme = dict(theme or DEFAULT_THEME)
+        self.track = track
+
         # Road position
         self.x = (self.screen_width - self.width) // 2
-        
+        self.straight = LaneGeometry(self.x, self.width)
+
+        # Pixels travelled since the start line, which picks the track segment
+        self.distance = 0.0
+
+        # Baked track segments, and the one being baked as [segment, tiles done so far, x, width]
+        self.lookahead = self.screen_height if lookahead is None else lookahead
+        self.bake_budget_ms = bake_budget_ms
+        self.segment_cache = SegmentCache(segment_cache_bytes)
+        self.baking = None
+
+        # Scroll distance of the last tick, for interpolated drawing
+        self.last_speed = 0
+
         # Road markings
         self.stripe_width = 10
         self.stripe_height = 50
         self.stripe_gap = 30
-        self.stripes = []
-        
-        # Initialize stripes
-        for y in range(-self.stripe_height, self.screen_height + self.stripe_height, self.stripe_height + self.stripe_gap):
-            self.stripes.append(y)
-            
-        # Neon decorations
+        self.stripe_period = self.stripe_height + self.stripe_gap
+        self.scroll = 0.0
+
+        # Tileable strip holding everything except the decorations, baked on first draw
+        self.edge_width = 5
+        self.strip = None
+
+        # Neon decorations; the pulsing halos can be turned off to save fill rate
+        self.decoration_glow = True
         self.decorations = []
         for _ in range(20):
-            side = random.choice(["left", "right"])
-            y = random.randint(0, self.screen_height)
-            size = random.randint(5, 15)
-            color = random.choice([
+            side = rng.choice(["left", "right"])
+            y = rng.randint(0, self.screen_height)
+            size = rng.randint(5, 15)
+            color = rng.choice([
                 (0, 195, 255),  # Neon blue
                 (255, 0, 153),  # Neon pink
                 (57, 255, 20),  # Neon green
                 (255, 230, 0)   # Neon yellow
             ])
-            self.decorations.append({
-                "side": side,
-                "y": y,
-                "size": size,
-                "color": color,
-                "pulse": random.random() * 10
-            })
-            
+            self.decorations.append(Decoration(side, y, size, color, rng.random() * 10))
+
+    def set_width(self, width):
+        if width != self.width:
+            self.width = width
+            self.x = (self.screen_width - self.width) // 2
+            self.straight = LaneGeometry(self.x, self.width)
+            self.strip = None
+
+    def set_theme(self, theme):
+        theme = dict(theme)
+        if theme != self.theme:
+            self.theme = theme
+            self.strip = None
+            self.segment_cache.clear()
+            self.baking = None
+
+    def strip_key(self, width=None, lanes=3):
+        return (width or self.width, lanes, self.screen_width, self.screen_height, tuple(sorted(self.theme.items())))
+
+    def build_strip(self, width=None, lanes=3, like=None):
+        # One screen of road plus one stripe period, so any scroll offset is a single blit.
+        # Made in the pixel format of `like` if given. Only draws into a new surface, so it
+        # is safe off the main thread.
+        width = width or self.width
+        period = self.stripe_period
+        edge = self.edge_width
+        theme = self.theme
+        size = (width + 2 * edge, self.screen_height + period)
+        strip = pygame.Surface(size, 0, like) if like is not None else pygame.Surface(size)
+
+        # Road background
+        strip.fill(theme["asphalt"], (edge, 0, width, strip.get_height()))
+
+        # Lane dividers and the center line
+        center_x = edge + self.screen_width // 2 - (self.screen_width - width) // 2
+        lane_width = width // lanes
+        half = self.stripe_width // 2
+        for y in range(0, strip.get_height(), period):
+            for lane in range(1, lanes):
+                strip.fill(theme["lane_divider"], (edge + lane * lane_width - half, y, self.stripe_width, self.stripe_height))
+            strip.fill(theme["center_line"], (center_x - half, y, self.stripe_width, self.stripe_height))
+
+        # Road edges
+        strip.fill(theme["edge"], (0, 0, edge, strip.get_height()))
+        strip.fill(theme["edge"], (edge + width, 0, edge, strip.get_height()))
+        return strip
+
+    def get_strip(self, width=None, lanes=3):
+        key = self.strip_key(width, lanes)
+        strip = strip_cache.get(key)
+        if strip is None:
+            # Built in the display's format when there is one, which is cheaper than converting
+            strip = self.build_strip(width, lanes, pygame.display.get_surface())
+            strip_cache[key] = strip
+        return strip
+
+    def bake(self):
+        self.strip = self.get_strip()
+
+    def geometry(self, y):
+        """Lane geometry of screen row ``y``."""
+        if self.track is None:
+            return self.straight
+        return self.geometry_at(self.distance + self.screen_height - y)
+
+    def geometry_arrays(self, ys):
+        """(left, lane width, lanes) for each row in ``ys``; plain numbers on a straight road."""
+        if self.track is None:
+            straight = self.straight
+            return straight.left, straight.lane_width, straight.lanes
+        distances = self.distance + self.screen_height - ys
+        length = self.track.length
+        laps = np.maximum(distances, 0.0) if length == math.inf else np.mod(distances, length)
+
+        # Walk the few segments under the rows, which may wrap past the lap line
+        low = float(distances.min())
+        span = float(distances.max()) - low
+        lap = self.lap_distance(low)
+        segments = []
+        while True:
+            segment = self.track.segment_at(lap)
+            segments.append(segment)
+            end = segment.start + segment.length
+            if end - lap > span:
+                break
+            span -= end - lap
+            lap = self.lap_distance(end)
+        segments.sort(key=lambda segment: segment.start)
+
+        # Same sums as geometry_at, one row per enemy
+        table = np.array([(segment.start, segment.length, segment.width, segment.lanes, segment.center, segment.curve)
+                          for segment in segments], dtype=np.float64)
+        index = np.searchsorted(table[:, 0], laps, side="right") - 1
+        start, seg_length, width, lanes, center, curve = table[index].T
+        t = np.minimum(np.maximum((laps - start) / seg_length, 0.0), 1.0)
+        center = center + curve * t * t * (3 - 2 * t)
+        left = (self.screen_width - width) // 2 + np.trunc(center)
+        return left, width / lanes, lanes.astype(np.int64)
+
+    def geometry_at(self, distance):
+        # Rows further up the screen are further along the track
+        segment = self.track.segment_at(distance)
+        left = (self.screen_width - segment.width) // 2 + int(segment.center_at(self.lap_distance(distance)))
+        return LaneGeometry(left, segment.width, segment.lanes, segment.enemy_rate, segment.powerup_weights)
+
+    def lap_distance(self, distance):
+        # Distance into the current lap; an endless track has a single lap
+        length = self.track.length
+        if length == math.inf:
+            return max(distance, 0.0)
+        return distance % length
+
     def update(self, speed):
+        self.last_speed = speed
+        self.distance += speed
+
         # Move stripes down
-        for i in range(len(self.stripes)):
-            self.stripes[i] += speed
-            if self.stripes[i] > self.screen_height:
-                self.stripes[i] = -self.stripe_height
-                
+        self.scroll = (self.scroll + speed) % self.stripe_period
+
         # Move decorations
         for dec in self.decorations:
-            dec["y"] += speed
-            dec["pulse"] += 0.1
-            if dec["y"] > self.screen_height:
-                dec["y"] = -20
-                dec["side"] = random.choice(["left", "right"])
-                
-    def draw(self, screen):
-        # Draw road background
-        pygame.draw.rect(screen, (20, 20, 30), (self.x, 0, self.width, self.screen_height))
-        
-        # Draw center line
-        center_x = self.screen_width // 2
-        for y in self.stripes:
-            pygame.draw.rect(screen, (255, 255, 0), (center_x - self.stripe_width//2, y, self.stripe_width, self.stripe_height))
-            
-        # Draw lane dividers
-        lane_width = self.width // 3
-        left_lane_x = self.x + lane_width
-        right_lane_x = self.x + 2 * lane_width
-        
-        for y in self.stripes:
-            pygame.draw.rect(screen, (255, 255, 255), (left_lane_x - self.stripe_width//2, y, self.stripe_width, self.stripe_height))
-            pygame.draw.rect(screen, (255, 255, 255), (right_lane_x - self.stripe_width//2, y, self.stripe_width, self.stripe_height))
-            
-        # Draw road edges
-        pygame.draw.rect(screen, (255, 0, 0), (self.x - 5, 0, 5, self.screen_height))
-        pygame.draw.rect(screen, (255, 0, 0), (self.x + self.width, 0, 5, self.screen_height))
-        
+            dec.y += speed
+            dec.pulse += 0.1
+            if dec.y > self.screen_height:
+                dec.y = -20
+                dec.side = self.rng.choice(["left", "right"])
+
+    def snapshot(self):
+        # Decoration sizes and colors never change after construction
+        return (self.scroll, self.last_speed, self.distance,
+                tuple((dec.y, dec.pulse, dec.side) for dec in self.decorations))
+
+    def restore(self, state):
+        self.scroll, self.last_speed, self.distance, decorations = state
+        for dec, (y, pulse, side) in zip(self.decorations, decorations):
+            dec.y = y
+            dec.pulse = pulse
+            dec.side = side
+
+    def draw(self, screen, alpha=1.0):
+        # Everything scrolls by the same amount, so interpolate with one offset
+        offset = (alpha - 1.0) * self.last_speed
+
+        # Draw the baked road at the current scroll position
+        if self.track is not None:
+            self.draw_track(screen, self.distance + offset)
+        else:
+            period = self.stripe_period
+            top = period - int((self.scroll + offset) % period)
+            if self.strip is None:
+                self.bake()
+            screen.blit(self.strip, (self.x - self.edge_width, 0), (0, top, self.strip.get_width(), self.screen_height))
+
         # Draw neon decorations
         for dec in self.decorations:
-            pulse = abs(math.sin(dec["pulse"])) * 0.5 + 0.5
-            color = dec["color"]
-            glow_color = (color[0], color[1], color[2], int(128 * pulse))
-            
-            if dec["side"] == "left":
-                x = self.x - 20
+            pulse = abs(math.sin(dec.pulse)) * 0.5 + 0.5
+            color = dec.color
+            y = dec.y + offset
+
+            if self.track is not None:
+                geometry = self.geometry_at(self.distance + offset + self.screen_height - y)
+                left, width = geometry.left, geometry.width
+            else:
+                left, width = self.x, self.width
+            if dec.side == "left":
+                x = left - 20
+            else:
+                x = left + width + 15
+
+            # Draw decoration and its glow from the shared sprite cache
+            glow_cache.blit(screen, x, y, dec.size, color, 255)
+            if self.decoration_glow:
+                glow_cache.blit(screen, x, y, dec.size*2, color, int(128 * pulse))
+
+    def draw_track(self, screen, distance):
+        # Walk the segments from the bottom of the screen up to the lookahead.
+        # Row r of a segment is r + 1 pixels short of its end, and sits at
+        # screen row top + r.
+        height = self.screen_height
+        bottom = int(distance)
+        horizon = bottom + height + self.lookahead
+        cache = self.segment_cache
+        wanted = []
+        d = bottom + 1
+        while d <= horizon:
+            segment = self.track.segment_at(d)
+            end = d - self.lap_distance(d) + segment.start + segment.length
+            top = int(bottom + height + 1 - end)
+            if top < height and top + segment.length > 0:
+                first = max(0, -top)
+                last = min(segment.length, height - top)
+                entry = cache.get(segment.start)
+                if entry is not None:
+                    tiles, x, _ = entry
+                    for index in range(first // BAKE_ROWS, (last - 1) // BAKE_ROWS + 1):
+                        tile_top = index * BAKE_ROWS
+                        row = max(first, tile_top)
+                        rows = min(last, tile_top + BAKE_ROWS) - row
+                        tile = tiles[index]
+                        screen.blit(tile, (x, top + row), (0, row - tile_top, tile.get_width(), rows))
+                else:
+                    cache.placeholders += 1
+                    self.draw_segment_rows(screen, segment, first, last, top, 0, TRACK_BAND)
+            wanted.append(segment)
+            d = end
+
+        # Segments behind the screen are dropped; the time left in the budget bakes the rest
+        cache.retain({segment.start for segment in wanted})
+        self.pump_bakes(wanted)
+
+    def draw_segment_rows(self, target, segment, first, last, y, x, band):
+        # Rows first to last of a segment at target row y + r, shifted left by x, one blit per
+        # band of rows; bands at the same place are blitted together while the strip allows
+        strip = self.get_strip(segment.width, segment.lanes)
+        strip_width = strip.get_width()
+        edge = self.edge_width
+        period = self.stripe_period
+        base = (self.screen_width - segment.width) // 2 - edge - x
+        end = segment.start + segment.length - 1
+        run_start = first
+        run_left = None
+        for r in range(first, last, band):
+            left = base + int(segment.center_at(end - r - band // 2))
+            if left != run_left or r + band - run_start > self.screen_height:
+                if run_left is not None:
+                    # Stripes are fixed to the track, so the strip row follows the distance
+                    target.blit(strip, (run_left, y + run_start),
+                                (0, int(run_start - end) % period, strip_width, r - run_start))
+                run_left = left
+                run_start = r
+        if run_left is not None:
+            target.blit(strip, (run_left, y + run_start),
+                        (0, int(run_start - end) % period, strip_width, last - run_start))
+
+    def segment_span(self, segment):
+        # Leftmost x and width the segment covers, edges included; the curve eases, so its ends are the extremes
+        edge = self.edge_width
+        base = (self.screen_width - segment.width) // 2
+        lefts = (base + int(segment.center_at(segment.start)),
+                 base + int(segment.center_at(segment.start + segment.length)))
+        x = min(lefts) - edge
+        return x, max(lefts) + segment.width + edge - x
+
+    def pump_bakes(self, wanted):
+        # Bake the wanted segments in order, one tile of rows at a time, until the budget runs out.
+        # A segment is only drawn from the cache once every tile is done.
+        deadline = time.perf_counter() + self.bake_budget_ms / 1000.0
+        cache = self.segment_cache
+        first_step = True
+        if self.baking is not None and all(segment.start != self.baking[0].start for segment in wanted):
+            self.baking = None
+        while time.perf_counter() < deadline:
+            if self.baking is None:
+                segment = next((segment for segment in wanted if segment.start not in cache), None)
+                if segment is None:
+                    return
+                x, width = self.segment_span(segment)
+                self.baking = [segment, [], x, width]
+
+            segment, tiles, x, width = self.baking
+            if self.strip_key(segment.width, segment.lanes) not in strip_cache:
+                # A new strip costs about as much as the whole budget, so it gets a frame's budget to itself
+                if not first_step:
+                    return
+                self.get_strip(segment.width, segment.lanes)
+                first_step = False
+                continue
+            first_step = False
+            row = len(tiles) * BAKE_ROWS
+            rows = min(BAKE_ROWS, segment.length - row)
+            # Made in the display's format, since converting surfaces takes milliseconds
+            display = pygame.display.get_surface()
+            if display is not None:
+                tile = pygame.Surface((width, rows), 0, display)
             else:
-                x = self.x + self.width + 15
-                
-            # Draw decoration
-            pygame.draw.circle(screen, color, (x, dec["y"]), dec["size"])
-            
-            # Draw glow (would need a surface with alpha for proper glow)
-            glow_surface = pygame.Surface((dec["size"]*4, dec["size"]*4), pygame.SRCALPHA)
-            pygame.draw.circle(glow_surface, glow_color, (dec["size"]*2, dec["size"]*2), dec["size"]*2)
-            screen.blit(glow_surface, (x - dec["size"]*2, dec["y"] - dec["size"]*2))
-            
+                tile = pygame.Surface((width, rows))
+            tile.fill(TRANSPARENT)
+            self.draw_segment_rows(tile, segment, row, row + rows, -row, x, BAKE_BAND)
+            # Not RLE: encoding happens on the first blit and would cost that frame several milliseconds
+            tile.set_colorkey(TRANSPARENT)
+            tiles.append(tile)
+            if row + rows == segment.length:
+                cache.put(segment.start, tiles, x)
+                self.baking = None
+
+    def get_band_rect(self):
+        # Screen area the road and its decorations can touch
+        if self.track is not None:
+            return pygame.Rect(0, 0, self.screen_width, self.screen_height)
+        margin = 50
+        return pygame.Rect(self.x - margin, 0, self.width + 2 * margin, self.screen_height)
+
     def get_width(self):
         return self.width
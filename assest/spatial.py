@@ -0,0 +1,121 @@
+import pygame
+
+
+class SpatialGrid:
+    """Uniform grid broadphase shared by every entity manager.
+
+    Entities are filed under a layer name ("enemy", "powerup", ...) in every
+    cell their rect overlaps. ``move`` only touches the cell buckets when an
+    entity crosses a cell border, so steady movement is cheap. Buckets are
+    insertion-ordered dicts, so query results come back in a deterministic
+    order for a given sequence of inserts and moves.
+    """
+
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.entries = {}
+
+    def _span(self, rect):
+        size = self.cell_size
+        return (rect.left // size, rect.top // size, (rect.right - 1) // size, (rect.bottom - 1) // size)
+
+    def _add_cells(self, entity, layer, span):
+        x0, y0, x1, y1 = span
+        cells = self.cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((layer, cx, cy))
+                if bucket is None:
+                    bucket = cells[(layer, cx, cy)] = {}
+                bucket[entity] = None
+
+    def _remove_cells(self, entity, layer, span):
+        x0, y0, x1, y1 = span
+        cells = self.cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells[(layer, cx, cy)]
+                del bucket[entity]
+                if not bucket:
+                    del cells[(layer, cx, cy)]
+
+    def insert(self, entity, layer):
+        span = self._span(entity.rect)
+        self.entries[entity] = (layer, span)
+        self._add_cells(entity, layer, span)
+
+    def move(self, entity):
+        # Call after the entity's rect changed
+        layer, span = self.entries[entity]
+        new_span = self._span(entity.rect)
+        if new_span != span:
+            self._remove_cells(entity, layer, span)
+            self._add_cells(entity, layer, new_span)
+            self.entries[entity] = (layer, new_span)
+
+    def remove(self, entity):
+        entry = self.entries.pop(entity, None)
+        if entry is not None:
+            self._remove_cells(entity, *entry)
+
+    def clear(self, layer=None):
+        if layer is None:
+            self.cells.clear()
+            self.entries.clear()
+            return
+        for entity in [e for e, entry in self.entries.items() if entry[0] == layer]:
+            self.remove(entity)
+
+    def __contains__(self, entity):
+        return entity in self.entries
+
+    def count(self, layer):
+        return sum(1 for entry in self.entries.values() if entry[0] == layer)
+
+    def _candidates(self, layer, span):
+        x0, y0, x1, y1 = span
+        cells = self.cells
+        found = {}
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((layer, cx, cy))
+                if bucket:
+                    found.update(bucket)
+        return found
+
+    def query_rect(self, rect, layer):
+        # Entities in `layer` whose rect overlaps `rect`
+        rect = pygame.Rect(rect)
+        return [entity for entity in self._candidates(layer, self._span(rect)) if rect.colliderect(entity.rect)]
+
+    def query_radius(self, x, y, radius, layer):
+        # Entities in `layer` whose center lies within `radius` of (x, y)
+        size = self.cell_size
+        span = (int((x - radius) // size), int((y - radius) // size),
+                int((x + radius) // size), int((y + radius) // size))
+        radius_sq = radius * radius
+        result = []
+        for entity in self._candidates(layer, span):
+            cx, cy = entity.rect.center
+            if (cx - x) ** 2 + (cy - y) ** 2 <= radius_sq:
+                result.append(entity)
+        return result
+
+    def pairs(self, layer):
+        # Overlapping pairs within one layer, each reported once
+        seen = set()
+        result = []
+        for (cell_layer, _, _), bucket in self.cells.items():
+            if cell_layer != layer or len(bucket) < 2:
+                continue
+            members = list(bucket)
+            for i, a in enumerate(members):
+                for b in members[i + 1:]:
+                    key = (id(a), id(b)) if id(a) < id(b) else (id(b), id(a))
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    if a.rect.colliderect(b.rect):
+                        result.append((a, b))
+        return result
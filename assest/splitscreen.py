@@ -0,0 +1,185 @@
+"""Split-screen local multiplayer.
+
+Every player drives on the same road through the same traffic, so the
+world is simulated and drawn once per frame, sharing the road bake, the
+rotation atlases and the particle pool. ``SplitScreen`` then cuts one
+viewport per player out of that frame with a single blit and draws the
+player's own HUD on top.
+"""
+import pygame
+
+from .engine import Simulation, SCREEN_HEIGHT
+from .hud import HUD
+from .player import Player, PLAYER_COLORS
+
+MAX_PLAYERS = len(PLAYER_COLORS)
+DIVIDER_COLOR = (0, 195, 255)
+
+
+class Racer:
+    """One seat in a split-screen game, and what happened to it last step."""
+
+    __slots__ = ("player", "score", "score_change", "damage_taken", "alive")
+
+    def __init__(self, player):
+        self.player = player
+        self.score = 0
+        self.score_change = 0
+        self.damage_taken = 0
+        self.alive = True
+
+
+class SplitSimulation(Simulation):
+    """A simulation with several players sharing the road, traffic and effects.
+
+    ``step`` takes one InputState per player. The run is over once every
+    player has crashed, and ``score`` is the best individual score.
+    Snapshots, replays and rewinding only cover single-player runs, so
+    ``snapshot`` and ``restore`` raise NotImplementedError; the app never
+    records or rewinds a split-screen game.
+    """
+
+    def __init__(self, players=2, seed=None, profiler=None, batched_ai=False, balance=None, track=None):
+        if not 1 <= players <= MAX_PLAYERS:
+            raise ValueError(f"split screen takes 1 to {MAX_PLAYERS} players, not {players}")
+        super().__init__(seed, profiler, batched_ai, balance, track)
+
+        # One lane-width apart across the road, player one on the left
+        y = SCREEN_HEIGHT - 100
+        geometry = self.road.geometry(y)
+        lane_width = geometry.width / players
+        self.players = []
+        self.racers = []
+        for i in range(players):
+            x = geometry.left + (i + 0.5) * lane_width
+            if i == 0:
+                player = self.player
+                player.position.update(x, y)
+                player.prev_position.update(x, y)
+                player.rect.center = player.position
+            else:
+                player = Player(x, y, style=i)
+                self.effect_manager.add_boost_effect(player)
+            self.players.append(player)
+            self.racers.append(Racer(player))
+
+    def step(self, controls):
+        racers = self.racers
+        for racer in racers:
+            racer.score_change = 0
+            racer.damage_taken = 0
+        self.score_change = 0
+        self.damage_taken = 0
+        self.pickups = 0
+        if self.game_over:
+            return
+
+        profiler = self.profiler
+        active = [(racer, state) for racer, state in zip(racers, controls) if racer.alive]
+        for racer, state in active:
+            if state.boost:
+                racer.player.apply_boost()
+
+        # Each car scores its own distance; the road scrolls with the fastest
+        speeds = [5 + racer.player.velocity.length() for racer, _ in active]
+        self.road.update(max(speeds))
+        profiler.mark("road.update")
+
+        for racer, state in active:
+            geometry = self.road.geometry(racer.player.position.y)
+            racer.player.update(geometry.width, SCREEN_HEIGHT, state, geometry.left)
+        profiler.mark("player.update")
+
+        # Traffic steers toward the car furthest up the screen
+        leader = min((racer.player for racer, _ in active), key=lambda player: player.position.y)
+        self.enemy_manager.update(leader.position)
+        profiler.mark("enemies.update")
+        self.powerup_manager.update()
+        profiler.mark("powerups.update")
+
+        self.effect_manager.update()
+        profiler.mark("effects.update")
+
+        for racer, _ in active:
+            player = racer.player
+            if self.enemy_manager.check_collisions(player):
+                damage = self.balance.collision_damage
+                racer.damage_taken = damage
+                if player.take_damage(damage):
+                    # Out of the race; the others carry on
+                    racer.alive = False
+                    self.players.remove(player)
+                    self.effect_manager.boost_effects.pop(player, None)
+                    self.effect_manager.add_explosion(player.position.x, player.position.y, (255, 100, 0), 50)
+                else:
+                    self.effect_manager.add_explosion(player.position.x, player.position.y, (255, 100, 0), 20)
+
+            pickups = self.powerup_manager.check_collisions(player)
+            if pickups:
+                self.effect_manager.add_collect_effect(player.position.x, player.position.y, (0, 195, 255))
+                racer.score_change += 50
+                self.pickups += pickups
+        profiler.mark("collisions")
+
+        for (racer, _), speed in zip(active, speeds):
+            racer.score_change += int(speed * 0.1)
+            racer.score += racer.score_change
+            self.damage_taken += racer.damage_taken
+
+        self.score_change = max(racer.score_change for racer in racers)
+        self.score = max(racer.score for racer in racers)
+        self.game_over = not any(racer.alive for racer in racers)
+        self.tick += 1
+
+    def snapshot(self):
+        raise NotImplementedError("split-screen runs cannot be snapshotted")
+
+    def restore(self, state):
+        raise NotImplementedError("split-screen runs cannot be restored")
+
+
+class SplitScreen:
+    """Side-by-side viewports, one per player, cut from one shared world frame.
+
+    The world is drawn once into an off-screen surface the size of the
+    window. Each viewport is a window-height column centered on its
+    player's car, so the whole split screen costs one world draw, blits
+    adding up to one screen of pixels, and a HUD per player.
+    """
+
+    def __init__(self, sim, screen):
+        self.sim = sim
+        self.screen = screen
+        width, height = screen.get_size()
+        self.world = pygame.Surface((width, height), 0, screen)
+
+        count = len(sim.racers)
+        view_width = width // count
+        self.viewports = [pygame.Rect(i * view_width, 0, view_width, height) for i in range(count)]
+        self.views = [screen.subsurface(viewport) for viewport in self.viewports]
+        self.huds = [HUD(view_width, height) for _ in range(count)]
+
+    def update(self):
+        # Call after every step, like HUD.update
+        for racer, hud in zip(self.sim.racers, self.huds):
+            hud.update(racer.score_change, racer.damage_taken)
+
+    def draw(self, alpha=1.0):
+        world = self.world
+        world.fill((0, 0, 0))
+        self.sim.draw(world, alpha)
+
+        screen = self.screen
+        world_width = world.get_width()
+        for racer, viewport, view, hud in zip(self.sim.racers, self.viewports, self.views, self.huds):
+            # Follow the car sideways, keeping the crop inside the world frame
+            player = racer.player
+            left = min(max(player.rect.centerx - viewport.width // 2, 0), world_width - viewport.width)
+            screen.blit(world, viewport.topleft, (left, 0, viewport.width, viewport.height))
+
+            hud.draw(view, player, racer.score, player.velocity.length())
+            if not racer.alive:
+                hud.draw_wrecked(view, racer.score)
+
+        for viewport in self.viewports[1:]:
+            pygame.draw.line(screen, DIVIDER_COLOR, viewport.topleft, (viewport.left, viewport.bottom), 2)
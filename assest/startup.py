@@ -0,0 +1,40 @@
+import sys
+import time
+
+# Milestones in the order a normal launch reaches them
+MILESTONES = ["imports", "display", "first_loading_frame", "assets", "first_menu_frame", "first_gameplay_frame"]
+
+
+class StartupTimer:
+    """Records how long after launch each startup milestone is first reached.
+
+    Times are measured from ``started``, which the application sets to the
+    moment its module began importing. Only the first ``mark`` of each
+    milestone counts, so marking from inside a loop is free after that.
+    """
+
+    def __init__(self, started=None, budget_ms=None):
+        self.started = time.perf_counter() if started is None else started
+        self.budget_ms = budget_ms
+        self.times = {}
+
+    def mark(self, milestone):
+        # Returns True the first time a milestone is reached
+        if milestone in self.times:
+            return False
+        self.times[milestone] = (time.perf_counter() - self.started) * 1000.0
+        return True
+
+    def elapsed(self, milestone):
+        return self.times.get(milestone)
+
+    def over_budget(self, milestone="first_menu_frame"):
+        elapsed = self.times.get(milestone)
+        return self.budget_ms is not None and elapsed is not None and elapsed > self.budget_ms
+
+    def report(self):
+        return {milestone: round(self.times[milestone], 2) for milestone in MILESTONES if milestone in self.times}
+
+    def print_report(self, file=sys.stderr):
+        for milestone, elapsed in self.report().items():
+            print(f"startup {milestone:22s} {elapsed:8.1f} ms", file=file)
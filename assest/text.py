@@ -0,0 +1,60 @@
+import pygame
+
+# Fonts are created once per process and shared
+_fonts = {}
+
+
+def get_font(name, size):
+    font = _fonts.get((name, size))
+    if font is None:
+        # The font module is only started once text is first needed
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = pygame.font.SysFont(name, size)
+        _fonts[(name, size)] = font
+    return font
+
+
+class Label:
+    """A rendered string that is only re-rendered when its text changes."""
+
+    def __init__(self, font, color, text=None):
+        self.font = font
+        self.color = color
+        self.text = None
+        self.surface = None
+        if text is not None:
+            self.get(text)
+
+    def get(self, text):
+        if text != self.text:
+            self.text = text
+            self.surface = self.font.render(text, True, self.color)
+        return self.surface
+
+    def set_color(self, color):
+        if color != self.color:
+            self.color = color
+            self.text = None
+
+
+class GlyphAtlas:
+    """Pre-rendered characters for composing fast-changing numbers by blitting."""
+
+    def __init__(self, font, color, chars="0123456789"):
+        self.glyphs = {char: font.render(char, True, color) for char in chars}
+        self.height = max(glyph.get_height() for glyph in self.glyphs.values())
+
+    def width(self, text):
+        glyphs = self.glyphs
+        return sum(glyphs[char].get_width() for char in text)
+
+    def draw(self, screen, text, pos):
+        # Returns the x coordinate just past the last glyph
+        x, y = pos
+        glyphs = self.glyphs
+        for char in text:
+            glyph = glyphs[char]
+            screen.blit(glyph, (x, y))
+            x += glyph.get_width()
+        return x
@@ -0,0 +1,42 @@
+class FixedTimestep:
+    """Accumulator that turns variable frame times into fixed simulation ticks.
+
+    ``advance`` returns how many ticks to run for the frame that just ended
+    and leaves ``alpha`` as the fraction of a tick still in the accumulator,
+    which the renderer uses to interpolate between the last two ticks.
+
+    At most ``max_steps`` ticks run per frame. Backlog beyond that is dropped,
+    so a slow frame makes the game briefly run slower instead of spiraling
+    into ever longer catch-up frames.
+    """
+
+    def __init__(self, tick_rate=60, max_steps=5, max_frame_time=0.25):
+        self.tick_rate = tick_rate
+        self.dt = 1.0 / tick_rate
+        self.max_steps = max_steps
+        self.max_frame_time = max_frame_time
+
+        self.accumulator = 0.0
+        self.alpha = 0.0
+        self.dropped_time = 0.0
+        self.total_ticks = 0
+
+    def advance(self, frame_time):
+        # Ignore pathological gaps such as a dragged window or a debugger pause
+        frame_time = min(frame_time, self.max_frame_time)
+        self.accumulator += frame_time
+
+        steps = int(self.accumulator / self.dt)
+        if steps > self.max_steps:
+            self.dropped_time += (steps - self.max_steps) * self.dt
+            self.accumulator -= (steps - self.max_steps) * self.dt
+            steps = self.max_steps
+
+        self.accumulator -= steps * self.dt
+        self.alpha = min(1.0, max(0.0, self.accumulator / self.dt))
+        self.total_ticks += steps
+        return steps
+
+    def reset(self):
+        self.accumulator = 0.0
+        self.alpha = 0.0
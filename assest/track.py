@@ -0,0 +1,377 @@
+"""Tracks made of segments, stored in a chunked binary file that is read through mmap.
+
+A track is a loop of segments. Each segment has a length (in pixels of
+travel), a road width, a lane count, a curve (how far the road center
+shifts sideways across the segment) and a spawn table (traffic rate and
+power-up type weights). ``TrackBuilder`` lays segments end to end and
+writes the file. ``TrackFile`` maps it and decodes only the chunk of
+segments under the camera, so a long circuit needs no more memory or load
+time than a short one. ``ProceduralTrack`` is an endless road generated
+from a seed as it is driven.
+
+File layout, little-endian::
+
+    header   magic "CDTK", version, segments per chunk, segment count,
+             chunk count, loop length, name length, name (UTF-8)
+    index    per chunk: start distance (f64), file offset (u64)
+    chunks   fixed-size segment records, in track order
+
+Build and inspect tracks from the command line::
+
+    python -m assest.track build circuit.txt circuit.cdt
+    python -m assest.track demo demo.cdt --minutes 30
+    python -m assest.track info circuit.cdt
+    python -m assest.track endless --seed 7 --segments 20
+"""
+import argparse
+import bisect
+import math
+import mmap
+import random
+import struct
+from collections import OrderedDict
+
+MAGIC = b"CDTK"
+VERSION = 1
+CHUNK_SEGMENTS = 64
+
+POWERUP_TYPES = ("boost", "shield", "repair")
+
+_header = struct.Struct("<4sHHIIdH")
+_index = struct.Struct("<dQ")
+# start, length, width, lanes, flags, center, curve, enemy rate, power-up weights
+_segment = struct.Struct("<dIHBBfffBBBx")
+
+# Roads must keep this much screen beside them for the decorations
+_MARGIN = 50
+
+
+class Segment:
+    """One stretch of road, starting ``start`` pixels into the loop."""
+
+    __slots__ = ("start", "length", "width", "lanes", "center", "curve", "enemy_rate", "powerup_weights")
+
+    def __init__(self, start, length, width, lanes, center, curve, enemy_rate, powerup_weights):
+        self.start = start
+        self.length = length
+        self.width = width
+        self.lanes = lanes
+        self.center = center  # Road center relative to the screen center where the segment starts
+        self.curve = curve
+        self.enemy_rate = enemy_rate
+        self.powerup_weights = powerup_weights
+
+    def center_at(self, distance):
+        # Eased so that consecutive curves join without a kink
+        t = (distance - self.start) / self.length
+        t = min(max(t, 0.0), 1.0)
+        return self.center + self.curve * t * t * (3 - 2 * t)
+
+    def __repr__(self):
+        return (f"Segment(start={self.start:.0f}, length={self.length}, width={self.width}, lanes={self.lanes}, "
+                f"center={self.center:.0f}, curve={self.curve:.0f}, enemy_rate={self.enemy_rate})")
+
+
+class TrackBuilder:
+    """Lays segments end to end, keeping the road on a ``screen_width`` screen."""
+
+    def __init__(self, name="", screen_width=800):
+        self.name = name
+        self.screen_width = screen_width
+        self.segments = []
+        self.length = 0.0
+        self.center = 0.0
+
+    def segment(self, length, width=400, lanes=3, curve=0.0, enemy_rate=1.0, powerups=(1, 1, 1)):
+        if length <= 0 or not 1 <= lanes <= 8 or width < lanes * 60:
+            raise ValueError(f"bad segment: length={length} width={width} lanes={lanes}")
+        # Clamp the curve so both edges and their decorations stay on screen
+        limit = self.screen_width / 2 - width / 2 - _MARGIN
+        if limit < 0:
+            raise ValueError(f"road width {width} does not fit a {self.screen_width} pixel screen")
+        end = min(max(self.center + curve, -limit), limit)
+        # The start of a segment must fit its own width too
+        start_center = min(max(self.center, -limit), limit)
+        self.segments.append(Segment(self.length, int(length), int(width), int(lanes), start_center,
+                                     end - start_center, float(enemy_rate), tuple(int(w) for w in powerups)))
+        self.length += int(length)
+        self.center = end
+        return self
+
+    def straight(self, length, **kwargs):
+        return self.segment(length, **kwargs)
+
+    def curve(self, length, shift, **kwargs):
+        return self.segment(length, curve=shift, **kwargs)
+
+    def write(self, path, chunk_segments=CHUNK_SEGMENTS):
+        write_track(path, self.segments, self.name, chunk_segments)
+
+
+def write_track(path, segments, name="", chunk_segments=CHUNK_SEGMENTS):
+    if not segments:
+        raise ValueError("a track needs at least one segment")
+    name_bytes = name.encode("utf-8")
+    chunk_count = (len(segments) + chunk_segments - 1) // chunk_segments
+    last = segments[-1]
+    loop_length = last.start + last.length
+
+    index_offset = _header.size + len(name_bytes)
+    data_offset = index_offset + chunk_count * _index.size
+    chunk_bytes = chunk_segments * _segment.size
+
+    out = bytearray(_header.pack(MAGIC, VERSION, chunk_segments, len(segments), chunk_count,
+                                 loop_length, len(name_bytes)))
+    out += name_bytes
+    for chunk in range(chunk_count):
+        out += _index.pack(segments[chunk * chunk_segments].start, data_offset + chunk * chunk_bytes)
+    for s in segments:
+        out += _segment.pack(s.start, s.length, s.width, s.lanes, 0, s.center, s.curve, s.enemy_rate,
+                             *s.powerup_weights)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+class TrackFile:
+    """A memory-mapped track. ``segment_at`` wraps around the loop.
+
+    Only the index is read up front. Chunks are decoded on first use and
+    the ``cache_chunks`` most recently used are kept.
+    """
+
+    def __init__(self, path, cache_chunks=4):
+        self.path = path
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.chunk_segments, self.segment_count, self.chunk_count,
+         self.length, name_length) = _header.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a Cyber Drift track")
+        if version != VERSION:
+            raise ValueError(f"unsupported track version {version}")
+        self.name = bytes(self.map[_header.size:_header.size + name_length]).decode("utf-8")
+        self.index_offset = _header.size + name_length
+
+        self.cache_chunks = cache_chunks
+        self.chunks = OrderedDict()  # chunk number -> (starts, segments)
+        self.last = None  # Most recent answer, which nearly every lookup hits again
+
+        # Statistics
+        self.chunk_loads = 0
+
+    def close(self):
+        self.chunks.clear()
+        self.last = None
+        self.map.close()
+        self.file.close()
+
+    def _chunk_containing(self, distance):
+        # Binary search of the index straight from the mapping
+        low, high = 0, self.chunk_count - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if _index.unpack_from(self.map, self.index_offset + middle * _index.size)[0] <= distance:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    def _load_chunk(self, number):
+        chunk = self.chunks.get(number)
+        if chunk is not None:
+            self.chunks.move_to_end(number)
+            return chunk
+        offset = _index.unpack_from(self.map, self.index_offset + number * _index.size)[1]
+        count = min(self.chunk_segments, self.segment_count - number * self.chunk_segments)
+        segments = []
+        for start, length, width, lanes, _, center, curve, enemy_rate, *weights in _segment.iter_unpack(
+                self.map[offset:offset + count * _segment.size]):
+            segments.append(Segment(start, length, width, lanes, center, curve, enemy_rate, tuple(weights)))
+        chunk = ([segment.start for segment in segments], segments)
+        self.chunks[number] = chunk
+        self.chunk_loads += 1
+        while len(self.chunks) > self.cache_chunks:
+            self.chunks.popitem(last=False)
+        return chunk
+
+    def segments(self):
+        # Every segment in order, one chunk at a time
+        for number in range(self.chunk_count):
+            yield from self._load_chunk(number)[1]
+
+    def segment_at(self, distance):
+        """The segment under ``distance`` pixels of travel from the start line."""
+        distance %= self.length
+        last = self.last
+        if last is not None and last.start <= distance < last.start + last.length:
+            return last
+        starts, segments = self._load_chunk(self._chunk_containing(distance))
+        segment = segments[bisect.bisect_right(starts, distance) - 1]
+        self.last = segment
+        return segment
+
+
+class ProceduralTrack:
+    """An endless track generated from ``seed``, one segment at a time as it is reached.
+
+    Each segment follows from the seed and the segments before it, so the
+    road is the same however far ahead it is looked at. A segment takes
+    microseconds to generate and a few dozen bytes to keep, so all of them
+    are kept and a rewound game finds the same road.
+    """
+
+    length = math.inf
+
+    # Segment kinds and how often they come up
+    KINDS = ("straight", "curve", "merge", "split", "width")
+    KIND_WEIGHTS = (3, 4, 1, 1, 1.5)
+    LANES = (2, 5)
+    LANE_WIDTHS = (100, 150)
+    LENGTHS = (600, 1400)
+    MAX_SHIFT = 220
+
+    def __init__(self, seed, screen_width=800):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.builder = TrackBuilder(f"Endless #{seed}", screen_width)
+        # The same straight three-lane start as the plain road
+        self.builder.segment(1200)
+        self.starts = [0.0]
+        self.last = None
+
+    @property
+    def name(self):
+        return self.builder.name
+
+    def _generate(self):
+        rng = self.rng
+        builder = self.builder
+        previous = builder.segments[-1]
+        lanes = previous.lanes
+        lane_width = previous.width // lanes
+        kind = rng.choices(self.KINDS, self.KIND_WEIGHTS)[0]
+        curve = 0.0
+        if kind == "curve":
+            curve = rng.uniform(-self.MAX_SHIFT, self.MAX_SHIFT)
+        elif kind == "merge":
+            lanes = max(lanes - 1, self.LANES[0])
+        elif kind == "split":
+            lanes = min(lanes + 1, self.LANES[1])
+        elif kind == "width":
+            lane_width = rng.randint(*self.LANE_WIDTHS)
+        # Narrow the lanes rather than let the road off the screen
+        lane_width = min(lane_width, (builder.screen_width - 2 * _MARGIN - 20) // lanes)
+        length = rng.randrange(self.LENGTHS[0], self.LENGTHS[1] + 1, 50)
+        enemy_rate = round(rng.uniform(0.5, 1.5), 2)
+        powerups = tuple(rng.randint(0, 3) for _ in POWERUP_TYPES)
+        builder.segment(length, lanes * lane_width, lanes, curve, enemy_rate, powerups)
+        self.starts.append(builder.segments[-1].start)
+
+    def generate_until(self, distance):
+        while self.builder.length <= distance:
+            self._generate()
+
+    def segments(self):
+        return iter(self.builder.segments)
+
+    def segment_at(self, distance):
+        """The segment under ``distance``, generating the road up to it if needed."""
+        last = self.last
+        if last is not None and last.start <= distance < last.start + last.length:
+            return last
+        self.generate_until(distance)
+        segment = self.builder.segments[max(bisect.bisect_right(self.starts, distance) - 1, 0)]
+        self.last = segment
+        return segment
+
+
+def parse_track(lines, name=""):
+    """Build a track from text: one ``length width lanes curve [enemy_rate [boost shield repair]]`` per line."""
+    builder = TrackBuilder(name)
+    for number, line in enumerate(lines, 1):
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        if line.startswith("name:"):
+            builder.name = line[5:].strip()
+            continue
+        fields = line.split()
+        try:
+            length, width, lanes = int(fields[0]), int(fields[1]), int(fields[2])
+            curve = float(fields[3]) if len(fields) > 3 else 0.0
+            enemy_rate = float(fields[4]) if len(fields) > 4 else 1.0
+            powerups = tuple(int(value) for value in fields[5:8]) if len(fields) > 5 else (1, 1, 1)
+            if len(powerups) != len(POWERUP_TYPES):
+                raise ValueError("need a weight for each power-up type")
+            builder.segment(length, width, lanes, curve, enemy_rate, powerups)
+        except (IndexError, ValueError) as error:
+            raise ValueError(f"line {number}: {error}") from None
+    return builder
+
+
+def demo_track(minutes=1.0, speed=10.0, tick_rate=60):
+    # A repeating hand-made lap long enough for `minutes` of driving at `speed` pixels per tick
+    lap = [
+        dict(length=1200),
+        dict(length=900, curve=-120),
+        dict(length=600, width=320, lanes=2, enemy_rate=1.5),
+        dict(length=900, curve=200, width=320, lanes=2),
+        dict(length=800, width=480, lanes=4, powerups=(2, 1, 1)),
+        dict(length=700, curve=-80, width=480, lanes=4),
+        dict(length=1000, enemy_rate=0.0, powerups=(0, 1, 3)),
+    ]
+    builder = TrackBuilder(f"Demo circuit ({minutes:g} min)")
+    target = minutes * 60 * tick_rate * speed
+    while builder.length < target:
+        for segment in lap:
+            builder.segment(**segment)
+    # Bring the road back to the middle so the loop joins up
+    builder.segment(1200, curve=-builder.center)
+    return builder
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and inspect Cyber Drift track files")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="compile a text track description")
+    build.add_argument("source")
+    build.add_argument("output")
+    demo = commands.add_parser("demo", help="write a sample circuit")
+    demo.add_argument("output")
+    demo.add_argument("--minutes", type=float, default=1.0)
+    info = commands.add_parser("info", help="describe a track file")
+    info.add_argument("path")
+    info.add_argument("--segments", action="store_true", help="list every segment")
+    endless = commands.add_parser("endless", help="list the start of a generated endless track")
+    endless.add_argument("--seed", type=int, default=0)
+    endless.add_argument("--segments", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        with open(args.source) as f:
+            builder = parse_track(f)
+        builder.write(args.output)
+        print(f"{args.output}: {len(builder.segments)} segments, {builder.length:.0f} px")
+    elif args.command == "demo":
+        builder = demo_track(args.minutes)
+        builder.write(args.output)
+        print(f"{args.output}: {len(builder.segments)} segments, {builder.length:.0f} px")
+    elif args.command == "endless":
+        track = ProceduralTrack(args.seed)
+        while len(track.builder.segments) < args.segments:
+            track.generate_until(track.builder.length)
+        print(track.name)
+        for segment in track.builder.segments[:args.segments]:
+            print(segment)
+    else:
+        track = TrackFile(args.path)
+        print(f"{track.name or args.path}: {track.segment_count} segments in {track.chunk_count} chunks, "
+              f"{track.length:.0f} px per lap")
+        if args.segments:
+            for segment in track.segments():
+                print(segment)
+        track.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,432 @@
+"""Batched, vectorized game environment for training driving bots.
+
+``VectorEnv`` runs ``num_envs`` independent games in lockstep with all
+state in NumPy arrays: player physics, enemy AI and culling, power-ups,
+collisions, damage and scoring follow ``Simulation.step`` rule for rule,
+with collision rects sized from the same rotation atlases. Random draws
+come from one batch generator, so a game here does not replay a seeded
+``Simulation`` bit for bit; the dynamics are the same.
+
+The interface follows the Gym vector-env convention::
+
+    env = VectorEnv(256, seed=1)
+    obs = env.reset()
+    obs, rewards, dones, info = env.step(actions)  # actions: (B,) input bits or (B, 5) bools
+
+Finished games reset automatically; ``info`` carries the final score and
+length of games that ended this step, and every game's live enemy count.
+"""
+import numpy as np
+
+from .atlas import atlas_registry
+from .controls import InputState
+from .engine import Balance, ROAD_WIDTH, SCREEN_HEIGHT, SCREEN_WIDTH, TICK_RATE
+from .enemy import EnemyManager, build_enemy_image
+from .player import build_player_image
+from .powerup import POWERUP_COLORS, build_powerup_image
+
+# Per-game features: player state, then nearest enemies and power-ups
+NEAREST_ENEMIES = 4
+NEAREST_POWERUPS = 2
+OBSERVATION_SIZE = 9 + NEAREST_ENEMIES * 3 + NEAREST_POWERUPS * 4
+
+# Actions are InputState bits
+ACTION_COUNT = 1 << len(InputState.__slots__)
+_UP, _DOWN, _LEFT, _RIGHT, _BOOST = (1 << i for i in range(len(InputState.__slots__)))
+
+_POWERUP_TYPES = list(POWERUP_COLORS)  # boost, shield, repair
+
+# Enemies enter above the screen and drive down it, as in EnemyManager
+_ENEMY_SPAWN_Y = EnemyManager.SPAWN_Y
+_ENEMY_CULL_Y = EnemyManager.CULL_Y
+
+# Gray levels of the rendered observation
+_ROAD_SHADE, _POWERUP_SHADE, _PLAYER_SHADE, _ENEMY_SHADE = 60, 150, 200, 255
+
+
+def _round(values):
+    # Rect centers round half away from zero, like pygame
+    return np.where(values >= 0, np.floor(values + 0.5), -np.floor(0.5 - values))
+
+
+class _FrameSizes:
+    """Width and height of every pre-rotated frame of one design."""
+
+    def __init__(self, atlas):
+        self.steps = atlas.steps
+        self.step_angle = atlas.step_angle
+        self.width = np.array([frame.get_width() for frame in atlas.frames])
+        self.height = np.array([frame.get_height() for frame in atlas.frames])
+
+    def rects(self, x, y, angle):
+        # (left, top, width, height) as pygame would place image.get_rect(center=(x, y))
+        index = np.rint(angle / self.step_angle).astype(np.int64) % self.steps
+        width = self.width[index]
+        height = self.height[index]
+        return _round(x) - width // 2, _round(y) - height // 2, width, height
+
+
+def _overlap(ax, ay, aw, ah, bx, by, bw, bh):
+    # pygame.Rect.colliderect, broadcast
+    return (ax < bx + bw) & (ax + aw > bx) & (ay < by + bh) & (ay + ah > by)
+
+
+class VectorEnv:
+    """``num_envs`` games stepped together. See the module docstring."""
+
+    def __init__(self, num_envs, seed=None, max_ticks=TICK_RATE * 120, balance=None,
+                 max_enemies=32, max_powerups=8, render_size=None):
+        self.num_envs = num_envs
+        self.max_ticks = max_ticks
+        self.balance = balance or Balance()
+        self.max_enemies = max_enemies
+        self.max_powerups = max_powerups
+        self.render_size = render_size  # (width, height) of the optional rendered observation
+        self.rng = np.random.default_rng(seed)
+
+        self.road_left = (SCREEN_WIDTH - ROAD_WIDTH) // 2
+        self.lane_width = ROAD_WIDTH / 3
+
+        # Collision rects come from the same frames the sprites use
+        self.player_frames = _FrameSizes(atlas_registry.get("player", build_player_image))
+        self.enemy_frames = _FrameSizes(atlas_registry.get("enemy", build_enemy_image))
+        self.powerup_frames = _FrameSizes(atlas_registry.get(("powerup", "boost"), build_powerup_image, "boost"))
+
+        B, E, P = num_envs, max_enemies, max_powerups
+        # Games
+        self.tick = np.zeros(B, dtype=np.int64)
+        self.score = np.zeros(B, dtype=np.int64)
+        self.difficulty = np.ones(B)
+        self.enemy_timer = np.zeros(B)
+        self.powerup_timer = np.zeros(B)
+
+        # Player
+        self.pos = np.zeros((B, 2))
+        self.vel = np.zeros((B, 2))
+        self.angle = np.zeros(B)
+        self.health = np.zeros(B, dtype=np.int64)
+        self.shield = np.zeros(B, dtype=np.int64)
+        self.boost = np.zeros(B, dtype=np.int64)
+
+        # Enemies
+        self.enemy_alive = np.zeros((B, E), dtype=bool)
+        self.enemy_x = np.zeros((B, E))
+        self.enemy_y = np.zeros((B, E))
+        self.enemy_vy = np.zeros((B, E))
+        self.enemy_angle = np.zeros((B, E))
+        self.enemy_lane = np.zeros((B, E), dtype=np.int64)
+        self.enemy_lane_timer = np.zeros((B, E), dtype=np.int64)
+        self.enemy_aggression = np.zeros((B, E))
+        self.enemy_level = np.zeros((B, E))
+
+        # Power-ups
+        self.powerup_alive = np.zeros((B, P), dtype=bool)
+        self.powerup_x = np.zeros((B, P))
+        self.powerup_y = np.zeros((B, P))
+        self.powerup_angle = np.zeros((B, P))
+        self.powerup_spin = np.zeros((B, P))
+        self.powerup_type = np.zeros((B, P), dtype=np.int64)
+
+        # Statistics
+        self.dropped_spawns = 0
+
+    # Episode management
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self._reset(np.ones(self.num_envs, dtype=bool))
+        return self.observe()
+
+    def _reset(self, mask):
+        self.tick[mask] = 0
+        self.score[mask] = 0
+        self.difficulty[mask] = 1.0
+        self.enemy_timer[mask] = 0
+        self.powerup_timer[mask] = self.balance.powerup_first_spawn
+        self.pos[mask] = (SCREEN_WIDTH // 2, SCREEN_HEIGHT - 100)
+        self.vel[mask] = 0
+        self.angle[mask] = 0
+        self.health[mask] = 100
+        self.shield[mask] = 0
+        self.boost[mask] = 0
+        self.enemy_alive[mask] = False
+        self.powerup_alive[mask] = False
+
+    # Stepping
+
+    def _decode(self, actions):
+        actions = np.asarray(actions)
+        if actions.ndim == 2:
+            # (B, 5) booleans in InputState field order
+            actions = (actions.astype(np.int64) << np.arange(actions.shape[1])).sum(axis=1)
+        actions = actions.astype(np.int64)
+        return [(actions & bit) != 0 for bit in (_UP, _DOWN, _LEFT, _RIGHT, _BOOST)]
+
+    def step(self, actions):
+        up, down, left, right, boost = self._decode(actions)
+        balance = self.balance
+        rng = self.rng
+        B = self.num_envs
+
+        # Boost
+        boosting = boost & (self.boost > 0)
+        if boosting.any():
+            self.vel[boosting] *= 1.5
+            self._limit_speed(boosting, 10 * 1.5)
+            self.boost[boosting] -= 1
+        road_speed = 5 + np.hypot(self.vel[:, 0], self.vel[:, 1])
+
+        self._update_player(up, down, left, right)
+        self._update_enemies(rng)
+        self._update_powerups(rng)
+
+        # Collisions with the player's rect for this tick
+        px, py, pw, ph = self.player_frames.rects(self.pos[:, 0], self.pos[:, 1], self.angle)
+        px, py, pw, ph = px[:, None], py[:, None], pw[:, None], ph[:, None]
+
+        ex, ey, ew, eh = self.enemy_frames.rects(self.enemy_x, self.enemy_y, self.enemy_angle)
+        wrecked = self.enemy_alive & _overlap(px, py, pw, ph, ex, ey, ew, eh)
+        hit = wrecked.any(axis=1)
+        self.enemy_alive &= ~wrecked  # Each enemy deals damage once
+        damage = np.where(hit, balance.collision_damage, 0)
+        self._take_damage(hit, balance.collision_damage)
+        died = hit & (self.health <= 0)
+
+        ux, uy, uw, uh = self.powerup_frames.rects(self.powerup_x, self.powerup_y, self.powerup_angle)
+        collected = self.powerup_alive & _overlap(px, py, pw, ph, ux, uy, uw, uh)
+        pickups = collected.sum(axis=1)
+        if pickups.any():
+            for kind, name in enumerate(_POWERUP_TYPES):
+                count = (collected & (self.powerup_type == kind)).sum(axis=1)
+                if name == "boost":
+                    self.boost += 100 * count
+                elif name == "shield":
+                    self.shield[count > 0] = 100
+                elif name == "repair":
+                    self.health = np.where(count > 0, np.minimum(100, self.health + 50 * count), self.health)
+            self.powerup_alive &= ~collected
+
+        # Scoring, as in Simulation.step
+        score_change = np.where(pickups > 0, 50, 0) + (road_speed * 0.1).astype(np.int64)
+        self.score += score_change
+        self.tick += 1
+
+        rewards = (score_change - damage).astype(np.float32)
+        dones = died | (self.tick >= self.max_ticks)
+        info = {
+            "score": self.score.copy(),
+            "tick": self.tick.copy(),
+            "damage": damage,
+            "pickups": pickups,
+            "enemies": self.enemy_alive.sum(axis=1),
+            "died": died,
+            "episode_score": np.where(dones, self.score, 0),
+            "episode_ticks": np.where(dones, self.tick, 0),
+        }
+        if dones.any():
+            self._reset(dones)
+        return self.observe(), rewards, dones, info
+
+    def _limit_speed(self, mask, limit):
+        speed = np.hypot(self.vel[:, 0], self.vel[:, 1])
+        over = mask & (speed > limit)
+        if over.any():
+            self.vel[over] *= (limit / speed[over])[:, None]
+
+    def _update_player(self, up, down, left, right):
+        # Player.update, for every game at once
+        vel = self.vel
+        radians = np.radians(self.angle)
+        thrust = np.where(up, -0.2, 0.0) + np.where(down, 0.2, 0.0)
+        vel[:, 0] += thrust * np.sin(radians)
+        vel[:, 1] += thrust * np.cos(radians)
+
+        moving = np.hypot(vel[:, 0], vel[:, 1]) > 0.5
+        self.angle += np.where(left & moving, 3, 0) - np.where(right & moving, 3, 0)
+
+        # Friction
+        speed = np.hypot(vel[:, 0], vel[:, 1])
+        rolling = speed > 0
+        vel[rolling] -= vel[rolling] / speed[rolling, None] * 0.05
+        stopped = rolling & (np.hypot(vel[:, 0], vel[:, 1]) < 0.1)
+        vel[stopped] = 0
+
+        self._limit_speed(np.ones(self.num_envs, dtype=bool), 10)
+        self.pos += vel
+
+        # Keep the car on the road
+        low = self.road_left + 20
+        high = self.road_left + ROAD_WIDTH - 20
+        outside = (self.pos[:, 0] < low) | (self.pos[:, 0] > high)
+        self.pos[:, 0] = np.clip(self.pos[:, 0], low, high)
+        vel[outside, 0] = 0
+
+    def _update_enemies(self, rng):
+        # EnemyManager.update: spawn, steer, cull, ramp difficulty
+        B, E = self.enemy_alive.shape
+        balance = self.balance
+        self.enemy_timer -= 1
+        spawning = self.enemy_timer <= 0
+        if spawning.any():
+            free = ~self.enemy_alive
+            has_free = free.any(axis=1)
+            self.dropped_spawns += int(np.count_nonzero(spawning & ~has_free))
+            games = np.flatnonzero(spawning & has_free)
+            slots = free[games].argmax(axis=1)
+            n = len(games)
+            lane = rng.integers(0, 3, n)
+            level = self.difficulty[games]
+            self.enemy_alive[games, slots] = True
+            self.enemy_x[games, slots] = self.road_left + (lane + 0.5) * self.lane_width
+            self.enemy_y[games, slots] = _ENEMY_SPAWN_Y
+            self.enemy_vy[games, slots] = 2 + level
+            self.enemy_angle[games, slots] = 0
+            self.enemy_lane[games, slots] = rng.integers(0, 3, n)
+            self.enemy_lane_timer[games, slots] = rng.integers(60, 181, n)
+            self.enemy_aggression[games, slots] = rng.random(n) * level
+            self.enemy_level[games, slots] = level
+            interval = rng.integers(balance.enemy_spawn_min, balance.enemy_spawn_max + 1, B)
+            self.enemy_timer[spawning] = (interval // self.difficulty)[spawning]
+
+        alive = self.enemy_alive
+        if alive.any():
+            x = self.enemy_x
+            self.enemy_y += np.where(alive, self.enemy_vy, 0)
+
+            # Move toward the target lane
+            target_x = self.road_left + (self.enemy_lane + 0.5) * self.lane_width
+            far = np.abs(x - target_x) > 5
+            toward_right = far & (x < target_x)
+            toward_left = far & ~toward_right
+            x += np.where(alive & toward_right, 2, 0) - np.where(alive & toward_left, 2, 0)
+            self.enemy_angle = np.where(toward_right, -10.0, np.where(toward_left, 10.0, 0.0))
+
+            rolls = rng.random((B, E, 4))
+            self.enemy_lane_timer -= alive
+            expired = alive & (self.enemy_lane_timer <= 0)
+            self.enemy_lane = np.where(expired, (rolls[..., 2] * 3).astype(np.int64), self.enemy_lane)
+            self.enemy_lane_timer = np.where(expired, 60 + (rolls[..., 3] * 121).astype(np.int64),
+                                             self.enemy_lane_timer)
+
+            # Chase the player's lane
+            player_x = self.pos[:, 0]
+            player_lane = ((player_x > self.road_left + self.lane_width).astype(np.int64)
+                           + (player_x > self.road_left + 2 * self.lane_width))
+            follow = alive & (rolls[..., 0] < self.enemy_aggression) & (rolls[..., 1] < 0.3 * self.enemy_level)
+            self.enemy_lane = np.where(follow, player_lane[:, None], self.enemy_lane)
+
+            top, bottom = _ENEMY_CULL_Y
+            self.enemy_alive &= (self.enemy_y >= top) & (self.enemy_y <= bottom)
+
+        self.difficulty += balance.difficulty_growth
+
+    def _update_powerups(self, rng):
+        # PowerUpManager.update
+        B = self.num_envs
+        balance = self.balance
+        self.powerup_timer -= 1
+        spawning = self.powerup_timer <= 0
+        if spawning.any():
+            free = ~self.powerup_alive
+            has_free = free.any(axis=1)
+            self.dropped_spawns += int(np.count_nonzero(spawning & ~has_free))
+            games = np.flatnonzero(spawning & has_free)
+            slots = free[games].argmax(axis=1)
+            n = len(games)
+            lane = rng.integers(0, 3, n)
+            self.powerup_alive[games, slots] = True
+            self.powerup_x[games, slots] = self.road_left + (lane + 0.5) * self.lane_width
+            self.powerup_y[games, slots] = -50
+            self.powerup_type[games, slots] = rng.integers(0, len(_POWERUP_TYPES), n)
+            self.powerup_angle[games, slots] = 0
+            self.powerup_spin[games, slots] = rng.uniform(-3, 3, n)
+            interval = rng.integers(balance.powerup_spawn_min, balance.powerup_spawn_max + 1, B)
+            self.powerup_timer[spawning] = interval[spawning]
+
+        alive = self.powerup_alive
+        self.powerup_y += np.where(alive, 2, 0)
+        self.powerup_angle += np.where(alive, self.powerup_spin, 0)
+        self.powerup_alive &= self.powerup_y <= 700
+
+    def _take_damage(self, hit, amount):
+        # Player.take_damage: the shield soaks damage first
+        shielded = hit & (self.shield > 0)
+        self.shield[shielded] -= amount
+        overflow = shielded & (self.shield < 0)
+        self.health[overflow] += self.shield[overflow]
+        self.shield[overflow] = 0
+        self.health[hit & ~shielded] -= amount
+
+    # Observations
+
+    def observe(self):
+        """Feature vectors, float32 of shape (num_envs, OBSERVATION_SIZE)."""
+        B = self.num_envs
+        obs = np.zeros((B, OBSERVATION_SIZE), dtype=np.float32)
+        x = self.pos[:, 0]
+        y = self.pos[:, 1]
+        radians = np.radians(self.angle)
+        obs[:, 0] = (x - SCREEN_WIDTH / 2) / (ROAD_WIDTH / 2)
+        obs[:, 1] = (y - SCREEN_HEIGHT / 2) / (SCREEN_HEIGHT / 2)
+        obs[:, 2:4] = self.vel / 10
+        obs[:, 4] = np.sin(radians)
+        obs[:, 5] = np.cos(radians)
+        obs[:, 6] = self.health / 100
+        obs[:, 7] = self.shield / 100
+        obs[:, 8] = np.minimum(self.boost, 300) / 100
+
+        column = 9
+        for alive, ex, ey, extra, count in (
+                (self.enemy_alive, self.enemy_x, self.enemy_y, None, NEAREST_ENEMIES),
+                (self.powerup_alive, self.powerup_x, self.powerup_y, self.powerup_type, NEAREST_POWERUPS)):
+            dx = ex - x[:, None]
+            dy = ey - y[:, None]
+            distance = np.where(alive, dx * dx + dy * dy, np.inf)
+            order = np.argsort(distance, axis=1)[:, :count]
+            rows = np.arange(B)[:, None]
+            present = alive[rows, order]
+            width = 3 if extra is None else 4
+            block = obs[:, column:column + count * width].reshape(B, count, width)
+            block[..., 0] = np.where(present, dx[rows, order] / SCREEN_WIDTH * 2, 0)
+            block[..., 1] = np.where(present, dy[rows, order] / SCREEN_HEIGHT, 0)
+            if extra is not None:
+                block[..., 2] = np.where(present, extra[rows, order] / 2, 0)
+            block[..., -1] = present
+            column += count * width
+        return obs
+
+    def render(self):
+        """Low-resolution grayscale frames, uint8 of shape (num_envs, height, width)."""
+        width, height = self.render_size or (80, 60)
+        scale_x = width / SCREEN_WIDTH
+        scale_y = height / SCREEN_HEIGHT
+        frames = np.zeros((self.num_envs, height, width), dtype=np.uint8)
+        frames[:, :, int(self.road_left * scale_x):int((self.road_left + ROAD_WIDTH) * scale_x)] = _ROAD_SHADE
+        columns = np.arange(width)
+        rows = np.arange(height)
+
+        def fill(alive, left, top, w, h, shade):
+            # One rectangle per game, drawn for every game at once
+            x0 = np.floor(left * scale_x)
+            y0 = np.floor(top * scale_y)
+            x1 = np.ceil((left + w) * scale_x)
+            y1 = np.ceil((top + h) * scale_y)
+            inside_rows = (rows >= y0[:, None]) & (rows < y1[:, None])
+            inside_columns = (columns >= x0[:, None]) & (columns < x1[:, None])
+            mask = alive[:, None, None] & inside_rows[:, :, None] & inside_columns[:, None, :]
+            frames[mask] = shade
+
+        for slot in range(self.max_powerups):
+            alive = self.powerup_alive[:, slot]
+            if alive.any():
+                fill(alive, *self.powerup_frames.rects(self.powerup_x[:, slot], self.powerup_y[:, slot],
+                                                       self.powerup_angle[:, slot]), _POWERUP_SHADE)
+        for slot in range(self.max_enemies):
+            alive = self.enemy_alive[:, slot]
+            if alive.any():
+                fill(alive, *self.enemy_frames.rects(self.enemy_x[:, slot], self.enemy_y[:, slot],
+                                                     self.enemy_angle[:, slot]), _ENEMY_SHADE)
+        fill(np.ones(self.num_envs, dtype=bool),
+             *self.player_frames.rects(self.pos[:, 0], self.pos[:, 1], self.angle), _PLAYER_SHADE)
+        return frames